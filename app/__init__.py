@@ -2,7 +2,7 @@
 from flask import Flask, render_template, g, session
 from flask_pymongo import PyMongo
 from flask_login import LoginManager, login_required, current_user
-from .config import Config
+from .config import Config, DEFAULT_SECRET_KEY
 import logging
 from datetime import datetime
 import os
@@ -21,6 +21,12 @@ dashboard_service = None
 group_service = None
 admin_dashboard_service = None
 system_settings_service = None
+capacity_queue = None
+sms_outbox_service = None
+sms_rate_limiter = None
+engagement_service = None
+user_context_cache = None
+rsvp_fragment_cache = None
 
 def create_app(config_class=Config):
     app = Flask(__name__)
@@ -34,7 +40,7 @@ def create_app(config_class=Config):
     login_manager.login_message_category = 'info'
 
     # Initialize services
-    global event_service, contact_service, sms_service, user_service, registration_code_service, task_scheduler, message_log_service, dashboard_service, group_service, admin_dashboard_service, system_settings_service
+    global event_service, contact_service, sms_service, user_service, registration_code_service, task_scheduler, message_log_service, dashboard_service, group_service, admin_dashboard_service, system_settings_service, capacity_queue, sms_outbox_service, sms_rate_limiter, engagement_service, user_context_cache, rsvp_fragment_cache
     from .services.event_service import EventService
     from .services.contact_service import ContactService
     from .services.sms_service import SMSService
@@ -45,15 +51,41 @@ def create_app(config_class=Config):
     from .services.group_service import GroupService
     from .services.admin_dashboard_service import AdminDashboardService
     from .services.system_settings_service import SystemSettingsService
+    from .services.capacity_queue import CapacityQueue
+    from .services.sms_outbox_service import SMSOutboxService
+    from .services.engagement_service import EngagementService
+    from .services.rate_limiter import SMSRateLimiter
+    from .services.user_context_cache import UserContextCache
+    from .services.fragment_cache import FragmentCache
+    from .services.password_hasher import PasswordHasher, MIN_ROUNDS
+    from .models.group import Group
+    from .services.message_templates import message_text
     from .scheduler import TaskScheduler
     
     with app.app_context():
         system_settings_service = SystemSettingsService(mongo.db)
 
-    message_log_service = MessageLogService(mongo.db)
+    message_log_service = MessageLogService(
+        mongo.db,
+        flush_size=app.config['MESSAGE_LOG_FLUSH_SIZE'],
+        flush_interval_seconds=app.config['MESSAGE_LOG_FLUSH_SECONDS'],
+        retention_days=app.config['MESSAGE_LOG_RETENTION_DAYS'],
+        archive_dir=app.config['MESSAGE_LOG_ARCHIVE_DIR']
+    )
     dashboard_service = DashboardService(mongo.db)
-    group_service = GroupService(mongo.db)
-    admin_dashboard_service = AdminDashboardService(mongo.db)
+    rsvp_fragment_cache = FragmentCache(max_entries=app.config['RSVP_FRAGMENT_CACHE_SIZE'])
+    user_context_cache = UserContextCache(mongo.db, ttl_seconds=app.config['USER_CONTEXT_CACHE_SECONDS'])
+    group_service = GroupService(mongo.db, context_cache=user_context_cache)
+    admin_dashboard_service = AdminDashboardService(mongo.db, snapshot_max_age_minutes=app.config['PLATFORM_STATS_INTERVAL'])
+    sms_outbox_service = SMSOutboxService(mongo.db, max_attempts=app.config['SMS_OUTBOX_MAX_ATTEMPTS'])
+    sms_rate_limiter = SMSRateLimiter(
+        mongo.db,
+        settings_service=system_settings_service,
+        recipient_limit=app.config['RECIPIENT_SPAM_LIMIT'],
+        recipient_window_minutes=app.config['RECIPIENT_SPAM_WINDOW_MINUTES'],
+        sync_seconds=app.config['SMS_RATE_SYNC_SECONDS'],
+        group_cache_seconds=app.config['SMS_GROUP_LIMIT_CACHE_SECONDS']
+    )
     
     sms_service = SMSService(
         sid=app.config['TWILIO_SID'],
@@ -62,26 +94,47 @@ def create_app(config_class=Config):
         message_log_service=message_log_service,
         base_url=app.config['BASE_URL'],
         enabled=app.config['SMS_ENABLED'],
-        settings_service=system_settings_service
+        rate_limiter=sms_rate_limiter,
+        api_base_url=app.config['TWILIO_API_BASE_URL'],
+        concurrency=app.config['SMS_SEND_CONCURRENCY'],
+        timeout_seconds=app.config['SMS_HTTP_TIMEOUT_SECONDS'],
+        outbox_service=sms_outbox_service if app.config['SMS_OUTBOX_ENABLED'] else None
     )
     
+    # Only a process that runs the scheduler drains the capacity queue; others flag events in Mongo instead
+    run_scheduler = app.config.get('SCHEDULER_ENABLED', True) and (not app.debug or os.environ.get("WERKZEUG_RUN_MAIN") == "true")
+    capacity_queue = CapacityQueue() if run_scheduler else None
+    engagement_service = EngagementService(mongo.db)
     event_service = EventService(
         db=mongo.db,
-        invitation_expiry_hours=app.config['INVITATION_EXPIRY_HOURS']
+        invitation_expiry_hours=app.config['INVITATION_EXPIRY_HOURS'],
+        # RSVP tokens are only signed with a configured key; the default one is public
+        secret_key=app.config['SECRET_KEY'] if app.config['SECRET_KEY'] != DEFAULT_SECRET_KEY else None,
+        capacity_queue=capacity_queue,
+        engagement_service=engagement_service
     )
-    contact_service = ContactService(mongo.db)
-    user_service = UserService(mongo.db)
+    contact_service = ContactService(mongo.db, engagement_service=engagement_service)
+    # The cost is calibrated once per machine by scripts/calibrate_bcrypt.py, not on every start
+    bcrypt_rounds = max(MIN_ROUNDS, app.config['BCRYPT_ROUNDS'])
+    app.logger.info(f'Hashing passwords with bcrypt cost {bcrypt_rounds}.')
+    password_hasher = PasswordHasher(
+        rounds=bcrypt_rounds,
+        workers=app.config['BCRYPT_POOL_WORKERS'],
+        queue_limit=app.config['BCRYPT_QUEUE_LIMIT'],
+        queue_wait_seconds=app.config['BCRYPT_QUEUE_WAIT_SECONDS']
+    )
+    user_service = UserService(mongo.db, context_cache=user_context_cache, password_hasher=password_hasher)
     registration_code_service = RegistrationCodeService(mongo.db)
 
-    if app.config.get('SCHEDULER_ENABLED', True):
-        if not app.debug or os.environ.get("WERKZEUG_RUN_MAIN") == "true":
-            task_scheduler = TaskScheduler.get_instance()
-            task_scheduler.init_app(app, event_service, sms_service)
-            app.logger.info('Task scheduler initialized and started.')
+    if run_scheduler:
+        task_scheduler = TaskScheduler.get_instance()
+        task_scheduler.init_app(app, event_service, sms_service, message_log_service, admin_dashboard_service)
+        app.logger.info('Task scheduler initialized and started.')
 
     @login_manager.user_loader
     def load_user(user_id):
-        return user_service.get_user(user_id)
+        # At most one users.find_one per TTL; it also revalidates the cached groups
+        return user_context_cache.get_user(user_id)
     
     @app.before_request
     def load_user_context():
@@ -99,29 +152,34 @@ def create_app(config_class=Config):
             if admin_view_group:
                 g.active_group = admin_view_group
                 # Admins still need to see their own groups for the switcher
-                g.user_groups = group_service.get_groups_by_owner(current_user.id)
+                g.user_groups = user_context_cache.get_groups(current_user.id)
                 return # Exit early, admin context is set
 
-        # Standard User Context Loading
-        g.user_groups = group_service.get_groups_by_owner(current_user.id)
+        # Standard User Context Loading (cached; the active group is one of the user's own groups)
+        g.user_groups = user_context_cache.get_groups(current_user.id)
 
         if current_user.active_group_id:
-            active_group_doc = group_service.get_group(current_user.active_group_id)
+            active_group_doc = next(
+                (group for group in g.user_groups if str(group['_id']) == current_user.active_group_id_str), None
+            )
             
-            if active_group_doc and any(str(group['_id']) == str(active_group_doc._id) for group in g.user_groups):
-                g.active_group = active_group_doc
+            if active_group_doc:
+                g.active_group = Group.from_dict(active_group_doc)
             else:
                 new_active_group = g.user_groups[0] if g.user_groups else None
                 if new_active_group:
                     user_service.switch_active_group(current_user.id, str(new_active_group['_id']))
-                    g.active_group = new_active_group
+                    g.active_group = Group.from_dict(new_active_group)
                 else:
                     user_service.switch_active_group(current_user.id, None)
                     g.active_group = None
         elif g.user_groups:
             first_group = g.user_groups[0]
             user_service.switch_active_group(current_user.id, str(first_group['_id']))
-            g.active_group = first_group
+            g.active_group = Group.from_dict(first_group)
+
+    # Message logs store a template id and parameters; templates render the text on display
+    app.jinja_env.globals['message_text'] = message_text
 
     @app.context_processor
     def inject_global_variables():
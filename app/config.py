@@ -4,12 +4,16 @@ from dotenv import load_dotenv
 
 load_dotenv()
 
+# Public placeholder used when SECRET_KEY is not set; nothing that must be unforgeable is signed with it
+DEFAULT_SECRET_KEY = 'your-secret-key'
+
 class Config:
-    SECRET_KEY = os.getenv('SECRET_KEY', 'your-secret-key')
+    SECRET_KEY = os.getenv('SECRET_KEY', DEFAULT_SECRET_KEY)
     MONGO_URI = os.getenv('MONGO_URI', 'mongodb://localhost:27017/rsvp-system')
     TWILIO_SID = os.getenv('TWILIO_SID')
     TWILIO_AUTH_TOKEN = os.getenv('TWILIO_AUTH_TOKEN')
     TWILIO_PHONE = os.getenv('TWILIO_PHONE')
+    TWILIO_API_BASE_URL = os.getenv('TWILIO_API_BASE_URL', 'https://api.twilio.com') # point at a fake server for testing
     BASE_URL = os.getenv('BASE_URL', 'http://localhost:5000')
     
     # RSVP System Configuration
@@ -21,11 +25,22 @@ class Config:
     # Scheduler Configuration
     SCHEDULER_ENABLED = os.getenv('SCHEDULER_ENABLED', 'true').lower() == 'true'
     EXPIRY_CHECK_INTERVAL = int(os.getenv('EXPIRY_CHECK_INTERVAL', '1'))  # minutes
-    CAPACITY_CHECK_INTERVAL = int(os.getenv('CAPACITY_CHECK_INTERVAL', '1'))  # minutes
+    CAPACITY_CHECK_INTERVAL = int(os.getenv('CAPACITY_CHECK_INTERVAL', '15'))  # minutes, safety-net sweep
+    CAPACITY_TRIGGER_DEBOUNCE_SECONDS = float(os.getenv('CAPACITY_TRIGGER_DEBOUNCE_SECONDS', '2'))
     REMINDER_CHECK_INTERVAL = int(os.getenv('REMINDER_CHECK_INTERVAL', '30')) # minutes
+    COUNTER_REPAIR_INTERVAL = int(os.getenv('COUNTER_REPAIR_INTERVAL', '1440')) # minutes
     
     # SMS Guardrail Configuration
     SMS_ENABLED = os.getenv('SMS_ENABLED', 'false').lower() == 'true'
+    SMS_SEND_CONCURRENCY = int(os.getenv('SMS_SEND_CONCURRENCY', '10')) # max Twilio requests in flight
+    SMS_HTTP_TIMEOUT_SECONDS = float(os.getenv('SMS_HTTP_TIMEOUT_SECONDS', '10'))
+
+    # SMS Outbox Configuration (requires at least one `python sms_worker.py` process when enabled)
+    SMS_OUTBOX_ENABLED = os.getenv('SMS_OUTBOX_ENABLED', 'false').lower() == 'true'
+    SMS_OUTBOX_MAX_ATTEMPTS = int(os.getenv('SMS_OUTBOX_MAX_ATTEMPTS', '3'))
+    SMS_WORKER_BATCH_SIZE = int(os.getenv('SMS_WORKER_BATCH_SIZE', '50'))
+    SMS_WORKER_LEASE_SECONDS = int(os.getenv('SMS_WORKER_LEASE_SECONDS', '120'))
+    SMS_WORKER_POLL_SECONDS = float(os.getenv('SMS_WORKER_POLL_SECONDS', '1'))
     
     # --- ADDED BACK: Global SMS limits act as a master safety net ---
     SMS_HOURLY_LIMIT = int(os.getenv('SMS_HOURLY_LIMIT', '1000'))
@@ -34,7 +49,47 @@ class Config:
     # Recipient Spam Protection Settings
     RECIPIENT_SPAM_LIMIT = int(os.getenv('RECIPIENT_SPAM_LIMIT', '5')) # Max messages to one number
     RECIPIENT_SPAM_WINDOW_MINUTES = int(os.getenv('RECIPIENT_SPAM_WINDOW_MINUTES', '10')) # in this time window
+
+    # Rate limiter: how often each process shares its send counts, and how long group quotas are cached
+    SMS_RATE_SYNC_SECONDS = float(os.getenv('SMS_RATE_SYNC_SECONDS', '5'))
+    SMS_GROUP_LIMIT_CACHE_SECONDS = float(os.getenv('SMS_GROUP_LIMIT_CACHE_SECONDS', '60'))
     
+    # Message logs are buffered and written in batches when either threshold is reached
+    MESSAGE_LOG_FLUSH_SIZE = int(os.getenv('MESSAGE_LOG_FLUSH_SIZE', '100'))
+    MESSAGE_LOG_FLUSH_SECONDS = float(os.getenv('MESSAGE_LOG_FLUSH_SECONDS', '1'))
+
+    # Message log retention: raw rows (and contact history) are kept this long, then summarised
+    # per day in message_log_daily and removed, optionally archived as gzipped NDJSON first
+    MESSAGE_LOG_RETENTION_DAYS = int(os.getenv('MESSAGE_LOG_RETENTION_DAYS', '90'))
+    MESSAGE_LOG_ARCHIVE_DIR = os.getenv('MESSAGE_LOG_ARCHIVE_DIR') # unset = delete without archiving
+    LOG_RETENTION_INTERVAL = int(os.getenv('LOG_RETENTION_INTERVAL', '1440')) # minutes
+
+    # Dashboard rollups (group_daily_stats) are rebuilt nightly for the most recent days
+    GROUP_STATS_REBUILD_HOUR = int(os.getenv('GROUP_STATS_REBUILD_HOUR', '3')) # server local time
+    GROUP_STATS_REBUILD_DAYS = int(os.getenv('GROUP_STATS_REBUILD_DAYS', '7'))
+
+    # Admin global dashboard: the snapshot of exact collection counts is retaken on this schedule
+    # (and on demand once older than it); the default view uses estimated counts
+    PLATFORM_STATS_INTERVAL = int(os.getenv('PLATFORM_STATS_INTERVAL', '60')) # minutes
+
+    # Each process caches a logged-in user's record and groups for this long between checks of
+    # their context_version; changes made in the same process are seen immediately
+    USER_CONTEXT_CACHE_SECONDS = float(os.getenv('USER_CONTEXT_CACHE_SECONDS', '5'))
+
+    # Rendered fragments of the public RSVP page, one per (event, event_version, invitee status)
+    RSVP_FRAGMENT_CACHE_SIZE = int(os.getenv('RSVP_FRAGMENT_CACHE_SIZE', '2000'))
+
+    # Password hashing runs on a per-process pool of BCRYPT_POOL_WORKERS processes. At most
+    # BCRYPT_QUEUE_LIMIT more calls may wait for it, each for up to BCRYPT_QUEUE_WAIT_SECONDS,
+    # before a login is turned away as busy. scripts/calibrate_bcrypt.py --write sets BCRYPT_ROUNDS
+    # to the highest cost that hashes within BCRYPT_TARGET_MS on this machine (never below 12);
+    # stored hashes are upgraded on login
+    BCRYPT_ROUNDS = int(os.getenv('BCRYPT_ROUNDS', '12'))
+    BCRYPT_TARGET_MS = float(os.getenv('BCRYPT_TARGET_MS', '250'))
+    BCRYPT_POOL_WORKERS = int(os.getenv('BCRYPT_POOL_WORKERS', '2'))
+    BCRYPT_QUEUE_LIMIT = int(os.getenv('BCRYPT_QUEUE_LIMIT', '16'))
+    BCRYPT_QUEUE_WAIT_SECONDS = float(os.getenv('BCRYPT_QUEUE_WAIT_SECONDS', '2'))
+
     # Logging configuration
     SMS_LOG_FILE = 'logs/sms.log'
     SMS_LOG_LEVEL = 'INFO'
@@ -7,7 +7,19 @@ import string
 class Event:
     """
     Event model representing a single event in the RSVP system.
+    Invitees live in their own `invitees` collection, keyed by `event_id`.
     """
+    # Per-status counters kept on the event document, maintained with $inc
+    # whenever an invitee changes status.
+    STATUS_COUNTERS = {
+        'pending': 'pending_count',
+        'invited': 'invited_count',
+        'YES': 'confirmed_count',
+        'NO': 'declined_count',
+        'EXPIRED': 'expired_count',
+        'ERROR': 'error_count',
+    }
+
     def __init__(self, name, date, capacity, group_id, invitation_expiry_hours=None, details="", location=None, start_time=None, allow_rsvp_after_expiry=False, organizer_is_attending=False, show_attendee_list=False, is_archived=False, messages=None):
         self.name = name
         self.date = date
@@ -15,7 +27,6 @@ class Event:
         self.details = details
         self.location = location
         self.start_time = start_time
-        self.invitees = []
         self.created_at = datetime.utcnow()
         self.event_code = self._generate_event_code()
         self.invitation_expiry_hours = invitation_expiry_hours
@@ -27,6 +38,10 @@ class Event:
         self.show_attendee_list = show_attendee_list
         self.is_archived = is_archived
         self.messages = messages or []
+        # Bumped by EventService on every change to the event, its counters or its invitee order
+        self.event_version = 0
+        for field in self.STATUS_COUNTERS.values():
+            setattr(self, field, 0)
 
     def _generate_event_code(self):
         """Generate a unique event code based on event name"""
@@ -67,11 +82,13 @@ class Event:
             is_archived=data.get('is_archived', False),
             messages=data.get('messages', [])
         )
-        event.invitees = data.get('invitees', [])
         event.created_at = data.get('created_at', datetime.utcnow())
         event.event_code = data.get('event_code', event._generate_event_code())
         event.automation_status = data.get('automation_status', 'paused')
         event._id = data.get('_id')
+        event.event_version = data.get('event_version', 0)
+        for field in cls.STATUS_COUNTERS.values():
+            setattr(event, field, data.get(field, 0))
         return event
 
     def to_dict(self):
@@ -79,14 +96,13 @@ class Event:
         
         date_str = self.date.strftime('%Y-%m-%d') if isinstance(self.date, datetime) else self.date
 
-        return {
+        data = {
             "name": self.name,
             "date": date_str,
             "capacity": self.capacity,
             "details": self.details,
             "location": self.location,
             "start_time": self.start_time,
-            "invitees": self.invitees,
             "created_at": self.created_at,
             "event_code": self.event_code,
             "invitation_expiry_hours": self.invitation_expiry_hours,
@@ -96,5 +112,9 @@ class Event:
             "organizer_is_attending": self.organizer_is_attending,
             "show_attendee_list": self.show_attendee_list,
             "is_archived": self.is_archived,
-            "messages": self.messages
-        }
\ No newline at end of file
+            "messages": self.messages,
+            "event_version": self.event_version
+        }
+        for field in self.STATUS_COUNTERS.values():
+            data[field] = getattr(self, field)
+        return data
\ No newline at end of file
@@ -31,6 +31,7 @@ class Group:
         return {
             "_id": self._id,
             "name": self.name,
+            "name_lower": self.name.lower() if self.name else self.name, # for the admin search
             "owner_id": self.owner_id,
             "created_at": self.created_at,
             "sms_hourly_limit": self.sms_hourly_limit,
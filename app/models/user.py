@@ -46,6 +46,9 @@ class User(UserMixin):
             "_id": self._id,
             "username": self.username,
             "email": self.email,
+            # Lowercased copies for the admin search's case-insensitive prefix match
+            "username_lower": self.username.lower(),
+            "email_lower": self.email.lower(),
             "password_hash": self.password_hash,
             "name": self.name,
             "is_admin": self.is_admin,
@@ -19,20 +19,22 @@ def admin_required(f):
 @bp.route('/system-panel')
 @admin_required
 def system_panel():
-    all_groups = user_service.get_all_groups_with_owners()
-    return render_template('admin/system_panel.html', all_groups=all_groups)
+    search = request.args.get('q', '').strip()
+    all_groups, next_cursor = user_service.get_all_groups_with_owners(search=search, before=request.args.get('before'))
+    return render_template('admin/system_panel.html', all_groups=all_groups, search=search, next_cursor=next_cursor)
 
 @bp.route('/global-dashboard')
 @admin_required
 def global_dashboard():
-    stats = admin_dashboard_service.get_global_stats()
+    stats = admin_dashboard_service.get_global_stats(snapshot=request.args.get('snapshot') == '1')
     return render_template('admin/global_dashboard.html', stats=stats)
 
 @bp.route('/users')
 @admin_required
 def manage_users():
-    users = admin_dashboard_service.get_all_users_with_details()
-    return render_template('admin/users.html', users=users)
+    search = request.args.get('q', '').strip()
+    users, next_cursor = admin_dashboard_service.get_all_users_with_details(search=search, before=request.args.get('before'))
+    return render_template('admin/users.html', users=users, search=search, next_cursor=next_cursor)
 
 @bp.route('/view_group/<group_id>', methods=['POST'])
 @admin_required
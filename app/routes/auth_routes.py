@@ -15,7 +15,13 @@ def login():
         password = request.form['password']
         
         user = user_service.get_user_by_email(email)
-        if user and user_service.verify_password(user, password):
+        try:
+            authenticated = user is not None and user_service.verify_password(user, password)
+        except TimeoutError:
+            flash('We are signing in a lot of people right now. Please try again in a moment.', 'error')
+            return render_template('auth/login.html'), 503
+
+        if authenticated:
             login_user(user)
             next_page = request.args.get('next')
             return redirect(next_page if next_page else url_for('home'))
@@ -60,6 +66,8 @@ def register():
             
         except ValueError as e:
             flash(str(e), 'error')
+        except TimeoutError:
+            flash('The server is busy right now. Please try registering again in a moment.', 'error')
         except Exception as e:
             flash('An error occurred during registration.', 'error')
     
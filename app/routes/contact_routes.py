@@ -1,6 +1,6 @@
 # app/routes/contact_routes.py
-from flask import Blueprint, render_template, request, redirect, url_for, flash
-from .. import contact_service, message_log_service, user_service
+from flask import Blueprint, render_template, request, redirect, url_for, flash, current_app
+from .. import contact_service, message_log_service, user_service, engagement_service, dashboard_service
 from flask_login import login_required, current_user
 from functools import wraps
 
@@ -100,5 +100,10 @@ def message_history(contact_id):
         return redirect(url_for('contacts.manage_contacts'))
         
     logs = message_log_service.get_logs_for_contact(contact_id)
+    stats = engagement_service.get_contact_stats(owner_id, contact_id)
+    responses, next_cursor = dashboard_service.rsvp_response_service.get_contact_history(
+        contact_id, before=request.args.get('before')
+    )
     
-    return render_template('contacts/history.html', contact=contact, logs=logs)
+    return render_template('contacts/history.html', contact=contact, logs=logs, stats=stats, responses=responses,
+                           next_cursor=next_cursor, retention_days=current_app.config['MESSAGE_LOG_RETENTION_DAYS'])
@@ -20,6 +20,7 @@ def view_dashboard():
     group_id = current_user.active_group_id
     period = request.args.get('period', '7')
     details_type = request.args.get('details') 
+    before = request.args.get('before')
 
     try:
         period_days = 0 if period == 'all' else int(period)
@@ -29,19 +30,22 @@ def view_dashboard():
     stats = dashboard_service.get_stats(group_id, period_days=period_days)
     
     details_data = []
+    next_cursor = None
+    rsvp_statuses = {'confirmed_rsvps': 'YES', 'declined_rsvps': 'NO', 'expired_rsvps': 'EXPIRED'}
 
     if details_type:
         if details_type == 'messages_sent':
-            details_data = dashboard_service.get_sent_messages_details(group_id, period_days)
-        elif details_type == 'confirmed_rsvps':
-            details_data = dashboard_service.get_rsvp_details(group_id, period_days, status='YES')
-        elif details_type == 'declined_rsvps':
-            details_data = dashboard_service.get_rsvp_details(group_id, period_days, status='NO')
+            details_data, next_cursor = dashboard_service.get_sent_messages_details(group_id, period_days, before=before)
+        elif details_type in rsvp_statuses:
+            details_data, next_cursor = dashboard_service.get_rsvp_details(
+                group_id, period_days, status=rsvp_statuses[details_type], before=before
+            )
 
     return render_template(
         'dashboard/index.html', 
         stats=stats, 
         active_period=period,
         details_data=details_data,
-        show_modal_for=details_type
+        show_modal_for=details_type,
+        next_cursor=next_cursor
     )
\ No newline at end of file
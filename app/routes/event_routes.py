@@ -1,8 +1,10 @@
 # app/routes/event_routes.py
-from flask import Blueprint, render_template, request, redirect, url_for, flash, jsonify, current_app, g, Response
+from flask import Blueprint, render_template, request, redirect, url_for, flash, jsonify, current_app, g, Response, session, make_response, get_template_attribute
 # BUGFIX: Added group_service to the imports to find the event owner
-from .. import event_service, contact_service, sms_service, user_service, group_service
+from .. import event_service, contact_service, sms_service, group_service, rsvp_fragment_cache
+from ..services.event_service import RSVP_PAGE_EVENT_PROJECTION
 from datetime import datetime, timedelta
+import hashlib
 from bson import ObjectId
 from flask_login import login_required, current_user
 import pytz
@@ -51,23 +53,16 @@ def manage_events():
         return redirect(url_for('events.manage_events'))
     
     show_past = request.args.get('show_past', 'false').lower() == 'true'
-    events = event_service.get_events(group_id)
-    
+    before = request.args.get('before')
     now = datetime.now(pytz.UTC)
-    today = now.date()
+
+    # Past events are filtered out by the query; guest names are loaded per popover from invitee_names
+    events, next_cursor = event_service.get_event_summaries(
+        group_id, from_date=None if show_past else now.date(), before=before
+    )
     
     for event in events:
         event['_id'] = str(event['_id'])
-
-        # Create categorized lists of attendee names for the popover
-        attendee_names_by_status = {
-            'YES': [], 'NO': [], 'invited': [], 'pending': [], 'EXPIRED': [], 'ERROR': []
-        }
-        for i in event.get('invitees', []):
-            status = i.get('status', 'pending')
-            if status in attendee_names_by_status:
-                attendee_names_by_status[status].append(i['name'])
-        event['attendee_names_by_status'] = attendee_names_by_status
     
         date_val = event.get('date')
         if isinstance(date_val, str):
@@ -76,14 +71,24 @@ def manage_events():
             except (ValueError, TypeError):
                 event['date'] = None
 
-    if not show_past:
-        events = [
-            e for e in events if e.get('date') and e.get('date').date() >= today
-        ]
-
     default_expiry_hours = current_app.config.get('INVITATION_EXPIRY_HOURS', 24)
 
-    return render_template('events/list.html', events=events, now=now, show_past=show_past, default_expiry_hours=default_expiry_hours)
+    return render_template(
+        'events/list.html', events=events, now=now, show_past=show_past,
+        default_expiry_hours=default_expiry_hours, next_cursor=next_cursor
+    )
+
+@bp.route('/events/<event_id>/invitee_names/<status>')
+@require_active_group
+def invitee_names(event_id, status):
+    """JSON list of an event's invitee names with one status, fetched when a popover on the events list opens."""
+    if status not in Event.STATUS_COUNTERS or not ObjectId.is_valid(event_id):
+        return jsonify({'error': 'Unknown status.'}), 404
+    result = event_service.get_invitee_names(g.active_group._id, event_id, status)
+    if result is None:
+        return jsonify({'error': 'Event not found.'}), 404
+    names, more = result
+    return jsonify({'names': names, 'more': more})
 
 
 @bp.route('/events/<event_id>/edit', methods=['POST'])
@@ -149,13 +154,15 @@ def manage_invitees(event_id):
         flash('Event not found', 'error')
         return redirect(url_for('events.manage_events'))
     
+    invitees = event_service.get_invitees(event._id)
     contacts = contact_service.get_contacts(owner_id)
     all_tags = contact_service.get_all_tags(owner_id)
-    current_invitee_ids = list({invitee.get('contact_id') for invitee in event.invitees})
+    current_invitee_ids = list({invitee.get('contact_id') for invitee in invitees})
     
     return render_template(
         'events/manage_invitees.html',
         event=event,
+        invitees=invitees,
         contacts=contacts,
         all_tags=all_tags,
         current_invitee_ids=current_invitee_ids
@@ -290,35 +297,35 @@ def send_message(event_id):
             flash('Message exceeds 160 character limit.', 'error')
             return redirect(url_for('events.manage_invitees', event_id=event_id))
         
-        # Prefix the message
-        full_message = f"Event Msg: {message_text}"
-        
         # Filter invitees based on recipient type
         if recipient_type == 'confirmed':
-            recipients = [inv for inv in event.invitees if inv.get('status') == 'YES']
+            recipient_statuses = ['YES']
         else:  # 'all'
-            recipients = [inv for inv in event.invitees if inv.get('status') in ['YES', 'invited', 'NO', 'EXPIRED']]
+            recipient_statuses = ['YES', 'invited', 'NO', 'EXPIRED']
+        recipients = event_service.get_invitees(
+            event._id, statuses=recipient_statuses, projection={'phone': 1, 'contact_id': 1, 'name': 1}
+        )
         
         if not recipients:
             flash('No recipients found matching the selected criteria.', 'warning')
             return redirect(url_for('events.manage_invitees', event_id=event_id))
         
-        # Send messages
-        success_count = 0
-        failed_count = 0
-        
-        for invitee in recipients:
-            success, error = sms_service.send_event_message(
-                invitee['phone'], 
-                full_message, 
-                contact_id=invitee.get('contact_id'),
-                event_id=event._id,      # ✅ CORRECT
-                group_id=event.group_id  # ✅ CORRECT
-            )
-            if success:
-                success_count += 1
-            else:
-                failed_count += 1
+        # Send messages concurrently
+        results = sms_service.send_many([
+            {
+                'to_number': invitee['phone'],
+                'template_id': 'event_message',
+                'params': {'text': message_text},
+                'contact_id': invitee.get('contact_id'),
+                'event_id': event._id,
+                'group_id': event.group_id,
+                'recipient_name': invitee.get('name'),
+                'event_name': event.name
+            }
+            for invitee in recipients
+        ])
+        success_count = sum(1 for success, _ in results if success)
+        failed_count = len(results) - success_count
         
         # Save the message to the event for display on RSVP page
         if success_count > 0:
@@ -344,55 +351,105 @@ def send_message(event_id):
     return redirect(url_for('events.manage_invitees', event_id=event_id))
 
 # --- Public RSVP URL Routes (Do NOT require login or group) ---
+def _host_name(event):
+    """The organizer's name as shown in the attendee list, or None when no host row is shown."""
+    if not (event.organizer_is_attending and event.show_attendee_list):
+        return None
+    # Use the owner's full name; served from the user context cache, so a rename shows within its TTL
+    return group_service.get_owner_name(event.group_id)
+
+def _confirmed_guests(event, host_name):
+    """The attendee list shown to guests, with the organizer first when they are attending."""
+    confirmed_guests = [{'name': i['name'], 'is_host': False} for i in event_service.get_invitees(event._id, statuses=['YES'], projection={'_id': 0, 'name': 1})]
+    if host_name:
+        confirmed_guests.insert(0, {'name': host_name, 'is_host': True})
+    return confirmed_guests
+
+def _rsvp_fragments(event, status, host_name):
+    """
+    The event-level parts of the RSVP page for invitees with `status`, cached
+    per (event_id, event_version, status, host name). The host name is part
+    of the key because the organizer can be renamed without the event
+    changing. Only a cache miss reads the full event and the attendee list.
+    """
+    key = (str(event._id), event.event_version, status, host_name)
+    fragments = rsvp_fragment_cache.get(key)
+    if fragments is not None:
+        return fragments
+
+    full_event = event_service.get_event(event.group_id, event._id)
+    capacity_details = None
+    if status == 'YES':
+        capacity_details = {
+            'confirmed': full_event.confirmed_count,
+            'capacity': full_event.capacity,
+            'organizer_attending': full_event.organizer_is_attending
+        }
+
+    def macro(name):
+        return get_template_attribute('events/_rsvp_fragments.html', name)
+
+    full_host_name = _host_name(full_event)
+    fragments = {
+        'when_where': macro('when_where')(full_event),
+        'details_and_messages': macro('details_and_messages')(full_event, event_service.get_visible_messages(full_event, {'status': status})),
+        'capacity': macro('capacity')(full_event, capacity_details),
+        'attendees': macro('attendees')(_confirmed_guests(full_event, full_host_name) if full_event.show_attendee_list else [])
+    }
+    # Stored under the version actually rendered, which may be newer than the one requested
+    rsvp_fragment_cache.set((str(full_event._id), full_event.event_version, status, full_host_name), fragments)
+    return fragments
+
+def _rsvp_page_etag(event, invitee, host_name):
+    """Changes whenever anything the page shows changes: the event version, the host's name, the invitee, or who is logged in."""
+    parts = [
+        event._id, event.event_version, host_name, invitee['_id'], invitee.get('status'), invitee.get('name'),
+        invitee.get('invited_at'), invitee.get('expires_at'), current_user.get_id()
+    ]
+    return hashlib.sha1('|'.join(str(part) for part in parts).encode('utf-8')).hexdigest()
+
 @bp.route('/rsvp/<token>', methods=['GET'])
 def rsvp_page(token):
-    event, invitee = event_service.find_event_and_invitee_by_token(token)
+    event, invitee = event_service.find_event_and_invitee_by_token(token, event_projection=RSVP_PAGE_EVENT_PROJECTION)
     if not event or not invitee:
         return render_template("events/rsvp_confirmation.html", success=False, message="This invitation link is invalid or has expired.")
+
+    # Revalidations of an unchanged page are answered before anything is rendered
+    host_name = _host_name(event)
+    etag = _rsvp_page_etag(event, invitee, host_name)
+    if request.if_none_match.contains(etag) and not session.get('_flashes'):
+        response = current_app.response_class(status=304)
+        response.set_etag(etag)
+        response.cache_control.no_cache = True
+        response.vary.add('Cookie')
+        return response
     
     expiry_datetime_est = None
     if invitee.get('invited_at') and invitee.get('status') == 'invited':
         utc = pytz.timezone('UTC')
         est = pytz.timezone('US/Eastern')
         
-        invited_at_utc = utc.localize(invitee['invited_at'])
-        expiry_hours = event.invitation_expiry_hours or current_app.config.get('INVITATION_EXPIRY_HOURS', 24)
-        expiry_datetime_utc = invited_at_utc + timedelta(hours=expiry_hours)
+        if invitee.get('expires_at'):
+            expiry_datetime_utc = utc.localize(invitee['expires_at'])
+        else:
+            invited_at_utc = utc.localize(invitee['invited_at'])
+            expiry_hours = event.invitation_expiry_hours or current_app.config.get('INVITATION_EXPIRY_HOURS', 24)
+            expiry_datetime_utc = invited_at_utc + timedelta(hours=expiry_hours)
         expiry_datetime_est = expiry_datetime_utc.astimezone(est)
 
-    confirmed_guests = []
-    if event.show_attendee_list:
-        confirmed_guests = [{'name': i['name'], 'is_host': False} for i in event.invitees if i.get('status') == 'YES']
-        if event.organizer_is_attending:
-            group = group_service.get_group(event.group_id)
-            if group:
-                owner = user_service.get_user(group.owner_id)
-                if owner:
-                    # Use the owner's full name
-                    confirmed_guests.insert(0, {'name': owner.name, 'is_host': True})
-    
-    capacity_details = None
-    if invitee.get('status') == 'YES':
-        confirmed_count = sum(1 for i in event.invitees if i.get('status') == 'YES')
-        capacity_details = {
-            'confirmed': confirmed_count,
-            'capacity': event.capacity,
-            'organizer_attending': event.organizer_is_attending
-        }
-
-    # Get messages visible to this invitee
-    visible_messages = event_service.get_visible_messages(event, invitee)
-
-    return render_template(
+    response = make_response(render_template(
         "events/rsvp_page.html", 
         event=event, 
         invitee=invitee, 
         token=token, 
         expiry_datetime_est=expiry_datetime_est,
-        confirmed_guests=confirmed_guests,
-        capacity_details=capacity_details,
-        event_messages=visible_messages
-    )
+        fragments=_rsvp_fragments(event, invitee.get('status'), host_name)
+    ))
+    response.set_etag(etag)
+    # Browsers and edge caches may keep the page but must revalidate it, which is a cheap 304
+    response.cache_control.no_cache = True
+    response.vary.add('Cookie')
+    return response
 
 @bp.route('/api/rsvp/<token>', methods=['POST'])
 def submit_rsvp_api(token):
@@ -404,22 +461,13 @@ def submit_rsvp_api(token):
     json_response = {'success': success, 'message': message}
 
     if success and event and response.upper() == 'YES':
-        confirmed_count = sum(1 for i in event.invitees if i.get('status') == 'YES')
         json_response['capacity_details'] = {
-            'confirmed': confirmed_count,
+            'confirmed': event.confirmed_count,
             'capacity': event.capacity,
             'organizer_attending': event.organizer_is_attending
         }
         if event.show_attendee_list:
-            confirmed_guests = [{'name': i['name'], 'is_host': False} for i in event.invitees if i.get('status') == 'YES']
-            if event.organizer_is_attending:
-                group = group_service.get_group(event.group_id)
-                if group:
-                    owner = user_service.get_user(group.owner_id)
-                    if owner:
-                         # Use the owner's full name
-                        confirmed_guests.insert(0, {'name': owner.name, 'is_host': True})
-            json_response['confirmed_guests'] = confirmed_guests
+            json_response['confirmed_guests'] = _confirmed_guests(event, _host_name(event))
 
     return jsonify(json_response)
 
@@ -3,6 +3,8 @@ from apscheduler.schedulers.background import BackgroundScheduler
 import logging
 import atexit
 import os
+import threading
+from datetime import datetime
 from logging.handlers import RotatingFileHandler
 
 class TaskScheduler:
@@ -14,6 +16,11 @@ class TaskScheduler:
         self.app = None
         self.event_service = None
         self.sms_service = None # ADD THIS LINE
+        self.message_log_service = None
+        self.admin_dashboard_service = None
+        self.capacity_worker = None
+        self.capacity_debounce = 2
+        self.stats_rebuild_days = 7
         self._setup_logging()
         atexit.register(self.shutdown)
         self.logger.info("TaskScheduler instance created.")
@@ -45,12 +52,14 @@ class TaskScheduler:
             cls._instance = cls()
         return cls._instance
 
-    def init_app(self, app, event_service, sms_service):
+    def init_app(self, app, event_service, sms_service, message_log_service=None, admin_dashboard_service=None):
         """Initializes the scheduler with the Flask app and services."""
         self.logger.info("Initializing scheduler with Flask app context.")
         self.app = app
         self.event_service = event_service
         self.sms_service = sms_service # ADD THIS LINE
+        self.message_log_service = message_log_service
+        self.admin_dashboard_service = admin_dashboard_service
         
         if not self.is_running:
             self.start()
@@ -64,10 +73,16 @@ class TaskScheduler:
         try:
             with self.app.app_context():
                 expiry_interval = self.app.config.get('EXPIRY_CHECK_INTERVAL', 1)
-                capacity_interval = self.app.config.get('CAPACITY_CHECK_INTERVAL', 1)
+                capacity_interval = self.app.config.get('CAPACITY_CHECK_INTERVAL', 15)
+                self.capacity_debounce = self.app.config.get('CAPACITY_TRIGGER_DEBOUNCE_SECONDS', 2)
                 reminder_interval = self.app.config.get('REMINDER_CHECK_INTERVAL', 30)
+                counter_repair_interval = self.app.config.get('COUNTER_REPAIR_INTERVAL', 1440)
+                log_retention_interval = self.app.config.get('LOG_RETENTION_INTERVAL', 1440)
+                self.stats_rebuild_days = self.app.config.get('GROUP_STATS_REBUILD_DAYS', 7)
+                stats_rebuild_hour = self.app.config.get('GROUP_STATS_REBUILD_HOUR', 3)
+                platform_stats_interval = self.app.config.get('PLATFORM_STATS_INTERVAL', 60)
             
-            self.logger.info(f"Configuring jobs - Expiry: {expiry_interval}m, Capacity: {capacity_interval}m, Reminder: {reminder_interval}m")
+            self.logger.info(f"Configuring jobs - Expiry: {expiry_interval}m, Capacity: {capacity_interval}m, Reminder: {reminder_interval}m, Counter repair: {counter_repair_interval}m")
 
             self.scheduler.add_job(
                 func=self._run_expiry_check, trigger='interval', minutes=expiry_interval,
@@ -81,9 +96,53 @@ class TaskScheduler:
                 func=self._run_reminder_check, trigger='interval', minutes=reminder_interval,
                 id='reminder_check_job', name='Send pending reminders', replace_existing=True
             )
+            # Runs once at startup as well, so events created before the counters existed are backfilled
+            self.scheduler.add_job(
+                func=self._run_counter_repair, trigger='interval', minutes=counter_repair_interval,
+                id='counter_repair_job', name='Rebuild event status counters', replace_existing=True,
+                next_run_time=datetime.now()
+            )
+            self.scheduler.add_job(
+                func=self._run_expiry_backfill, trigger='date', run_date=datetime.now(),
+                id='expiry_backfill_job', name='Stamp expiry on legacy invitations', replace_existing=True
+            )
+            self.scheduler.add_job(
+                func=self._run_ledger_backfill, trigger='date', run_date=datetime.now(),
+                id='ledger_backfill_job', name='Seed the RSVP response ledger', replace_existing=True
+            )
+            self.scheduler.add_job(
+                func=self._run_stats_rebuild, trigger='cron', hour=stats_rebuild_hour,
+                id='group_stats_rebuild_job', name='Rebuild recent group daily stats', replace_existing=True
+            )
+            if self.admin_dashboard_service is not None:
+                self.scheduler.add_job(
+                    func=self._run_platform_stats_refresh, trigger='interval', minutes=platform_stats_interval,
+                    id='platform_stats_job', name='Recount platform statistics', replace_existing=True,
+                    next_run_time=datetime.now()
+                )
+                self.scheduler.add_job(
+                    func=self._run_owned_group_repair, trigger='interval', minutes=counter_repair_interval,
+                    id='owned_group_repair_job', name='Rebuild owned group counts', replace_existing=True,
+                    next_run_time=datetime.now()
+                )
+                self.scheduler.add_job(
+                    func=self._run_search_field_backfill, trigger='date', run_date=datetime.now(),
+                    id='search_field_backfill_job', name='Backfill lowercased search fields', replace_existing=True
+                )
+            if self.message_log_service is not None:
+                # Group stats read their sent counts from the usage counters, so both backfills share a job
+                self.scheduler.add_job(
+                    func=self._run_usage_backfill, trigger='date', run_date=datetime.now(),
+                    id='usage_backfill_job', name='Backfill SMS usage counters and group stats', replace_existing=True
+                )
+                self.scheduler.add_job(
+                    func=self._run_log_retention, trigger='interval', minutes=log_retention_interval,
+                    id='log_retention_job', name='Roll up and prune message logs', replace_existing=True
+                )
 
             self.scheduler.start()
             self.is_running = True
+            self._start_capacity_worker()
             self.logger.info("Scheduler started successfully.")
             self._log_next_run_times()
 
@@ -104,16 +163,65 @@ class TaskScheduler:
     def _run_expiry_check(self):
         self._run_job(self.event_service.process_expired_invitations, "Check for expired invitations")
 
+    def _run_expiry_backfill(self):
+        self._run_job(self.event_service.stamp_missing_expiry, "Stamp expiry on legacy invitations")
+        self._run_job(self.event_service.normalize_event_dates, "Normalize legacy event dates")
+
+    def _run_usage_backfill(self):
+        self._run_job(self.message_log_service.usage_service.backfill_from_logs, "Backfill SMS usage counters")
+        self._run_job(self.event_service.group_stats_service.backfill, "Backfill group daily stats")
+
+    def _run_ledger_backfill(self):
+        self._run_job(self.event_service.rsvp_response_service.backfill_from_invitees, "Seed the RSVP response ledger")
+
+    def _run_platform_stats_refresh(self):
+        self._run_job(self.admin_dashboard_service.refresh_snapshot, "Recount platform statistics")
+
+    def _run_owned_group_repair(self):
+        self._run_job(self.admin_dashboard_service.rebuild_owned_group_counts, "Rebuild owned group counts")
+
+    def _run_search_field_backfill(self):
+        self._run_job(self.admin_dashboard_service.backfill_search_fields, "Backfill lowercased search fields")
+
+    def _run_stats_rebuild(self):
+        self._run_job(self.event_service.group_stats_service.rebuild_recent, "Rebuild recent group daily stats", self.stats_rebuild_days)
+
+    def _run_log_retention(self):
+        self._run_job(self.message_log_service.apply_retention, "Roll up and prune message logs")
+
     def _run_capacity_check(self):
         # The scheduler job needs to pass the sms_service to the method
         self._run_job(self.event_service.manage_event_capacity, "Manage event capacity", self.sms_service)
         
+    def _start_capacity_worker(self):
+        """Starts the thread that refills events queued by EventService.request_capacity_check."""
+        if self.event_service.capacity_queue is None:
+            self.logger.warning("No capacity queue configured; relying on the periodic capacity sweep only.")
+            return
+        self.capacity_worker = threading.Thread(target=self._capacity_worker_loop, name='capacity-worker', daemon=True)
+        self.capacity_worker.start()
+
+    def _capacity_worker_loop(self):
+        queue = self.event_service.capacity_queue
+        while self.is_running:
+            event_ids = queue.drain(timeout=5, debounce_seconds=self.capacity_debounce)
+            # Events flagged by processes without a capacity worker, such as the SMS worker
+            try:
+                event_ids |= {str(event_id) for event_id in self.event_service.take_requested_capacity_checks()}
+            except Exception as e:
+                self.logger.error(f"Could not read requested capacity checks: {e}")
+            if event_ids:
+                self._run_job(self.event_service.manage_event_capacity, f"Refill capacity for {len(event_ids)} event(s)", self.sms_service, event_ids)
+
     def _run_reminder_check(self):
         if hasattr(self.event_service, 'send_pending_reminders'):
             self._run_job(self.event_service.send_pending_reminders, "Send pending reminders")
         else:
             self.logger.warning("Job 'Send pending reminders' skipped: 'send_pending_reminders' method not found in EventService.")
 
+    def _run_counter_repair(self):
+        self._run_job(self.event_service.rebuild_status_counters, "Rebuild event status counters")
+
     def _log_next_run_times(self):
         """Logs the next scheduled run time for all jobs."""
         if not self.is_running: return
@@ -1,54 +1,102 @@
 # app/services/admin_dashboard_service.py
+from datetime import datetime, timedelta
 from pymongo.database import Database
-from bson import ObjectId
+from .sms_usage_service import SMSUsageService
+from .user_service import UserService
+from .pagination import after_cursor, split_page
 
 class AdminDashboardService:
-    def __init__(self, db: Database):
+    def __init__(self, db: Database, snapshot_max_age_minutes=60):
         self.db = db
         self.users_collection = db['users']
         self.groups_collection = db['groups']
         self.events_collection = db['events']
         self.contacts_collection = db['contacts'] # RENAMED
         self.logs_collection = db['message_logs']
+        self.stats_collection = db['platform_stats']
+        self.usage_service = SMSUsageService(db)
+        self.snapshot_max_age = timedelta(minutes=snapshot_max_age_minutes)
 
-    def get_global_stats(self):
-        """Calculates system-wide statistics."""
-        total_users = self.users_collection.count_documents({})
-        total_groups = self.groups_collection.count_documents({})
-        total_events = self.events_collection.count_documents({})
-        total_contacts = self.contacts_collection.count_documents({})
-        total_sms_sent = self.logs_collection.count_documents({'status': 'sent'})
-
+    def _counted_collections(self):
         return {
-            'total_users': total_users,
-            'total_groups': total_groups,
-            'total_events': total_events,
-            'total_contacts': total_contacts,
-            'total_sms_sent': total_sms_sent
+            'total_users': self.users_collection,
+            'total_groups': self.groups_collection,
+            'total_events': self.events_collection,
+            'total_contacts': self.contacts_collection
         }
+
+    def get_global_stats(self, snapshot=False):
+        """
+        Calculates system-wide statistics in constant time.
+
+        By default collection sizes come from estimated_document_count, which
+        reads collection metadata instead of scanning. With snapshot=True they
+        come from the last exact recount, taken again first if it is older
+        than the configured maximum age, so they can be up to that old;
+        `computed_at` says when it was taken. The SMS total always comes from
+        the usage counters.
+        """
+        if snapshot:
+            counts = self.stats_collection.find_one({'_id': 'global'})
+            if counts is None or counts['computed_at'] < datetime.utcnow() - self.snapshot_max_age:
+                counts = self.refresh_snapshot()
+            stats = {field: counts[field] for field in self._counted_collections()}
+            stats['computed_at'] = counts['computed_at']
+        else:
+            stats = {field: collection.estimated_document_count() for field, collection in self._counted_collections().items()}
+            stats['computed_at'] = None
+
+        stats['total_sms_sent'] = self.usage_service.count('sent')
+        stats['is_estimate'] = not snapshot
+        return stats
+
+    def refresh_snapshot(self):
+        """Recounts every collection exactly and stores the snapshot; run periodically by the scheduler."""
+        snapshot = {field: collection.count_documents({}) for field, collection in self._counted_collections().items()}
+        snapshot['computed_at'] = datetime.utcnow()
+        self.stats_collection.replace_one({'_id': 'global'}, snapshot, upsert=True)
+        return snapshot
         
-    def get_all_users_with_details(self):
-        """Fetches all users and enriches them with their owned group count."""
-        pipeline = [
-            {
-                '$lookup': {
-                    'from': 'groups',
-                    'localField': '_id',
-                    'foreignField': 'owner_id',
-                    'as': 'owned_groups'
-                }
-            },
-            {
-                '$project': {
-                    'username': 1,
-                    'email': 1,
-                    'is_admin': 1,
-                    'created_at': 1,
-                    'group_ownership_count': {'$size': '$owned_groups'}
-                }
-            },
-            {
-                '$sort': {'created_at': -1}
-            }
-        ]
-        return list(self.users_collection.aggregate(pipeline))
\ No newline at end of file
+    def get_all_users_with_details(self, search=None, before=None, limit=50):
+        """
+        Fetches one page of users, newest first, with the owned group count
+        kept on each user document. `search` matches username or email by
+        prefix. Returns (users, next_cursor); pass next_cursor back as
+        `before` for the following page.
+        """
+        query = UserService.search_filter(search) if search else {}
+        users = list(
+            self.users_collection.find(after_cursor(query, before, 'created_at'), {
+                'username': 1, 'email': 1, 'is_admin': 1, 'created_at': 1, 'owned_group_count': 1
+            })
+            .sort([('created_at', -1), ('_id', -1)])
+            .limit(limit + 1)
+        )
+        return split_page(users, limit, 'created_at')
+
+    def backfill_search_fields(self):
+        """
+        Sets the lowercased copies the admin search matches on (username_lower,
+        email_lower, name_lower) for users and groups written before they
+        existed. Runs at startup; documents that already have them are skipped.
+        """
+        users = self.users_collection.update_many(
+            {'username_lower': {'$exists': False}},
+            [{'$set': {'username_lower': {'$toLower': '$username'}, 'email_lower': {'$toLower': '$email'}}}]
+        )
+        groups = self.groups_collection.update_many(
+            {'name_lower': {'$exists': False}},
+            [{'$set': {'name_lower': {'$toLower': '$name'}}}]
+        )
+        return users.modified_count + groups.modified_count
+
+    def rebuild_owned_group_counts(self):
+        """
+        Recomputes every user's owned_group_count from the groups collection.
+        Runs at startup to backfill existing users and then as a periodic repair.
+        """
+        self.users_collection.aggregate([
+            {'$lookup': {'from': 'groups', 'localField': '_id', 'foreignField': 'owner_id', 'as': 'owned_groups'}},
+            {'$project': {'owned_group_count': {'$size': '$owned_groups'}}},
+            {'$merge': {'into': 'users', 'on': '_id', 'whenMatched': 'merge', 'whenNotMatched': 'discard'}}
+        ])
\ No newline at end of file
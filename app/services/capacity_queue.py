@@ -0,0 +1,41 @@
+# app/services/capacity_queue.py
+import threading
+import time
+
+class CapacityQueue:
+    """
+    In-process queue of event ids whose capacity may have changed.
+
+    EventService enqueues an event whenever a spot could have opened up, and
+    the scheduler's capacity worker drains it to refill only those events.
+    Duplicate ids are coalesced, so a burst of changes to one event results
+    in a single refill.
+    """
+    def __init__(self):
+        self._pending = set()
+        self._lock = threading.Lock()
+        self._has_items = threading.Event()
+
+    def enqueue(self, event_id):
+        with self._lock:
+            self._pending.add(str(event_id))
+            self._has_items.set()
+
+    def drain(self, timeout=None, debounce_seconds=0):
+        """
+        Blocks until at least one event id is queued (or `timeout` elapses),
+        waits `debounce_seconds` to collect related changes, then returns and
+        clears every queued id.
+        """
+        if not self._has_items.wait(timeout):
+            return set()
+        if debounce_seconds:
+            time.sleep(debounce_seconds)
+        with self._lock:
+            event_ids, self._pending = self._pending, set()
+            self._has_items.clear()
+        return event_ids
+
+    def __len__(self):
+        with self._lock:
+            return len(self._pending)
@@ -4,9 +4,14 @@ from ..models.contact import Contact
 import phonenumbers
 
 class ContactService:
-    def __init__(self, db):
+    def __init__(self, db, engagement_service=None):
         self.db = db
         self.contacts_collection = db['contacts']
+        self.engagement_service = engagement_service
+
+    def _contacts_changed(self, owner_id):
+        if self.engagement_service:
+            self.engagement_service.invalidate_owners([owner_id])
 
     def _validate_and_format_phone(self, phone_number_str):
         """
@@ -49,6 +54,7 @@ class ContactService:
 
         contact = Contact.from_dict(contact_data)
         result = self.contacts_collection.insert_one(contact.to_dict())
+        self._contacts_changed(owner_id)
         return str(result.inserted_id)
 
     def get_contacts(self, owner_id, filters=None):
@@ -83,10 +89,13 @@ class ContactService:
             {"_id": ObjectId(contact_id), "owner_id": ObjectId(owner_id)},
             {"$set": contact_data}
         )
+        self._contacts_changed(owner_id)
         return self.get_contact(owner_id, contact_id)
 
     def delete_contact(self, owner_id, contact_id):
-        return self.contacts_collection.delete_one({"_id": ObjectId(contact_id), "owner_id": ObjectId(owner_id)})
+        result = self.contacts_collection.delete_one({"_id": ObjectId(contact_id), "owner_id": ObjectId(owner_id)})
+        self._contacts_changed(owner_id)
+        return result
 
     def get_all_tags(self, owner_id):
         tags = self.contacts_collection.distinct('tags', {"owner_id": ObjectId(owner_id)})
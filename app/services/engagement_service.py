@@ -0,0 +1,205 @@
+# app/services/engagement_service.py
+import threading
+from collections import OrderedDict
+from datetime import datetime, timedelta
+from bson import ObjectId
+import numpy as np
+from pymongo import UpdateOne
+from pymongo.database import Database
+
+# Invitee statuses as small integer codes, one column per code in the count matrix
+STATUS_CODES = {'pending': 0, 'invited': 1, 'YES': 2, 'NO': 3, 'EXPIRED': 4, 'ERROR': 5}
+INVITED_CODES = [STATUS_CODES[status] for status in ('invited', 'YES', 'NO', 'EXPIRED')]
+MISSING_TIME = np.iinfo(np.int64).min
+READ_BATCH_SIZE = 10000
+MAX_CACHED_OWNERS = 100
+EPOCH = datetime(1970, 1, 1)
+
+def _to_millis(values):
+    """datetime list -> int64 milliseconds, with MISSING_TIME for None."""
+    return np.array(values, dtype='datetime64[ms]').astype(np.int64)
+
+def _to_datetime(millis):
+    return None if millis == MISSING_TIME else EPOCH + timedelta(milliseconds=int(millis))
+
+class EngagementReport:
+    """
+    Per-contact engagement for one owner, held as parallel NumPy columns
+    indexed by contact position (contacts sorted by _id).
+    """
+    COLUMNS = ['invitations', 'confirmed', 'declined', 'expired', 'response_rate', 'confirmation_rate']
+
+    def __init__(self, contact_ids, names, counts, last_invited, last_response, version):
+        self.contact_ids = contact_ids
+        self.names = names
+        self.invitations = counts[:, INVITED_CODES].sum(axis=1)
+        self.confirmed = counts[:, STATUS_CODES['YES']]
+        self.declined = counts[:, STATUS_CODES['NO']]
+        self.expired = counts[:, STATUS_CODES['EXPIRED']]
+        responses = self.confirmed + self.declined
+        with np.errstate(divide='ignore', invalid='ignore'):
+            self.response_rate = np.where(self.invitations > 0, responses / self.invitations * 100, 0.0)
+            self.confirmation_rate = np.where(responses > 0, self.confirmed / responses * 100, 0.0)
+        self.last_invited = last_invited
+        self.last_response = last_response
+        self.version = version
+
+    def __len__(self):
+        return len(self.contact_ids)
+
+    def _row(self, i):
+        return {
+            'contact_id': str(self.contact_ids[i]),
+            'name': self.names[i],
+            'invitations': int(self.invitations[i]),
+            'confirmed': int(self.confirmed[i]),
+            'declined': int(self.declined[i]),
+            'expired': int(self.expired[i]),
+            'response_rate': round(float(self.response_rate[i]), 1),
+            'confirmation_rate': round(float(self.confirmation_rate[i]), 1),
+            'last_invited_at': _to_datetime(self.last_invited[i]),
+            'last_response_at': _to_datetime(self.last_response[i])
+        }
+
+    def rows(self, sort_by='name', descending=False, offset=0, limit=None):
+        """Report rows as dicts, sorted on any column (or 'name' / 'last_response_at')."""
+        if sort_by == 'name':
+            order = np.argsort(np.char.lower(self.names.astype(str)), kind='stable')
+        elif sort_by == 'last_response_at':
+            order = np.argsort(self.last_response, kind='stable')
+        elif sort_by in self.COLUMNS:
+            order = np.argsort(getattr(self, sort_by), kind='stable')
+        else:
+            raise ValueError(f"Unknown engagement column '{sort_by}'.")
+        if descending:
+            order = order[::-1]
+        end = None if limit is None else offset + limit
+        return [self._row(i) for i in order[offset:end]]
+
+    def for_contact(self, contact_id):
+        """One contact's row, or None if the contact is not in this report."""
+        position = np.searchsorted(self.contact_ids, str(contact_id))
+        if position < len(self.contact_ids) and self.contact_ids[position] == str(contact_id):
+            return self._row(position)
+        return None
+
+class EngagementService:
+    """
+    Invitation, response and confirmation statistics for every contact an
+    owner has, computed in one pass.
+
+    The owner's invitee rows are read once into columnar arrays (contact
+    position, status code, timestamps) and reduced with NumPy, instead of
+    running one aggregation per contact. Reports are cached per owner and
+    stamped with a version worked out when the report is read: the owner's
+    counter in `engagement_versions`, bumped when their contact list changes
+    or invitees are deleted, plus the newest `rsvp_responses` entry in each
+    of their groups. Status changes therefore cost the response path
+    nothing extra, and every process notices them on the next read.
+    """
+    def __init__(self, db: Database):
+        self.db = db
+        self.contacts_collection = db['contacts']
+        self.invitees_collection = db['invitees']
+        self.versions_collection = db['engagement_versions']
+        self.groups_collection = db['groups']
+        self.responses_collection = db['rsvp_responses']
+        self._cache = OrderedDict()
+        self._cache_lock = threading.Lock()
+
+        self.invitees_collection.create_index("contact_id")
+        self.contacts_collection.create_index("owner_id")
+
+    # --- INVALIDATION ---
+    def invalidate_owners(self, owner_ids):
+        """Bumps the version of each owner so their cached reports are rebuilt."""
+        operations = [
+            UpdateOne({"_id": ObjectId(owner_id)}, {"$inc": {"version": 1}}, upsert=True)
+            for owner_id in {str(owner_id) for owner_id in owner_ids if owner_id}
+        ]
+        if operations:
+            self.versions_collection.bulk_write(operations, ordered=False)
+
+    def invalidate_groups(self, group_ids):
+        """
+        Invalidates the reports of whoever owns these groups. Only needed when
+        invitees are deleted, which the response ledger does not record.
+        """
+        group_oids = [ObjectId(group_id) for group_id in {str(g) for g in group_ids if g}]
+        if not group_oids:
+            return
+        self.invalidate_owners(self.groups_collection.distinct("owner_id", {"_id": {"$in": group_oids}}))
+
+    def _current_version(self, owner_id):
+        """
+        The owner's counter plus the newest ledger entry in each of their
+        groups; invitees only ever come from the group owner's contacts.
+        """
+        doc = self.versions_collection.find_one({"_id": ObjectId(owner_id)}, {"version": 1})
+        latest_entries = []
+        for group in self.groups_collection.find({"owner_id": ObjectId(owner_id)}, {"_id": 1}).sort("_id", 1):
+            entry = self.responses_collection.find_one({"group_id": group['_id']}, {"_id": 1}, sort=[("_id", -1)])
+            latest_entries.append(entry['_id'] if entry else None)
+        return (doc['version'] if doc else 0, tuple(latest_entries))
+
+    # --- REPORT ---
+    def get_report(self, owner_id):
+        """The owner's EngagementReport, from cache when nothing has changed since it was built."""
+        owner_key = str(owner_id)
+        version = self._current_version(owner_id)
+        with self._cache_lock:
+            report = self._cache.get(owner_key)
+            if report is not None and report.version == version:
+                self._cache.move_to_end(owner_key)
+                return report
+
+        report = self.build_report(owner_id, version)
+        with self._cache_lock:
+            self._cache[owner_key] = report
+            self._cache.move_to_end(owner_key)
+            while len(self._cache) > MAX_CACHED_OWNERS:
+                self._cache.popitem(last=False)
+        return report
+
+    def get_contact_stats(self, owner_id, contact_id):
+        return self.get_report(owner_id).for_contact(contact_id)
+
+    def build_report(self, owner_id, version=0):
+        """Reads the owner's contacts and invitee rows and computes every contact's stats."""
+        contacts = list(
+            self.contacts_collection.find({"owner_id": ObjectId(owner_id)}, {"name": 1}).sort("_id", 1)
+        )
+        contact_ids = np.array([str(contact['_id']) for contact in contacts])
+        names = np.array([contact.get('name', '') for contact in contacts], dtype=object)
+        n_contacts = len(contacts)
+
+        row_contacts, row_statuses, row_invited, row_responded = [], [], [], []
+        cursor = self.invitees_collection.find(
+            {"contact_id": {"$in": contact_ids.tolist()}},
+            {"_id": 0, "contact_id": 1, "status": 1, "invited_at": 1, "responded_at": 1},
+            batch_size=READ_BATCH_SIZE
+        )
+        for row in cursor:
+            row_contacts.append(row['contact_id'])
+            row_statuses.append(STATUS_CODES.get(row.get('status'), 0))
+            row_invited.append(row.get('invited_at'))
+            row_responded.append(row.get('responded_at'))
+
+        counts = np.zeros((n_contacts, len(STATUS_CODES)), dtype=np.int64)
+        last_invited = np.full(n_contacts, MISSING_TIME, dtype=np.int64)
+        last_response = np.full(n_contacts, MISSING_TIME, dtype=np.int64)
+
+        if row_contacts:
+            # contact_ids is sorted, so each row's contact position is a binary search
+            positions = np.searchsorted(contact_ids, np.array(row_contacts))
+            statuses = np.array(row_statuses, dtype=np.int64)
+            counts = np.bincount(
+                positions * len(STATUS_CODES) + statuses, minlength=n_contacts * len(STATUS_CODES)
+            ).reshape(n_contacts, len(STATUS_CODES))
+
+            np.maximum.at(last_invited, positions, _to_millis(row_invited))
+            responded = _to_millis(row_responded)
+            is_response = (statuses == STATUS_CODES['YES']) | (statuses == STATUS_CODES['NO'])
+            np.maximum.at(last_response, positions[is_response], responded[is_response])
+
+        return EngagementReport(contact_ids, names, counts, last_invited, last_response, version)
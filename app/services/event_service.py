@@ -1,20 +1,97 @@
 # app/services/event_service.py
 from datetime import datetime, timedelta
 from bson import ObjectId
+from pymongo import UpdateOne, ReturnDocument
+from pymongo.errors import BulkWriteError, OperationFailure
 from ..models.event import Event
+from .group_stats_service import GroupStatsService
+from .pagination import after_cursor, split_page
+from .rsvp_response_service import RSVPResponseService
+from .transition_recorder import TransitionRecorder
 import logging
 from logging.handlers import RotatingFileHandler
 import os
 import pytz
 import secrets
+import base64
+import binascii
+import hashlib
+import hmac
+import threading
+
+# Signed RSVP tokens: base64url(event_id + invitee_id + HMAC-SHA256[:16]), 40 bytes -> 54 chars
+SIGNED_TOKEN_LENGTH = 54
+# Invitation outcomes are buffered and flushed with one bulk_write per chunk
+INVITEE_WRITE_CHUNK_SIZE = 100
+# One invitee per contact and event; legacy invitees without a contact_id (stored as a string) are left out
+CONTACT_INDEX_NAME = "event_id_1_contact_id_1"
+CONTACT_INDEX_FILTER = {"contact_id": {"$type": "string"}}
+# Fields read back on a status change for the group's daily stats and the response ledger
+INVITEE_STATE_PROJECTION = {
+    "status": 1, "group_id": 1, "event_id": 1, "contact_id": 1,
+    "responded_at": 1, "expired_at": 1, "failed_at": 1
+}
+# Event fields the public RSVP page needs on every view; the rest is read when its fragments are rendered
+RSVP_PAGE_EVENT_PROJECTION = {
+    "name": 1, "capacity": 1, "group_id": 1, "invitation_expiry_hours": 1, "event_version": 1,
+    "organizer_is_attending": 1, "show_attendee_list": 1
+}
+# The fields the events list shows: summary, edit form values and status counters (never messages)
+EVENT_LIST_PROJECTION = {
+    "name": 1, "date": 1, "start_time": 1, "location": 1, "details": 1, "capacity": 1, "created_at": 1,
+    "invitation_expiry_hours": 1, "allow_rsvp_after_expiry": 1, "organizer_is_attending": 1,
+    "show_attendee_list": 1, **{field: 1 for field in Event.STATUS_COUNTERS.values()}
+}
+# What an RSVP submission reads: the invitee's state and contact details, and the event's rules and counters
+RSVP_SUBMIT_INVITEE_PROJECTION = {**INVITEE_STATE_PROJECTION, "name": 1, "phone": 1}
+RSVP_SUBMIT_EVENT_PROJECTION = {
+    "name": 1, "date": 1, "capacity": 1, "group_id": 1, "allow_rsvp_after_expiry": 1,
+    "organizer_is_attending": 1, "show_attendee_list": 1, "confirmed_count": 1, "event_version": 1
+}
 
 class EventService:
-    def __init__(self, db, invitation_expiry_hours=24):
+    def __init__(self, db, invitation_expiry_hours=24, secret_key=None, capacity_queue=None, engagement_service=None):
         self.db = db
         self.events_collection = db['events']
+        self.invitees_collection = db['invitees']
         self.invitation_expiry_hours = invitation_expiry_hours
         self.timezone = pytz.timezone('UTC')
         self.logger = self._setup_logging()
+        self.capacity_queue = capacity_queue
+        self.group_stats_service = GroupStatsService(db)
+        self.rsvp_response_service = RSVPResponseService(db)
+        self.engagement_service = engagement_service
+        self.transition_recorder = TransitionRecorder(self.group_stats_service, self.rsvp_response_service, engagement_service)
+        # Serializes refills in this process so the trigger worker and the sweep never invite the same people twice
+        self._capacity_lock = threading.Lock()
+
+        if secret_key:
+            self.secret_key = secret_key.encode('utf-8') if isinstance(secret_key, str) else secret_key
+        else:
+            # Without a private key tokens are random and resolve through the rsvp_token index
+            self.secret_key = None
+            self.logger.warning("No secret key provided. RSVP links will use random tokens instead of signed ones.")
+
+        self.invitees_collection.create_index([("event_id", 1), ("status", 1), ("priority", 1)])
+        self._ensure_contact_index()
+        self.invitees_collection.create_index("rsvp_token", sparse=True)
+        self.invitees_collection.create_index([("status", 1), ("expires_at", 1)])
+        self.invitees_collection.create_index("expired_at", sparse=True)
+        self.events_collection.create_index([("group_id", 1), ("is_archived", 1), ("date", -1), ("_id", -1)])
+        self.events_collection.create_index("capacity_check_requested_at", sparse=True)
+
+    def _ensure_contact_index(self):
+        # An earlier build created this index without the partial filter, under the same name
+        existing = self.invitees_collection.index_information().get(CONTACT_INDEX_NAME)
+        if existing and existing.get('partialFilterExpression') != CONTACT_INDEX_FILTER:
+            try:
+                self.invitees_collection.drop_index(CONTACT_INDEX_NAME)
+            except OperationFailure:
+                pass # Another process dropped it first
+        self.invitees_collection.create_index(
+            [("event_id", 1), ("contact_id", 1)], name=CONTACT_INDEX_NAME, unique=True,
+            partialFilterExpression=CONTACT_INDEX_FILTER
+        )
 
     def _setup_logging(self):
         logger = logging.getLogger('event_service')
@@ -37,55 +114,112 @@ class EventService:
     def get_current_time(self):
         return datetime.now(self.timezone)
 
+    def _invitation_expires_at(self, event, invited_at):
+        """Absolute expiry for an invitation sent at `invited_at`, or None if it never expires."""
+        expiry_hours = event.invitation_expiry_hours if event.invitation_expiry_hours is not None else self.invitation_expiry_hours
+        if not expiry_hours or expiry_hours <= 0:
+            return None
+        return invited_at + timedelta(hours=expiry_hours)
+
+    def _event_for_sms(self, event):
+        """The event fields SMSService needs, including its _id so message logs reference the event."""
+        return {**event.to_dict(), "_id": event._id}
+
     def _send_invitations(self, event, invitees_to_send, sms_service):
         now = self.get_current_time()
-        
-        for invitee in invitees_to_send:
-            invitee['rsvp_token'] = secrets.token_urlsafe(16)
-            
-            success, reason = sms_service.send_invitation(invitee, event.to_dict())
-            
-            update_fields = {
-                "invitees.$.rsvp_token": invitee['rsvp_token']
-            }
-
-            if success:
-                update_fields["invitees.$.status"] = "invited"
-                update_fields["invitees.$.invited_at"] = now
-                update_fields["invitees.$.error_message"] = None
-                self.logger.info(f"Successfully sent invitation to {invitee['phone']}")
-            else:
-                update_fields["invitees.$.status"] = "ERROR"
-                update_fields["invitees.$.error_message"] = reason 
-                self.logger.error(f"Failed to send invitation to {invitee['phone']}: {reason}")
-
-            self.events_collection.update_one(
-                {"_id": event._id, "invitees._id": invitee['_id']},
-                {"$set": update_fields}
-            )
+        expires_at = self._invitation_expires_at(event, now)
+        event_dict = self._event_for_sms(event)
+        pending_writes = []
+
+        try:
+            # Each chunk is dispatched concurrently, then its outcomes are written in one bulk_write
+            for start in range(0, len(invitees_to_send), INVITEE_WRITE_CHUNK_SIZE):
+                chunk = invitees_to_send[start:start + INVITEE_WRITE_CHUNK_SIZE]
+                for invitee in chunk:
+                    invitee['rsvp_token'] = self.generate_rsvp_token(event._id, invitee['_id'])
+
+                results = sms_service.send_invitations(chunk, event_dict)
+
+                for invitee, (success, reason) in zip(chunk, results):
+                    update_fields = {
+                        "rsvp_token": invitee['rsvp_token']
+                    }
+
+                    if success:
+                        update_fields["status"] = "invited"
+                        update_fields["invited_at"] = now
+                        update_fields["expires_at"] = expires_at
+                        update_fields["error_message"] = None
+                        self.logger.info(f"Successfully sent invitation to {invitee['phone']}")
+                    else:
+                        update_fields["status"] = "ERROR"
+                        update_fields["failed_at"] = now
+                        update_fields["error_message"] = reason 
+                        self.logger.error(f"Failed to send invitation to {invitee['phone']}: {reason}")
+
+                    pending_writes.append((invitee, update_fields))
+
+                # Taken off the list before flushing, so a flush that fails part-way is never repeated
+                writes, pending_writes = pending_writes, []
+                self._flush_invitee_writes(event, writes)
+        finally:
+            # Persist whatever was already sent but not yet handed to a flush, even if the wave was interrupted
+            if pending_writes:
+                self._flush_invitee_writes(event, pending_writes)
+
+    def _flush_invitee_writes(self, event, pending_writes):
+        """
+        Writes a chunk of invitation outcomes with one unordered bulk_write and
+        moves the event's counters once for the whole chunk. Any row the bulk
+        write rejects is retried on its own so every invitee's outcome is kept.
+        """
+        operations = [
+            UpdateOne({"_id": invitee['_id'], "event_id": event._id}, {"$set": fields})
+            for invitee, fields in pending_writes
+        ]
+        failed_indexes = set()
+        try:
+            self.invitees_collection.bulk_write(operations, ordered=False)
+        except BulkWriteError as e:
+            failed_indexes = {error['index'] for error in e.details.get('writeErrors', [])}
+
+        counter_inc = {}
+        transitions = []
+        for index, (invitee, fields) in enumerate(pending_writes):
+            if index in failed_indexes:
+                self.logger.error(f"Bulk write rejected invitee {invitee['_id']}; retrying individually.")
+                try:
+                    self._set_invitee_fields(event._id, invitee['_id'], fields)
+                except Exception as e:
+                    self.logger.error(f"Failed to record invitation state for invitee {invitee['_id']}: {str(e)}")
+                continue
+            for field, amount in self._status_counter_inc(invitee.get('status', 'pending'), fields['status']).items():
+                counter_inc[field] = counter_inc.get(field, 0) + amount
+            transitions.append((invitee, fields))
+        self._apply_status_counters(event._id, {field: amount for field, amount in counter_inc.items() if amount})
+        self._record_transitions(transitions)
         
     def manual_rsvp(self, group_id, event_id, invitee_id, new_status, sms_service):
         event = self.get_event(group_id, event_id)
         if not event:
             return False, "Event not found."
-        invitee = next((i for i in event.invitees if str(i.get('_id')) == invitee_id), None)
+        invitee = self.get_invitee(event._id, invitee_id)
         if not invitee:
             return False, "Invitee not found in this event."
-        if new_status == 'YES':
-            current_confirmed = sum(1 for i in event.invitees if i.get('status') == 'YES')
-            organizer_spot = 1 if event.organizer_is_attending else 0
-            guest_capacity = event.capacity - organizer_spot
-            if current_confirmed >= guest_capacity:
-                return False, f"Cannot manually confirm {invitee.get('name')}. The event is already at full capacity for guests."
 
         # BUGFIX: Only send confirmation if status is changing to YES
-        should_send_confirmation = new_status == 'YES' and invitee.get('status') != 'YES'
-
-        success = self.update_invitee_status(event_id, ObjectId(invitee_id), new_status)
-        if not success:
+        should_send_confirmation = False
+        if new_status == 'YES' and invitee.get('status') != 'YES':
+            result = self.confirm_invitee(event._id, invitee['_id'])
+            if result == 'full':
+                return False, f"Cannot manually confirm {invitee.get('name')}. The event is already at full capacity for guests."
+            if result == 'not_found':
+                return False, "Failed to update status in the database."
+            should_send_confirmation = result == 'confirmed'
+        elif not self.update_invitee_status(event_id, ObjectId(invitee_id), new_status):
             return False, "Failed to update status in the database."
         if should_send_confirmation:
-            sms_service.send_confirmation(invitee, event.to_dict())
+            sms_service.send_confirmation(invitee, self._event_for_sms(event))
             message = f"Successfully confirmed {invitee.get('name')}. A confirmation SMS has been sent to them."
         elif new_status == 'YES':
             message = f"Successfully marked {invitee.get('name')} as confirmed."
@@ -95,66 +229,187 @@ class EventService:
 
     # SCHEDULER METHODS (NOT group-aware, they run system-wide)
     def process_expired_invitations(self):
+        """
+        Expires the overdue invitations of active, unarchived events: the
+        events with any are found on the `expires_at` index, then each one's
+        invitations are expired in one set-based update whose modified count
+        adjusts that event's counters. Paused and archived events keep their
+        open invitations, as they always have. Affected events are queued for
+        a refill.
+
+        Returns {'expired': <count>, 'event_ids': [<events needing a refill>]}.
+        """
         self.logger.info("Starting expired invitations check")
         now = self.get_current_time()
-        
-        active_events = self.events_collection.find({
-            "automation_status": "active",
-            "is_archived": {"$ne": True}
-        })
-        
-        for event_data in active_events:
-            event = Event.from_dict(event_data, self.invitation_expiry_hours)
-            expiry_hours = event.invitation_expiry_hours if event.invitation_expiry_hours is not None else self.invitation_expiry_hours
-            
+
+        overdue = {"status": "invited", "expires_at": {"$lte": now}}
+        overdue_event_ids = self.invitees_collection.distinct("event_id", overdue)
+        active_event_ids = self.events_collection.distinct("_id", {
+            "_id": {"$in": overdue_event_ids}, "automation_status": "active", "is_archived": {"$ne": True}
+        }) if overdue_event_ids else []
+
+        fields = {"status": "EXPIRED", "expired_at": now}
+        per_event = {}
+        for event_id in active_event_ids:
+            # Only invitations this update actually moved out of 'invited' are counted
+            result = self.invitees_collection.update_many({**overdue, "event_id": event_id}, {"$set": fields})
+            if not result.modified_count:
+                continue
+            per_event[event_id] = result.modified_count
+            # The sweep's own timestamp identifies the rows it just expired
+            expired_rows = self.invitees_collection.find({"event_id": event_id, **fields}, INVITEE_STATE_PROJECTION)
+            self._record_transitions([({**row, "status": "invited"}, fields) for row in expired_rows], now)
+        if not per_event:
+            self.logger.info("Completed expired invitations check: nothing to expire.")
+            return {'expired': 0, 'event_ids': []}
+
+        counter_updates = [
+            UpdateOne({"_id": event_id}, {"$inc": {**self._status_counter_inc('invited', 'EXPIRED', count), "event_version": 1}})
+            for event_id, count in per_event.items()
+        ]
+        if counter_updates:
+            self.events_collection.bulk_write(counter_updates, ordered=False)
+
+        event_ids = list(per_event)
+        for event_id in event_ids:
+            self.request_capacity_check(event_id)
+
+        expired = sum(per_event.values())
+        self.logger.info(f"Completed expired invitations check: expired {expired} invitations across {len(event_ids)} events.")
+        return {'expired': expired, 'event_ids': event_ids}
+
+    def stamp_missing_expiry(self):
+        """
+        Backfills `expires_at` on open invitations sent before it was stamped at
+        send time, so the global expiry sweep can see them.
+        """
+        legacy_query = {"status": "invited", "expires_at": None}
+        stamped = 0
+        for event_id in self.invitees_collection.distinct("event_id", legacy_query):
+            event_data = self.events_collection.find_one({"_id": event_id}, {"invitation_expiry_hours": 1}) or {}
+            expiry_hours = event_data.get('invitation_expiry_hours')
+            if expiry_hours is None:
+                expiry_hours = self.invitation_expiry_hours
             if not expiry_hours or expiry_hours <= 0:
                 continue
+            result = self.invitees_collection.update_many(
+                {**legacy_query, "event_id": event_id, "invited_at": {"$ne": None}},
+                [{"$set": {"expires_at": {"$add": ["$invited_at", int(expiry_hours * 3600 * 1000)]}}}]
+            )
+            stamped += result.modified_count
+        self.logger.info(f"Stamped expires_at on {stamped} legacy invitations.")
+        return stamped
 
-            expiry_threshold = now - timedelta(hours=expiry_hours)
+    def normalize_event_dates(self):
+        """
+        Rewrites event dates stored as datetimes by older versions as the
+        YYYY-MM-DD strings new events get, so the events list can page on
+        a single ordering of `date`.
+        """
+        result = self.events_collection.update_many(
+            {"date": {"$type": "date"}},
+            [{"$set": {"date": {"$dateToString": {"format": "%Y-%m-%d", "date": "$date"}}}}]
+        )
+        self.logger.info(f"Normalized the date of {result.modified_count} legacy events.")
+        return result.modified_count
 
+    def request_capacity_check(self, event_id):
+        """
+        Queues an event for the capacity worker after a spot may have opened up.
+        A process without a capacity worker of its own (the SMS worker) flags
+        the event document instead, and the web process's worker picks it up.
+        """
+        if self.capacity_queue is not None:
+            self.capacity_queue.enqueue(event_id)
+        else:
+            self.events_collection.update_one(
+                {"_id": ObjectId(event_id)}, {"$set": {"capacity_check_requested_at": self.get_current_time()}}
+            )
+
+    def take_requested_capacity_checks(self, limit=500):
+        """
+        Returns the ids of events flagged by request_capacity_check in other
+        processes and clears their flags. A flag set again after the read is
+        newer than the claim time, so it survives for the next poll.
+        """
+        claimed_at = self.get_current_time()
+        event_ids = [doc['_id'] for doc in self.events_collection.find(
+            {"capacity_check_requested_at": {"$lte": claimed_at}}, {"_id": 1}
+        ).limit(limit)]
+        if event_ids:
             self.events_collection.update_many(
-                {"_id": event._id, "invitees": {"$elemMatch": {"status": "invited", "invited_at": {"$lt": expiry_threshold}}}},
-                {"$set": {"invitees.$[elem].status": "EXPIRED", "invitees.$[elem].expired_at": now}},
-                array_filters=[{"elem.status": "invited", "elem.invited_at": {"$lt": expiry_threshold}}]
+                {"_id": {"$in": event_ids}, "capacity_check_requested_at": {"$lte": claimed_at}},
+                {"$unset": {"capacity_check_requested_at": ""}}
             )
-        self.logger.info("Completed expired invitations check.")
+        return event_ids
 
-    def manage_event_capacity(self, sms_service):
+    def manage_event_capacity(self, sms_service, event_ids=None):
+        """
+        Sends the next invitations for active events with open spots. With
+        `event_ids` only those events are refilled (the trigger queue path);
+        without, every active event that can take more invitees is swept.
+        """
         self.logger.info("Starting event capacity management")
-        events = self.events_collection.find({
+        query = {
             "automation_status": "active",
-            "is_archived": {"$ne": True}
-        })
-        for event_data in events:
-            try:
-                event = Event.from_dict(event_data)
-                available_spots = self._calculate_available_spots(event)
-                if available_spots > 0:
-                    next_invitees = self._get_next_invitees(event, available_spots)
-                    if next_invitees:
-                        self._send_invitations(event, next_invitees, sms_service)
-            except Exception as e:
-                self.logger.error(f"Error managing capacity for event {event_data.get('_id')}: {str(e)}")
+            "is_archived": {"$ne": True},
+            # Skip events with nobody left to invite or no open spots, using the status counters
+            "$expr": {"$and": [
+                {"$gt": [{"$ifNull": ["$pending_count", 0]}, 0]},
+                {"$lt": [
+                    {"$add": [
+                        {"$ifNull": ["$confirmed_count", 0]},
+                        {"$ifNull": ["$invited_count", 0]},
+                        {"$cond": ["$organizer_is_attending", 1, 0]}
+                    ]},
+                    "$capacity"
+                ]}
+            ]}
+        }
+        if event_ids is not None:
+            query["_id"] = {"$in": [ObjectId(e) for e in event_ids]}
+
+        with self._capacity_lock:
+            for event_data in self.events_collection.find(query):
+                try:
+                    event = Event.from_dict(event_data)
+                    available_spots = self._calculate_available_spots(event)
+                    if available_spots > 0:
+                        next_invitees = self._get_next_invitees(event, available_spots)
+                        if next_invitees:
+                            self._send_invitations(event, next_invitees, sms_service)
+                except Exception as e:
+                    self.logger.error(f"Error managing capacity for event {event_data.get('_id')}: {str(e)}")
 
     def _calculate_available_spots(self, event):
-        confirmed_guests = sum(1 for i in event.invitees if i.get('status') == 'YES')
-        invited_guests = sum(1 for i in event.invitees if i.get('status') == 'invited')
+        confirmed_guests = event.confirmed_count
+        invited_guests = event.invited_count
         organizer_spot = 1 if event.organizer_is_attending else 0
         total_spots_committed = confirmed_guests + invited_guests + organizer_spot
         available_spots = event.capacity - total_spots_committed
         return max(0, available_spots)
 
     def _get_next_invitees(self, event, limit):
-        pending_invitees = [i for i in event.invitees if i.get('status') == 'pending']
-        pending_invitees.sort(key=lambda x: x.get('priority', float('inf')))
-        return pending_invitees[:limit]
+        return list(
+            self.invitees_collection.find({"event_id": event._id, "status": "pending"})
+            .sort("priority", 1)
+            .limit(limit)
+        )
 
     def send_pending_reminders(self):
         self.logger.info("Running send_pending_reminders job (no action taken).")
         pass
     
     def process_rsvp_from_url(self, token, response, sms_service):
-        event, invitee = self.find_event_and_invitee_by_token(token)
+        """
+        Applies a guest's YES or NO from their RSVP link. Only the invitee and
+        event fields the response needs are read, and the event is not read
+        again afterwards: a YES takes the new confirmed_count from the spot
+        reservation itself. Returns (success, message, event).
+        """
+        event, invitee = self.find_event_and_invitee_by_token(
+            token, event_projection=RSVP_SUBMIT_EVENT_PROJECTION, invitee_projection=RSVP_SUBMIT_INVITEE_PROJECTION
+        )
         if not event or not invitee:
             return False, "This invitation link is invalid.", None
 
@@ -165,40 +420,282 @@ class EventService:
         # BUGFIX: Check if the user is already confirmed to prevent re-sending SMS
         is_already_confirmed = invitee.get('status') == 'YES'
 
-        if response == 'YES' and not is_already_confirmed:
-            current_confirmed = sum(1 for i in event.invitees if i.get('status') == 'YES')
-            organizer_spot = 1 if event.organizer_is_attending else 0
-            guest_capacity = event.capacity - organizer_spot
-            if current_confirmed >= guest_capacity:
-                 return False, "Sorry, you cannot change your RSVP to 'YES' as the event is now full.", None
-
         if invitee['status'] == 'EXPIRED':
             if not event.allow_rsvp_after_expiry:
                 return False, "Sorry, this invitation has expired and cannot be changed.", None
 
-        success = self.update_invitee_status(event._id, invitee['_id'], response)
-        
-        # BUGFIX: Only send confirmation if status is changing to YES
-        if success and response == 'YES' and not is_already_confirmed:
-            sms_service.send_confirmation(invitee, event.to_dict())
+        if response == 'YES' and not is_already_confirmed:
+            result, confirmed_count = self._confirm_invitee(event._id, invitee['_id'], invitee['status'])
+            if result == 'full':
+                return False, "Sorry, you cannot change your RSVP to 'YES' as the event is now full.", None
+            success = result != 'not_found'
+            event.confirmed_count = confirmed_count
+            # BUGFIX: Only send confirmation if status is changing to YES
+            if result == 'confirmed':
+                sms_service.send_confirmation(invitee, self._event_for_sms(event))
+        else:
+            success = self.update_invitee_status(event._id, invitee['_id'], response)
 
-        updated_event = self.get_event(event.group_id, event._id)
-        return success, f"Thank you! Your response for {updated_event.name} has been updated.", updated_event
+        return success, f"Thank you! Your response for {event.name} has been updated.", event
 
 
     def update_invitee_status(self, event_id, invitee_id, status):
-        result = self.events_collection.update_one(
-            {"_id": ObjectId(event_id), "invitees._id": ObjectId(invitee_id)},
-            {"$set": {"invitees.$.status": status, "invitees.$.responded_at": self.get_current_time()}}
+        previous = self._set_invitee_fields(event_id, invitee_id, {"status": status, "responded_at": self.get_current_time()})
+        if previous is None:
+            return False
+        if previous.get('status') in ('YES', 'invited') and status not in ('YES', 'invited'):
+            self.request_capacity_check(event_id)
+        return True
+
+    def confirm_invitee(self, event_id, invitee_id):
+        """
+        Moves an invitee to YES only if the event still has a free guest spot.
+
+        The spot is claimed first with a single conditional $inc on the event's
+        confirmed_count, so concurrent confirmations can never overbook, and a
+        full event is detected by that write alone. The invitee is then flipped
+        to YES; if it was already confirmed by a concurrent request, the spot is
+        handed back.
+
+        Returns 'confirmed', 'already_confirmed', 'full' or 'not_found'.
+        """
+        return self._confirm_invitee(event_id, invitee_id)[0]
+
+    def _confirm_invitee(self, event_id, invitee_id, expected_status=None):
+        """
+        confirm_invitee, also returning the event's confirmed_count once the
+        confirmation has settled (None when the event was full). The spot
+        reservation returns the updated counter, so no further read is needed.
+
+        A caller that has just read the invitee passes its `expected_status`,
+        and that status's counter is moved in the reservation itself. If the
+        invitee turns out to have changed in the meantime, the counters are
+        corrected with one more update.
+        """
+        event_oid = ObjectId(event_id)
+        invitee_oid = ObjectId(invitee_id)
+        expected_field = Event.STATUS_COUNTERS.get(expected_status) if expected_status else None
+
+        reservation_inc = {"confirmed_count": 1, "event_version": 1}
+        if expected_field:
+            reservation_inc[expected_field] = -1
+        reservation = self.events_collection.find_one_and_update(
+            {"_id": event_oid, "$expr": {"$lt": [
+                {"$ifNull": ["$confirmed_count", 0]},
+                {"$subtract": ["$capacity", {"$cond": ["$organizer_is_attending", 1, 0]}]}
+            ]}},
+            {"$inc": reservation_inc},
+            projection={"_id": 0, "confirmed_count": 1},
+            return_document=ReturnDocument.AFTER
         )
-        return result.modified_count > 0
+        if reservation is None:
+            return 'full', None
+        confirmed_count = reservation['confirmed_count']
+
+        fields = {"status": "YES", "responded_at": self.get_current_time()}
+        previous = None
+        if expected_status is not None:
+            previous = self.invitees_collection.find_one_and_update(
+                {"_id": invitee_oid, "event_id": event_oid, "status": expected_status},
+                {"$set": fields},
+                projection=INVITEE_STATE_PROJECTION
+            )
+        if previous is None:
+            # No status was given, or it changed since the caller read it
+            previous = self.invitees_collection.find_one_and_update(
+                {"_id": invitee_oid, "event_id": event_oid, "status": {"$ne": "YES"}},
+                {"$set": fields},
+                projection=INVITEE_STATE_PROJECTION
+            )
+        if previous is None:
+            self._apply_status_counters(event_oid, self._status_counter_inc(expected_status, 'YES', amount=-1))
+            if self.invitees_collection.count_documents({"_id": invitee_oid, "event_id": event_oid}, limit=1):
+                return 'already_confirmed', confirmed_count - 1
+            return 'not_found', confirmed_count - 1
+
+        old_status = previous.get('status', 'pending')
+        if old_status != expected_status:
+            correction = self._status_counter_inc(old_status, 'YES')
+            for field, amount in self._status_counter_inc(expected_status, 'YES', amount=-1).items():
+                correction[field] = correction.get(field, 0) + amount
+            self._apply_status_counters(event_oid, {field: amount for field, amount in correction.items() if amount})
+        self._record_transitions([(previous, fields)])
+        return 'confirmed', confirmed_count
+
+    # --- PER-STATUS COUNTERS ---
+    def _status_counter_inc(self, old_status, new_status, amount=1):
+        """Builds the $inc document that moves `amount` invitees from one status counter to another."""
+        inc = {}
+        if old_status == new_status:
+            return inc
+        old_field = Event.STATUS_COUNTERS.get(old_status)
+        new_field = Event.STATUS_COUNTERS.get(new_status)
+        if old_field:
+            inc[old_field] = -amount
+        if new_field:
+            inc[new_field] = amount
+        return inc
+
+    def _apply_status_counters(self, event_id, inc):
+        """Applies a counter $inc; a change in who is invited or confirmed is a new event version."""
+        if inc:
+            self.events_collection.update_one({"_id": ObjectId(event_id)}, {"$inc": {**inc, "event_version": 1}})
+
+    def _set_invitee_fields(self, event_id, invitee_id, fields):
+        """
+        Updates an invitee and, if its status changed, moves the event's counters
+        and the group's daily stats to match. Returns the invitee's previous
+        state, or None if not found.
+        """
+        previous = self.invitees_collection.find_one_and_update(
+            {"_id": ObjectId(invitee_id), "event_id": ObjectId(event_id)},
+            {"$set": fields},
+            projection=INVITEE_STATE_PROJECTION
+        )
+        if previous and 'status' in fields:
+            self._apply_status_counters(event_id, self._status_counter_inc(previous.get('status', 'pending'), fields['status']))
+            self._record_transitions([(previous, fields)])
+        return previous
 
-    def find_event_and_invitee_by_token(self, token):
-        event_data = self.events_collection.find_one({"invitees.rsvp_token": token, "is_archived": {"$ne": True}})
+    def _record_transitions(self, transitions, now=None):
+        """
+        Queues (previous, fields) invitee status changes for the group's daily
+        stats and the RSVP response ledger, which are written in the background.
+        `fields` is None for a deletion.
+        """
+        if transitions:
+            self.transition_recorder.record(transitions, now or self.get_current_time())
+
+    def mark_invitation_failed(self, invitee_id, reason):
+        """
+        Called by the SMS worker when a queued invitation could not be delivered.
+        Moves the invitee from 'invited' to 'ERROR' and queues the event for a
+        refill, since its spot is released; an invitee who has already
+        responded is left alone.
+        """
+        fields = {"status": "ERROR", "failed_at": self.get_current_time(), "error_message": reason}
+        previous = self.invitees_collection.find_one_and_update(
+            {"_id": ObjectId(invitee_id), "status": "invited"},
+            {"$set": fields},
+            projection={"event_id": 1, **INVITEE_STATE_PROJECTION}
+        )
+        if previous is None:
+            return False
+        self._apply_status_counters(previous['event_id'], self._status_counter_inc('invited', 'ERROR'))
+        self._record_transitions([(previous, fields)])
+        self.request_capacity_check(previous['event_id'])
+        return True
+
+    def rebuild_status_counters(self, event_ids=None):
+        """
+        Recomputes the per-status counters from the invitees collection.
+        Runs as a periodic repair job; returns the number of events rewritten.
+        """
+        match = {}
+        event_query = {}
+        if event_ids is not None:
+            event_oids = [ObjectId(e) for e in event_ids]
+            match["event_id"] = {"$in": event_oids}
+            event_query["_id"] = {"$in": event_oids}
+
+        pipeline = [
+            {'$match': match},
+            {'$group': {'_id': {'event_id': '$event_id', 'status': '$status'}, 'count': {'$sum': 1}}}
+        ]
+        counts = {}
+        for row in self.invitees_collection.aggregate(pipeline):
+            field = Event.STATUS_COUNTERS.get(row['_id']['status'] or 'pending')
+            if field:
+                counts.setdefault(row['_id']['event_id'], {})[field] = row['count']
+
+        updates = []
+        for event_data in self.events_collection.find(event_query, {"_id": 1}):
+            fields = {field: 0 for field in Event.STATUS_COUNTERS.values()}
+            fields.update(counts.get(event_data['_id'], {}))
+            updates.append(UpdateOne({"_id": event_data['_id']}, {"$set": fields, "$inc": {"event_version": 1}}))
+
+        for i in range(0, len(updates), 1000):
+            self.events_collection.bulk_write(updates[i:i + 1000], ordered=False)
+        self.logger.info(f"Rebuilt status counters for {len(updates)} events.")
+        return len(updates)
+
+    # --- RSVP TOKENS ---
+    def generate_rsvp_token(self, event_id, invitee_id):
+        """
+        Builds a self-routing RSVP token that carries the event and invitee ids,
+        signed with the app secret so it can be resolved by primary key. With
+        no secret key the token is random.
+        """
+        if self.secret_key is None:
+            return secrets.token_urlsafe(32)
+        payload = ObjectId(event_id).binary + ObjectId(invitee_id).binary
+        token = base64.urlsafe_b64encode(payload + self._sign_token_payload(payload))
+        return token.rstrip(b'=').decode('ascii')
+
+    def _sign_token_payload(self, payload):
+        return hmac.new(self.secret_key, payload, hashlib.sha256).digest()[:16]
+
+    def _decode_rsvp_token(self, token):
+        """Returns (event_id, invitee_id) for a validly signed token, otherwise None."""
+        if self.secret_key is None or not token or len(token) != SIGNED_TOKEN_LENGTH:
+            return None
+        try:
+            raw = base64.urlsafe_b64decode(token + '==')
+        except (ValueError, binascii.Error):
+            return None
+        payload, signature = raw[:24], raw[24:]
+        if not hmac.compare_digest(signature, self._sign_token_payload(payload)):
+            return None
+        return ObjectId(payload[:12]), ObjectId(payload[12:])
+
+    def find_event_and_invitee_by_token(self, token, event_projection=None, invitee_projection=None):
+        """
+        Resolves an RSVP token to (Event, invitee dict), or (None, None). With
+        projections only those fields are read (see the RSVP_* projections);
+        an event projection must include name and capacity, an invitee
+        projection the event_id.
+        """
+        decoded = self._decode_rsvp_token(token)
+        if decoded:
+            event_id, invitee_id = decoded
+            invitee = self.invitees_collection.find_one({"_id": invitee_id, "event_id": event_id}, invitee_projection)
+        else:
+            # Random tokens issued before signed tokens existed resolve through the rsvp_token index
+            invitee = self.invitees_collection.find_one({"rsvp_token": token}, invitee_projection)
+        if not invitee: return None, None
+        event_data = self.events_collection.find_one({"_id": invitee['event_id'], "is_archived": {"$ne": True}}, event_projection)
         if not event_data: return None, None
-        event = Event.from_dict(event_data, self.invitation_expiry_hours)
-        invitee = next((i for i in event.invitees if i.get("rsvp_token") == token), None)
-        return event, invitee
+        return Event.from_dict(event_data, self.invitation_expiry_hours), invitee
+
+    # --- INVITEE QUERIES (backed by the indexed `invitees` collection) ---
+    def get_invitee(self, event_id, invitee_id):
+        return self.invitees_collection.find_one({"_id": ObjectId(invitee_id), "event_id": ObjectId(event_id)})
+
+    def get_invitees(self, event_id, statuses=None, projection=None):
+        """Returns an event's invitees in priority order, optionally filtered by status."""
+        query = {"event_id": ObjectId(event_id)}
+        if statuses:
+            query["status"] = {"$in": list(statuses)}
+        return list(self.invitees_collection.find(query, projection).sort("priority", 1))
+
+    def get_invitee_names(self, group_id, event_id, status, limit=50):
+        """
+        Names of an event's invitees with one status, in priority order, for
+        the events list popovers. Returns (names, more), where `more` says
+        whether names beyond `limit` were left out, or None if the event is
+        not in the group.
+        """
+        event_oid = ObjectId(event_id)
+        if not self.events_collection.count_documents({"_id": event_oid, "group_id": ObjectId(group_id)}, limit=1):
+            return None
+        query = {"event_id": event_oid, "status": status}
+        if status == 'pending':
+            # Invitees added before statuses were always set count as pending
+            query["status"] = {"$in": ["pending", None]}
+        rows = list(
+            self.invitees_collection.find(query, {"_id": 0, "name": 1}).sort("priority", 1).limit(limit + 1)
+        )
+        return [row.get('name') for row in rows[:limit]], len(rows) > limit
 
     # --- GROUP-AWARE CRUD METHODS ---
     def get_event(self, group_id, event_id):
@@ -214,6 +711,25 @@ class EventService:
             query["is_archived"] = {"$ne": True}
         return list(self.events_collection.find(query))
 
+    def get_event_summaries(self, group_id, from_date=None, before=None, limit=20):
+        """
+        One page of a group's active events for the events list, latest event
+        date first, read with EVENT_LIST_PROJECTION. With `from_date` only
+        events on or after that day are returned. Each page is a range scan on
+        (group_id, is_archived, date, _id). Returns (events, next_cursor); pass
+        next_cursor back as `before` for the following page.
+        """
+        # Matching the unarchived values exactly (missing counts as None) keeps the index order for the sort
+        query = {"group_id": ObjectId(group_id), "is_archived": {"$in": [False, None]}}
+        if from_date is not None:
+            # Dates are stored as YYYY-MM-DD strings, which sort like dates
+            query["date"] = {"$gte": from_date.strftime('%Y-%m-%d')}
+        rows = list(
+            self.events_collection.find(after_cursor(query, before, 'date', string_key=True), EVENT_LIST_PROJECTION)
+            .sort([("date", -1), ("_id", -1)]).limit(limit + 1)
+        )
+        return split_page(rows, limit, 'date')
+
     def create_event(self, event_data, group_id):
         event_data['group_id'] = group_id
         event = Event.from_dict(event_data, self.invitation_expiry_hours)
@@ -223,14 +739,16 @@ class EventService:
     def update_event(self, group_id, event_id, event_data):
         self.events_collection.update_one(
             {"_id": ObjectId(event_id), "group_id": ObjectId(group_id)},
-            {"$set": event_data}
+            {"$set": event_data, "$inc": {"event_version": 1}}
         )
+        # Resuming automation or raising capacity can open spots immediately
+        self.request_capacity_check(event_id)
         return self.get_event(group_id, event_id)
 
     def archive_event(self, group_id, event_id):
         result = self.events_collection.update_one(
             {"_id": ObjectId(event_id), "group_id": ObjectId(group_id)},
-            {"$set": {"is_archived": True}}
+            {"$set": {"is_archived": True}, "$inc": {"event_version": 1}}
         )
         return result.modified_count > 0
 
@@ -239,17 +757,24 @@ class EventService:
         if not group:
             raise PermissionError("User does not own this group, cannot delete its events.")
             
+        self.invitees_collection.delete_many({"group_id": ObjectId(group_id)})
         result = self.events_collection.delete_many({"group_id": ObjectId(group_id)})
+        # Queued transitions for the group would otherwise land after its counts are cleared
+        self.transition_recorder.flush()
+        self.group_stats_service.clear_group(group_id)
         return result.deleted_count
 
     def add_invitees(self, group_id, event_id, invitees):
-        event_data = self.events_collection.find_one({"_id": ObjectId(event_id), "group_id": ObjectId(group_id)})
+        event_data = self.events_collection.find_one(
+            {"_id": ObjectId(event_id), "group_id": ObjectId(group_id)}, {"_id": 1, "group_id": 1}
+        )
         if not event_data:
             raise ValueError("Event not found")
-        event = Event.from_dict(event_data, self.invitation_expiry_hours)
+        event_oid = event_data['_id']
 
-        current_contact_ids = {str(i.get('contact_id')) for i in event.invitees}
-        start_priority = max([i.get('priority', -1) for i in event.invitees] + [-1]) + 1
+        current_contact_ids = set(self.invitees_collection.distinct("contact_id", {"event_id": event_oid}))
+        last = self.invitees_collection.find_one({"event_id": event_oid}, {"priority": 1}, sort=[("priority", -1)])
+        start_priority = (last.get('priority', -1) if last else -1) + 1
         
         newly_added_count = 0
         new_invitees_to_add = []
@@ -258,7 +783,8 @@ class EventService:
             contact_id_str = str(invitee_data['_id'])
             if contact_id_str not in current_contact_ids:
                 new_invitee = {
-                    "_id": ObjectId(), "name": invitee_data['name'], "phone": invitee_data['phone'],
+                    "_id": ObjectId(), "event_id": event_oid, "group_id": event_data['group_id'],
+                    "name": invitee_data['name'], "phone": invitee_data['phone'],
                     "status": "pending", "priority": start_priority + newly_added_count,
                     "added_at": self.get_current_time(), "contact_id": contact_id_str
                 }
@@ -266,66 +792,66 @@ class EventService:
                 current_contact_ids.add(contact_id_str)
                 newly_added_count += 1
         if newly_added_count > 0:
-            self.events_collection.update_one(
-                {"_id": ObjectId(event_id), "group_id": ObjectId(group_id)},
-                {"$push": {"invitees": {"$each": new_invitees_to_add}}}
-            )
+            self.invitees_collection.insert_many(new_invitees_to_add)
+            self._apply_status_counters(event_oid, {"pending_count": newly_added_count})
+            self.request_capacity_check(event_oid)
         return newly_added_count
 
     def delete_invitee(self, group_id, event_id, invitee_id):
-        self.events_collection.update_one(
-            {"_id": ObjectId(event_id), "group_id": ObjectId(group_id)},
-            {"$pull": {"invitees": {"_id": ObjectId(invitee_id)}}}
+        removed = self.invitees_collection.find_one_and_delete(
+            {"_id": ObjectId(invitee_id), "event_id": ObjectId(event_id), "group_id": ObjectId(group_id)},
+            projection=INVITEE_STATE_PROJECTION
         )
+        if removed:
+            self._apply_status_counters(event_id, self._status_counter_inc(removed.get('status', 'pending'), None))
+            self._record_transitions([(removed, None)])
+            if removed.get('status') in ('YES', 'invited'):
+                self.request_capacity_check(event_id)
 
     def reorder_invitees(self, group_id, event_id, invitee_order):
-        event_data = self.events_collection.find_one({"_id": ObjectId(event_id), "group_id": ObjectId(group_id)})
-        if not event_data:
+        event_oid = ObjectId(event_id)
+        if not self.events_collection.count_documents({"_id": event_oid, "group_id": ObjectId(group_id)}, limit=1):
             raise ValueError("Event not found")
-        event = Event.from_dict(event_data, self.invitation_expiry_hours)
-        
-        invitees_dict = {str(i['_id']): i for i in event.invitees}
-        new_invitees = []
-        for i, invitee_id in enumerate(invitee_order):
-            if invitee_id in invitees_dict:
-                invitee = invitees_dict[invitee_id]
-                invitee['priority'] = i
-                new_invitees.append(invitee)
-        self.update_event(group_id, event_id, {"invitees": new_invitees})
-        return new_invitees
+
+        updates = [
+            UpdateOne({"_id": ObjectId(invitee_id), "event_id": event_oid}, {"$set": {"priority": i}})
+            for i, invitee_id in enumerate(invitee_order)
+        ]
+        if updates:
+            self.invitees_collection.bulk_write(updates, ordered=False)
+            # The attendee list is shown in priority order
+            self.events_collection.update_one({"_id": event_oid}, {"$inc": {"event_version": 1}})
+        return self.get_invitees(event_oid)
     
     def retry_invitation(self, group_id, event_id, invitee_id, sms_service):
-        event_data = self.events_collection.find_one(
-            {"_id": ObjectId(event_id), "group_id": ObjectId(group_id), "invitees._id": ObjectId(invitee_id)},
-            {"invitees.$": 1}
+        invitee = self.invitees_collection.find_one(
+            {"_id": ObjectId(invitee_id), "event_id": ObjectId(event_id), "group_id": ObjectId(group_id)}
         )
-        if not event_data or not event_data.get('invitees'):
+        if not invitee:
             return False, "Invitee or event not found."
 
-        invitee = event_data['invitees'][0]
         event = self.get_event(group_id, event_id)
 
         if invitee.get('status') != 'ERROR':
             return False, f"Cannot retry for {invitee.get('name')}. Their status is not 'ERROR'."
 
-        invitee['rsvp_token'] = secrets.token_urlsafe(16)
+        invitee['rsvp_token'] = self.generate_rsvp_token(event._id, invitee['_id'])
         
-        success, reason = sms_service.send_invitation(invitee, event.to_dict())
+        success, reason = sms_service.send_invitation(invitee, self._event_for_sms(event))
 
-        update_fields = {"invitees.$.rsvp_token": invitee['rsvp_token']}
+        update_fields = {"rsvp_token": invitee['rsvp_token']}
         if success:
-            update_fields["invitees.$.status"] = "invited"
-            update_fields["invitees.$.invited_at"] = self.get_current_time()
-            update_fields["invitees.$.error_message"] = None
+            invited_at = self.get_current_time()
+            update_fields["status"] = "invited"
+            update_fields["invited_at"] = invited_at
+            update_fields["expires_at"] = self._invitation_expires_at(event, invited_at)
+            update_fields["error_message"] = None
             message = f"Invitation for {invitee.get('name')} was successfully resent."
         else:
-            update_fields["invitees.$.error_message"] = reason
+            update_fields["error_message"] = reason
             message = f"Failed to resend invitation for {invitee.get('name')}: {reason}"
 
-        self.events_collection.update_one(
-            {"_id": ObjectId(event_id), "invitees._id": ObjectId(invitee_id)},
-            {"$set": update_fields}
-        )
+        self._set_invitee_fields(event_id, invitee['_id'], update_fields)
 
         return success, message
 
@@ -352,12 +878,15 @@ class EventService:
         # Use the existing create_event logic
         new_event_id = self.create_event(duplicate_data, group_id)
         
-        if copy_invitees and source_event.invitees:
+        source_invitees = self.get_invitees(source_event._id) if copy_invitees else []
+        if source_invitees:
             new_invitees = []
-            # Corrected logic: Use sorted list to maintain original priority/order
-            for invitee in sorted(source_event.invitees, key=lambda x: x.get('priority', 0)):
+            # Invitees come back sorted by priority, preserving the original order
+            for invitee in source_invitees:
                 new_invitee = {
                     "_id": ObjectId(),
+                    "event_id": ObjectId(new_event_id),
+                    "group_id": ObjectId(group_id),
                     "name": invitee['name'],
                     "phone": invitee['phone'],
                     "status": "pending", # Reset status so automation can process them for the new event
@@ -367,11 +896,8 @@ class EventService:
                 }
                 new_invitees.append(new_invitee)
             
-            # Persist the copied list to the new event document
-            self.events_collection.update_one(
-                {"_id": ObjectId(new_event_id)},
-                {"$set": {"invitees": new_invitees}}
-            )
+            self.invitees_collection.insert_many(new_invitees)
+            self._apply_status_counters(new_event_id, {"pending_count": len(new_invitees)})
 
         return new_event_id
 
@@ -387,7 +913,7 @@ class EventService:
         
         result = self.events_collection.update_one(
             {"_id": ObjectId(event_id), "group_id": ObjectId(group_id)},
-            {"$push": {"messages": message}}
+            {"$push": {"messages": message}, "$inc": {"event_version": 1}}
         )
         return result.modified_count > 0
 
@@ -397,31 +923,22 @@ class EventService:
         - Confirmed attendees (status='YES') see messages sent to 'confirmed' and 'all'
         - Other invitees only see messages sent to 'all'
         """
-        messages = event.to_dict().get('messages', [])
-        print(f"DEBUG: Found {len(messages)} messages in event")
-        print(f"DEBUG: Messages: {messages}")
-        
+        messages = event.messages
         if not messages:
-            print("DEBUG: No messages, returning empty list")
             return []
         
         invitee_status = invitee.get('status')
-        print(f"DEBUG: Invitee status: {invitee_status}")
         
         # Filter messages based on invitee status
         visible_messages = []
         for msg in messages:
             recipient_type = msg.get('recipient_type')
-            print(f"DEBUG: Checking message - recipient_type: {recipient_type}, invitee_status: {invitee_status}")
             if recipient_type == 'all':
-                print(f"DEBUG: Adding 'all' message")
                 visible_messages.append(msg)
             elif recipient_type == 'confirmed' and invitee_status == 'YES':
-                print(f"DEBUG: Adding 'confirmed' message")
                 visible_messages.append(msg)
         
         # Sort by sent_at in descending order (newest first)
         visible_messages.sort(key=lambda x: x.get('sent_at', datetime.min), reverse=True)
         
-        print(f"DEBUG: Returning {len(visible_messages)} visible messages")
         return visible_messages
\ No newline at end of file
@@ -0,0 +1,30 @@
+# app/services/fragment_cache.py
+import threading
+from collections import OrderedDict
+
+class FragmentCache:
+    """
+    Per-process LRU of rendered page fragments.
+
+    Keys carry the version of whatever the fragment was rendered from (for
+    example an event's `event_version`), so entries are never invalidated:
+    a change produces a new key and the old entry ages out.
+    """
+    def __init__(self, max_entries=2000):
+        self.max_entries = max_entries
+        self._entries = OrderedDict()
+        self._lock = threading.Lock()
+
+    def get(self, key):
+        with self._lock:
+            value = self._entries.get(key)
+            if value is not None:
+                self._entries.move_to_end(key)
+            return value
+
+    def set(self, key, value):
+        with self._lock:
+            self._entries[key] = value
+            self._entries.move_to_end(key)
+            while len(self._entries) > self.max_entries:
+                self._entries.popitem(last=False)
@@ -3,14 +3,30 @@ from bson import ObjectId
 from ..models.group import Group
 
 class GroupService:
-    def __init__(self, db):
+    def __init__(self, db, context_cache=None):
         self.db = db
         self.groups_collection = db['groups']
+        self.users_collection = db['users']
+        self.context_cache = context_cache
+        # A group's owner never changes, so each group's owner id is read once per process
+        self._owner_ids = {}
+        self.groups_collection.create_index('owner_id')
+        self.groups_collection.create_index([('created_at', -1), ('_id', -1)])
+        self.groups_collection.create_index('name_lower')
+
+    def _context_changed(self, owner_id):
+        """Drops this process's cached request context for the owner; callers have bumped context_version."""
+        if self.context_cache:
+            self.context_cache.forget(owner_id)
 
     def create_group(self, name, owner_id):
         """Creates a new group and returns its ID."""
         group = Group(name=name, owner_id=owner_id)
         result = self.groups_collection.insert_one(group.to_dict())
+        self.users_collection.update_one(
+            {'_id': ObjectId(owner_id)}, {'$inc': {'owned_group_count': 1, 'context_version': 1}}
+        )
+        self._context_changed(owner_id)
         return result.inserted_id
 
     def get_group(self, group_id):
@@ -18,16 +34,41 @@ class GroupService:
         group_data = self.groups_collection.find_one({"_id": ObjectId(group_id)})
         return Group.from_dict(group_data) if group_data else None
 
+    def get_owner_name(self, group_id):
+        """
+        The display name of a group's owner (falling back to the username).
+        With a context cache the owner is served from it, so repeated calls
+        make no round trips and see a rename within the cache's TTL.
+        """
+        group_key = str(group_id)
+        owner_id = self._owner_ids.get(group_key)
+        if owner_id is None:
+            group = self.groups_collection.find_one({'_id': ObjectId(group_id)}, {'owner_id': 1})
+            if not group:
+                return None
+            owner_id = self._owner_ids[group_key] = group['owner_id']
+
+        if self.context_cache:
+            owner = self.context_cache.get_user(owner_id)
+            return owner.name if owner else None
+        owner = self.users_collection.find_one({'_id': owner_id}, {'name': 1, 'username': 1})
+        return (owner.get('name') or owner.get('username')) if owner else None
+
     def get_groups_by_owner(self, owner_id):
         """Retrieves all groups owned by a specific user."""
         return list(self.groups_collection.find({'owner_id': ObjectId(owner_id)}))
 
     def update_group(self, group_id, owner_id, data):
         """Updates a group's data after verifying ownership."""
+        if data.get('name'):
+            data = {**data, 'name_lower': data['name'].lower()}
         result = self.groups_collection.update_one(
             {'_id': ObjectId(group_id), 'owner_id': ObjectId(owner_id)},
             {'$set': data}
         )
+        if result.modified_count:
+            self.users_collection.update_one({'_id': ObjectId(owner_id)}, {'$inc': {'context_version': 1}})
+            self._context_changed(owner_id)
         return result.modified_count > 0
 
     def delete_group(self, group_id, owner_id):
@@ -35,4 +76,9 @@ class GroupService:
         result = self.groups_collection.delete_one(
             {'_id': ObjectId(group_id), 'owner_id': ObjectId(owner_id)}
         )
+        if result.deleted_count:
+            self.users_collection.update_one(
+                {'_id': ObjectId(owner_id)}, {'$inc': {'owned_group_count': -1, 'context_version': 1}}
+            )
+            self._context_changed(owner_id)
         return result.deleted_count > 0
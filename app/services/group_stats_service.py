@@ -0,0 +1,196 @@
+# app/services/group_stats_service.py
+import logging
+from datetime import datetime, timedelta, timezone
+from bson import ObjectId
+from pymongo import UpdateOne
+from pymongo.database import Database
+from pymongo.errors import DuplicateKeyError
+
+# Invitee status -> (rollup field, timestamp that dates the status)
+STATUS_FIELDS = {
+    'YES': ('confirmed', 'responded_at'),
+    'NO': ('declined', 'responded_at'),
+    'EXPIRED': ('expired', 'expired_at'),
+    'ERROR': ('error', 'failed_at'),
+}
+RESPONSE_FIELDS = [field for field, _ in STATUS_FIELDS.values()]
+STAT_FIELDS = ['sent'] + RESPONSE_FIELDS
+
+def _day(dt):
+    """The UTC day a (naive UTC or aware) datetime falls on, as a naive midnight."""
+    if dt.tzinfo is not None:
+        dt = dt.astimezone(timezone.utc).replace(tzinfo=None)
+    return dt.replace(hour=0, minute=0, second=0, microsecond=0)
+
+def period_start(days, now=None):
+    """Midnight UTC on the first of the last `days` whole days, today being the last of them."""
+    return _day(now or datetime.utcnow()) - timedelta(days=days - 1)
+
+class GroupStatsService:
+    """
+    Per-group, per-day dashboard counts in the `group_daily_stats` collection.
+
+    Each document holds the messages sent and the invitees currently confirmed,
+    declined, expired or failed for one group on one day, dated by the
+    timestamp of their status. EventService and MessageLogService keep the
+    counts current as invitees move between statuses; `rebuild` recomputes a
+    range of days from the source collections and runs nightly as a repair.
+    """
+    def __init__(self, db: Database):
+        self.db = db
+        self.stats_collection = db['group_daily_stats']
+        self.stats_collection.create_index([("group_id", 1), ("day", -1)])
+        self.stats_collection.create_index("day")
+
+    @staticmethod
+    def _key(group_id, day):
+        return {"group_id": ObjectId(group_id), "day": day}
+
+    def record_counts(self, rows):
+        """Applies (group_id, when, field, amount) rows with one bulk write."""
+        increments = {}
+        for group_id, when, field, amount in rows:
+            if not group_id or not amount:
+                continue
+            key = (str(group_id), _day(when))
+            increments.setdefault(key, {})
+            increments[key][field] = increments[key].get(field, 0) + amount
+
+        operations = []
+        for (group_id, day), inc in increments.items():
+            inc = {field: amount for field, amount in inc.items() if amount}
+            if inc:
+                key = self._key(group_id, day)
+                operations.append(UpdateOne({"_id": key}, {"$inc": inc, "$setOnInsert": key}, upsert=True))
+        if operations:
+            self.stats_collection.bulk_write(operations, ordered=False)
+
+    def record_sent(self, log_entries):
+        """Counts freshly written message logs; called by MessageLogService after each flush."""
+        self.record_counts([
+            (entry.get('group_id'), entry['timestamp'], 'sent', 1)
+            for entry in log_entries if entry['status'] == 'sent'
+        ])
+
+    def transition_rows(self, group_id, previous, fields, now):
+        """
+        Rows that move one invitee from its `previous` state (the document as it
+        was, or None for a new invitee) to the `fields` just written to it (None
+        when it was deleted). Unchanged statuses produce no rows.
+        """
+        rows = []
+        if fields is not None and 'status' not in fields:
+            return rows
+        if previous and previous.get('status') in STATUS_FIELDS:
+            field, time_field = STATUS_FIELDS[previous['status']]
+            if previous.get(time_field):
+                rows.append((group_id, previous[time_field], field, -1))
+        if fields is not None and fields['status'] in STATUS_FIELDS:
+            field, time_field = STATUS_FIELDS[fields['status']]
+            rows.append((group_id, fields.get(time_field) or now, field, 1))
+        return rows
+
+    def record_transitions(self, transitions):
+        """Applies a list of (group_id, previous, fields, when) invitee transitions."""
+        rows = []
+        for group_id, previous, fields, now in transitions:
+            rows.extend(self.transition_rows(group_id, previous, fields, now))
+        self.record_counts(rows)
+
+    def clear_group(self, group_id):
+        """Zeroes a group's response counts once its invitees are gone; sent messages stay counted."""
+        self.stats_collection.update_many(
+            {"group_id": ObjectId(group_id)}, {"$set": {field: 0 for field in RESPONSE_FIELDS}}
+        )
+
+    def rebuild(self, start_day, end_day):
+        """
+        Recomputes the whole days in [start_day, end_day) with two $merge
+        aggregations: response counts from `invitees` and sent counts from the
+        day buckets of `sms_usage_counters`. Safe to re-run.
+        """
+        start_day, end_day = _day(start_day), _day(end_day)
+        self.stats_collection.update_many(
+            {"day": {"$gte": start_day, "$lt": end_day}}, {"$set": {field: 0 for field in STAT_FIELDS}}
+        )
+
+        day_range = {"$gte": start_day, "$lt": end_day}
+        status_time = {"$switch": {
+            "branches": [
+                {"case": {"$eq": ["$status", status]}, "then": f"${time_field}"}
+                for status, (_, time_field) in STATUS_FIELDS.items()
+            ],
+            "default": None
+        }}
+        self.db['invitees'].aggregate([
+            {"$match": {"$or": [
+                {"status": {"$in": ["YES", "NO"]}, "responded_at": day_range},
+                {"status": "EXPIRED", "expired_at": day_range},
+                {"status": "ERROR", "failed_at": day_range}
+            ]}},
+            {"$group": {
+                "_id": {"group_id": "$group_id", "day": {"$dateTrunc": {"date": status_time, "unit": "day"}}},
+                **{field: {"$sum": {"$cond": [{"$eq": ["$status", status]}, 1, 0]}} for status, (field, _) in STATUS_FIELDS.items()}
+            }},
+            {"$set": {"group_id": "$_id.group_id", "day": "$_id.day"}},
+            {"$merge": {"into": "group_daily_stats", "on": "_id", "whenMatched": "merge", "whenNotMatched": "insert"}}
+        ], allowDiskUse=True)
+
+        self.db['sms_usage_counters'].aggregate([
+            {"$match": {"granularity": "day", "scope": {"$regex": "^group:"}, "bucket": day_range}},
+            {"$project": {
+                "_id": 0,
+                "group_id": {"$toObjectId": {"$substrCP": ["$scope", 6, 24]}},
+                "day": "$bucket",
+                "sent": {"$ifNull": ["$counts.sent", 0]}
+            }},
+            {"$set": {"_id": {"group_id": "$group_id", "day": "$day"}}},
+            {"$merge": {"into": "group_daily_stats", "on": "_id", "whenMatched": "merge", "whenNotMatched": "insert"}}
+        ], allowDiskUse=True)
+
+    def rebuild_recent(self, days=7):
+        """Nightly repair: rebuilds the last `days` days, including today."""
+        tomorrow = _day(datetime.utcnow()) + timedelta(days=1)
+        self.rebuild(tomorrow - timedelta(days=days), tomorrow)
+        logging.info(f"Rebuilt group daily stats for the last {days} day(s).")
+
+    def backfill(self):
+        """
+        One-off rebuild of all history, so groups that existed before the
+        rollups get their past days. Guarded by a marker document so only one
+        process ever runs it; the marker is only set once the invitee migration
+        has run, so starting the app before it does not skip the legacy invitees.
+        """
+        if self.db['events'].find_one({"invitees": {"$exists": True}}, {"_id": 1}) or not self.db['invitees'].find_one({}, {"_id": 1}):
+            return False
+        try:
+            self.stats_collection.insert_one({"_id": "backfilled", "at": datetime.utcnow()})
+        except DuplicateKeyError:
+            return False
+
+        # Failures recorded before failed_at existed are dated by when they were added
+        self.db['invitees'].update_many(
+            {"status": "ERROR", "failed_at": None},
+            [{"$set": {"failed_at": {"$ifNull": ["$invited_at", "$added_at"]}}}]
+        )
+        first_day = None
+        for collection, field in (('invitees', 'added_at'), ('sms_usage_counters', 'bucket')):
+            oldest = self.db[collection].find_one({field: {"$type": "date"}}, {field: 1}, sort=[(field, 1)])
+            if oldest and (first_day is None or oldest[field] < first_day):
+                first_day = oldest[field]
+        if first_day is not None:
+            self.rebuild(first_day, _day(datetime.utcnow()) + timedelta(days=1))
+        logging.info("Backfilled group daily stats.")
+        return True
+
+    def get_totals(self, group_id, start_time=None):
+        """Sums a group's daily counts from the day of start_time (default: all time) until today."""
+        match = {"group_id": ObjectId(group_id)}
+        if start_time is not None and start_time > datetime.min:
+            match["day"] = {"$gte": _day(start_time)}
+        rows = list(self.stats_collection.aggregate([
+            {"$match": match},
+            {"$group": {"_id": None, **{field: {"$sum": f"${field}"} for field in STAT_FIELDS}}}
+        ]))
+        totals = rows[0] if rows else {}
+        return {field: totals.get(field, 0) for field in STAT_FIELDS}
@@ -1,29 +1,70 @@
 # app/services/message_log_service.py
+import atexit
+import gzip
+import logging
+import os
+import threading
 from datetime import datetime, timedelta
-from bson import ObjectId
+from bson import ObjectId, json_util
+from pymongo.errors import BulkWriteError
+from .sms_usage_service import SMSUsageService
+from .group_stats_service import GroupStatsService
 
 class MessageLogService:
-    def __init__(self, db):
+    def __init__(self, db, flush_size=100, flush_interval_seconds=1.0, max_buffer_size=10000, retention_days=90, archive_dir=None):
         self.db = db
         self.logs_collection = db.message_logs
-        
+        self.daily_collection = db.message_log_daily
+        self.usage_service = SMSUsageService(db)
+        self.group_stats_service = GroupStatsService(db)
+        self.retention_days = retention_days
+        self.archive_dir = archive_dir
+
         self.logs_collection.create_index([("contact_id", 1)])
         self.logs_collection.create_index([("event_id", 1)])
         self.logs_collection.create_index([("timestamp", -1)])
         self.logs_collection.create_index([("group_id", 1)])
+        self.logs_collection.create_index([("group_id", 1), ("timestamp", -1), ("_id", -1)])
         self.logs_collection.create_index([("to_number", 1), ("timestamp", -1)])
+        self.daily_collection.create_index([("group_id", 1), ("day", -1)])
+        self.daily_collection.create_index([("event_id", 1), ("day", -1)])
+
+        # Log entries are buffered and written by a background thread with insert_many.
+        # Entries that are buffered or mid-flush are still visible to the read methods below.
+        self.flush_size = flush_size
+        self.flush_interval_seconds = flush_interval_seconds
+        self.max_buffer_size = max_buffer_size
+        self._buffer = []
+        self._in_flight = []
+        self._buffer_lock = threading.Lock()
+        self._flush_lock = threading.Lock()
+        self._flush_requested = threading.Event()
+        self._writer = threading.Thread(target=self._writer_loop, name='message-log-writer', daemon=True)
+        self._writer.start()
+        atexit.register(self.flush)
 
-    def log_message(self, to_number, message_body, status, message_sid=None, error_message=None, contact_id=None, event_id=None, group_id=None):
-        """Logs an SMS message attempt to the database."""
+    def log_message(self, to_number, message_body, status, message_sid=None, error_message=None, contact_id=None, event_id=None, group_id=None, template_id=None, params=None, recipient_name=None, event_name=None):
+        """
+        Logs an SMS message attempt. The entry is queued and written in the next batch.
+        Messages rendered from a registered template store the template id and
+        parameters instead of the full text. Recipient and event names are
+        stored as they were at send time, so reads never join other collections.
+        """
         log_entry = {
             "to_number": to_number,
-            "message_body": message_body,
             "status": status,
             "message_sid": message_sid,
             "error_message": error_message,
+            "recipient_name": recipient_name,
+            "event_name": event_name,
             "timestamp": datetime.utcnow()
         }
-        
+        if template_id:
+            log_entry['template_id'] = template_id
+            log_entry['params'] = params or {}
+        else:
+            log_entry['message_body'] = message_body
+
         if contact_id:
             log_entry['contact_id'] = ObjectId(contact_id) if isinstance(contact_id, str) else contact_id
         if event_id:
@@ -31,36 +72,156 @@ class MessageLogService:
         if group_id:
             log_entry['group_id'] = ObjectId(group_id) if isinstance(group_id, str) else group_id
 
-        self.logs_collection.insert_one(log_entry)
+        with self._buffer_lock:
+            self._buffer.append(log_entry)
+            if len(self._buffer) >= self.flush_size:
+                self._flush_requested.set()
         return log_entry
 
-    def get_sms_count_since(self, start_time):
-        """Counts all sent SMS messages on the platform since a given time."""
-        count = self.logs_collection.count_documents({
-            "timestamp": {"$gte": start_time},
-            "status": "sent"
-        })
-        return count
-
-    def get_sms_count_for_group_since(self, group_id, start_time):
-        """Counts sent SMS for a specific group since a given time."""
-        count = self.logs_collection.count_documents({
-            "timestamp": {"$gte": start_time},
-            "status": "sent",
-            "group_id": ObjectId(group_id)
-        })
-        return count
-
-    def get_sms_count_for_recipient_since(self, to_number, start_time):
-        """Counts SMS sent to a specific number from the whole platform."""
-        count = self.logs_collection.count_documents({
-            "timestamp": {"$gte": start_time},
-            "to_number": to_number
-        })
-        return count
+    def _writer_loop(self):
+        while True:
+            self._flush_requested.wait(self.flush_interval_seconds)
+            self._flush_requested.clear()
+            try:
+                self.flush()
+            except Exception as e:
+                logging.error(f"Message log writer failed to flush: {e}")
+
+    def flush(self):
+        """Writes every buffered entry now. Safe to call from any thread."""
+        with self._flush_lock:
+            with self._buffer_lock:
+                if not self._buffer:
+                    return 0
+                self._in_flight, self._buffer = self._buffer, []
+            entries = self._in_flight
+            # Entries keep the _id insert_many assigned them, so a retried entry that did reach
+            # the database comes back as a duplicate key and is treated as written.
+            failed_indexes, error = set(), None
+            try:
+                self.logs_collection.insert_many(entries, ordered=False)
+            except BulkWriteError as e:
+                failed_indexes = {err['index'] for err in e.details.get('writeErrors', []) if err.get('code') != 11000}
+                error = e.details.get('writeErrors', [{}])[0].get('errmsg')
+            except Exception as e:
+                failed_indexes, error = set(range(len(entries))), e
+
+            written = [entry for index, entry in enumerate(entries) if index not in failed_indexes]
+            retry = [entries[index] for index in sorted(failed_indexes)]
+            if written:
+                try:
+                    self.usage_service.record(written)
+                except Exception as e:
+                    logging.error(f"Failed to update SMS usage counters for {len(written)} message log(s): {e}")
+                try:
+                    self.group_stats_service.record_sent(written)
+                except Exception as e:
+                    logging.error(f"Failed to update group daily stats for {len(written)} message log(s): {e}")
+
+            with self._buffer_lock:
+                self._in_flight = []
+                if retry and len(self._buffer) + len(retry) <= self.max_buffer_size:
+                    self._buffer[:0] = retry
+                    logging.error(f"Failed to write {len(retry)} message log(s), will retry: {error}")
+                elif retry:
+                    logging.error(f"Failed to write {len(retry)} message log(s) and the buffer is full; dropping them: {error}")
+            return len(written)
+
+    def _unflushed(self, predicate):
+        """Entries not yet visible in the database that match `predicate`."""
+        with self._buffer_lock:
+            return [entry for entry in self._in_flight + self._buffer if predicate(entry)]
 
     def get_logs_for_contact(self, contact_id):
         """Retrieve all message logs for a specific contact, regardless of group."""
-        return list(self.logs_collection.find({
-            'contact_id': ObjectId(contact_id)
-        }).sort('timestamp', -1))
\ No newline at end of file
+        contact_id = ObjectId(contact_id)
+        logs = list(self.logs_collection.find({
+            'contact_id': contact_id
+        }).sort('timestamp', -1))
+        pending = self._unflushed(lambda e: e.get('contact_id') == contact_id)
+        return sorted(pending, key=lambda e: e['timestamp'], reverse=True) + logs if pending else logs
+
+    def roll_up_days(self, start_day, end_day):
+        """
+        Summarises raw logs for the whole days in [start_day, end_day) into
+        `message_log_daily`, one document per day, group and event, with counts
+        by status and the number of distinct recipients. Re-running a day
+        replaces its summaries, so the job is safe to repeat.
+        """
+        pipeline = [
+            {"$match": {"timestamp": {"$gte": start_day, "$lt": end_day}}},
+            {"$group": {
+                "_id": {
+                    "day": {"$dateTrunc": {"date": "$timestamp", "unit": "day"}},
+                    "group_id": "$group_id",
+                    "event_id": "$event_id",
+                    "status": "$status"
+                },
+                "count": {"$sum": 1},
+                "recipients": {"$addToSet": "$to_number"}
+            }},
+            {"$group": {
+                "_id": {"day": "$_id.day", "group_id": "$_id.group_id", "event_id": "$_id.event_id"},
+                "counts": {"$push": {"k": "$_id.status", "v": "$count"}},
+                "recipients": {"$push": "$recipients"}
+            }},
+            {"$project": {
+                "_id": 1,
+                "day": "$_id.day",
+                "group_id": "$_id.group_id",
+                "event_id": "$_id.event_id",
+                "counts": {"$arrayToObject": "$counts"},
+                "unique_recipients": {"$size": {"$setUnion": {
+                    "$reduce": {"input": "$recipients", "initialValue": [], "in": {"$setUnion": ["$$value", "$$this"]}}
+                }}}
+            }},
+            {"$merge": {"into": "message_log_daily", "on": "_id", "whenMatched": "replace", "whenNotMatched": "insert"}}
+        ]
+        self.logs_collection.aggregate(pipeline, allowDiskUse=True)
+
+    def _archive_day(self, day):
+        """Writes one day of raw logs to a gzipped NDJSON file; returns the number of rows."""
+        os.makedirs(self.archive_dir, exist_ok=True)
+        path = os.path.join(self.archive_dir, f"message_logs-{day:%Y-%m-%d}.ndjson.gz")
+        temp_path = f"{path}.tmp"
+        archived = 0
+        with gzip.open(temp_path, 'wt', encoding='utf-8') as archive:
+            for log in self.logs_collection.find({"timestamp": {"$gte": day, "$lt": day + timedelta(days=1)}}).sort("timestamp", 1):
+                archive.write(json_util.dumps(log) + "\n")
+                archived += 1
+        if archived:
+            os.replace(temp_path, path)
+        else:
+            os.remove(temp_path)
+        return archived
+
+    def apply_retention(self):
+        """
+        Daily retention job. Rolls up every completed day since the last
+        rollup, then removes raw logs older than `retention_days`, archiving
+        each day to NDJSON first when an archive directory is configured.
+        Raw rows (and so per-contact history) are kept for the full horizon.
+        """
+        today = datetime.utcnow().replace(hour=0, minute=0, second=0, microsecond=0)
+        last_rollup = self.daily_collection.find_one({}, {"day": 1}, sort=[("day", -1)])
+        oldest_log = self.logs_collection.find_one({}, {"timestamp": 1}, sort=[("timestamp", 1)])
+        if oldest_log is None:
+            return {'rolled_up_from': None, 'removed': 0}
+
+        # Re-roll the last summarised day too, in case late log flushes landed after it ran
+        oldest_day = oldest_log['timestamp'].replace(hour=0, minute=0, second=0, microsecond=0)
+        rollup_start = max(last_rollup['day'], oldest_day) if last_rollup else oldest_day
+        if rollup_start < today:
+            self.roll_up_days(rollup_start, today)
+
+        cutoff = today - timedelta(days=self.retention_days)
+        removed = 0
+        day = oldest_day
+        while day < cutoff:
+            if self.archive_dir:
+                self._archive_day(day)
+            removed += self.logs_collection.delete_many({"timestamp": {"$gte": day, "$lt": day + timedelta(days=1)}}).deleted_count
+            day += timedelta(days=1)
+
+        logging.info(f"Message log retention: rolled up from {rollup_start:%Y-%m-%d}, removed {removed} raw log(s) older than {cutoff:%Y-%m-%d}.")
+        return {'rolled_up_from': rollup_start, 'removed': removed}
@@ -0,0 +1,46 @@
+# app/services/message_templates.py
+import re
+import string
+
+# Every outgoing SMS text is registered here once. Message logs store only the
+# template id and its parameters; the text is rendered when it is displayed.
+MESSAGE_TEMPLATES = {
+    'invitation': "Hi {name}, you're invited to {event_name}! Please RSVP here: {rsvp_url}",
+    'confirmation': "Thanks for confirming, {name}! We've got you down for {event_name} on {event_date}. See you there!",
+    'reminder': "Hi {name}, just a friendly reminder to RSVP for {event_name}. Please respond here: {rsvp_url}",
+    'event_message': "Event Msg: {text}",
+}
+
+def render_message(template_id, params):
+    """Renders a registered template; returns None for an unknown template id."""
+    template = MESSAGE_TEMPLATES.get(template_id)
+    if template is None:
+        return None
+    return template.format(**(params or {}))
+
+def message_text(log):
+    """The text of a message log, whether it was stored verbatim or as a template reference."""
+    if log.get('message_body') is not None:
+        return log['message_body']
+    return render_message(log.get('template_id'), log.get('params')) or ''
+
+def _compile(template):
+    pattern = ''
+    for literal, field, _, _ in string.Formatter().parse(template):
+        pattern += re.escape(literal)
+        if field:
+            pattern += f'(?P<{field}>.+?)'
+    return re.compile(f'^{pattern}$', re.DOTALL)
+
+_TEMPLATE_PATTERNS = {template_id: _compile(template) for template_id, template in MESSAGE_TEMPLATES.items()}
+
+def match_template(message_body):
+    """
+    Finds the registered template a verbatim message body was rendered from.
+    Returns (template_id, params), or (None, None) if no template matches.
+    """
+    for template_id, pattern in _TEMPLATE_PATTERNS.items():
+        match = pattern.match(message_body or '')
+        if match and render_message(template_id, match.groupdict()) == message_body:
+            return template_id, match.groupdict()
+    return None, None
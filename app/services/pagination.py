@@ -0,0 +1,41 @@
+# app/services/pagination.py
+from datetime import datetime
+from bson import ObjectId
+
+# Keyset pagination over newest-first (timestamp, _id) orderings. A cursor
+# names the last row of a page; the next page starts strictly after it.
+# String keys such as event dates (YYYY-MM-DD) are carried verbatim.
+CURSOR_FORMAT = '%Y%m%d%H%M%S%f'
+
+def encode_cursor(row, field='timestamp'):
+    """Opaque cursor pointing just past `row` in newest-first order."""
+    key = row[field] if isinstance(row[field], str) else row[field].strftime(CURSOR_FORMAT)
+    return f"{key}_{row['_id']}"
+
+def decode_cursor(cursor, string_key=False):
+    """Returns (timestamp, _id) for a cursor, or None if it is missing or malformed."""
+    try:
+        timestamp, row_id = cursor.split('_', 1)
+        return (timestamp if string_key else datetime.strptime(timestamp, CURSOR_FORMAT)), ObjectId(row_id)
+    except (AttributeError, ValueError, TypeError):
+        return None
+
+def after_cursor(query, cursor, field='timestamp', string_key=False):
+    """Restricts `query` to the rows after `cursor` in (field desc, _id desc) order."""
+    position = decode_cursor(cursor, string_key)
+    if position is None:
+        return query
+    timestamp, row_id = position
+    keyset = [
+        {field: {"$lt": timestamp}},
+        {field: timestamp, "_id": {"$lt": row_id}}
+    ]
+    if "$or" in query:
+        # Keeps a search's own $or alongside the keyset one
+        return {"$and": [query, {"$or": keyset}]}
+    return {**query, "$or": keyset}
+
+def split_page(rows, limit, field='timestamp'):
+    """Given up to limit + 1 rows, returns (page, next_cursor)."""
+    next_cursor = encode_cursor(rows[limit - 1], field) if len(rows) > limit else None
+    return rows[:limit], next_cursor
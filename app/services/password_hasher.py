@@ -0,0 +1,100 @@
+# app/services/password_hasher.py
+import multiprocessing
+import os
+import threading
+import time
+from concurrent.futures import ProcessPoolExecutor
+from concurrent.futures.process import BrokenProcessPool
+import bcrypt
+
+MIN_ROUNDS = 12 # bcrypt's default, which every existing hash uses; calibration never goes below it
+MAX_ROUNDS = 16
+CALIBRATION_ROUNDS = 10
+
+def _hash(password, rounds):
+    return bcrypt.hashpw(password, bcrypt.gensalt(rounds))
+
+def _check(password, password_hash):
+    return bcrypt.checkpw(password, password_hash)
+
+def hash_rounds(password_hash):
+    """The cost factor stored in a bcrypt hash ($2b$<rounds>$...), or 0 if it cannot be read."""
+    try:
+        return int(password_hash.split(b'$')[2])
+    except (AttributeError, IndexError, ValueError):
+        return 0
+
+def calibrate_rounds(target_ms, samples=3):
+    """
+    The highest cost between MIN_ROUNDS and MAX_ROUNDS whose hash takes at
+    most `target_ms` on this machine. Times a cheap hash and extrapolates,
+    since each extra round doubles the work.
+    """
+    elapsed = float('inf')
+    for _ in range(samples):
+        start = time.perf_counter()
+        _hash(b'calibration', CALIBRATION_ROUNDS)
+        elapsed = min(elapsed, time.perf_counter() - start)
+
+    rounds = CALIBRATION_ROUNDS
+    while rounds < MAX_ROUNDS and elapsed * 2 * 1000 <= target_ms:
+        elapsed *= 2
+        rounds += 1
+    return max(MIN_ROUNDS, rounds)
+
+class PasswordHasher:
+    """
+    Hashes and verifies passwords with bcrypt on a small process pool, so
+    the CPU-bound work never runs on a request thread.
+
+    At most `workers + queue_limit` operations can be running or waiting in
+    one process. A caller that cannot get a slot within `queue_wait_seconds`
+    gets a TimeoutError, so a login burst is turned away early instead of
+    queueing behind work that cannot finish in time. With `workers=0`
+    hashing runs inline, which is what scripts and the admin CLI use.
+    """
+    def __init__(self, rounds=MIN_ROUNDS, workers=0, queue_limit=16, queue_wait_seconds=2):
+        self.rounds = rounds
+        self.workers = workers
+        self.queue_wait_seconds = queue_wait_seconds
+        self._slots = threading.BoundedSemaphore(workers + queue_limit) if workers else None
+        self._pool = None
+        self._pool_pid = None
+        self._pool_lock = threading.Lock()
+
+    def _executor(self):
+        # A pool does not survive a fork, so each gunicorn worker starts its own on first use.
+        # Pool processes come from a forkserver rather than a fork of this multi-threaded
+        # process, which could copy a lock held by another thread (pymongo's, logging's).
+        with self._pool_lock:
+            if self._pool is None or self._pool_pid != os.getpid():
+                self._pool = ProcessPoolExecutor(
+                    max_workers=self.workers, mp_context=multiprocessing.get_context('forkserver')
+                )
+                self._pool_pid = os.getpid()
+            return self._pool
+
+    def _run(self, func, *args):
+        if not self.workers:
+            return func(*args)
+        if not self._slots.acquire(timeout=self.queue_wait_seconds):
+            raise TimeoutError("Too many password checks are queued; try again shortly.")
+        try:
+            return self._executor().submit(func, *args).result()
+        except BrokenProcessPool:
+            # A pool process died; the next call starts a fresh pool
+            with self._pool_lock:
+                self._pool = None
+            raise
+        finally:
+            self._slots.release()
+
+    def hash(self, password):
+        return self._run(_hash, password.encode('utf-8'), self.rounds)
+
+    def verify(self, password, password_hash):
+        return self._run(_check, password.encode('utf-8'), password_hash)
+
+    def needs_rehash(self, password_hash):
+        """True when a stored hash was made with a lower cost than the current one."""
+        return hash_rounds(password_hash) < self.rounds
@@ -0,0 +1,208 @@
+# app/services/rate_limiter.py
+import logging
+import threading
+import time
+from datetime import datetime, timedelta
+from bson import ObjectId
+from pymongo import UpdateOne
+from pymongo.errors import DuplicateKeyError
+
+HOUR = timedelta(hours=1)
+DAY = timedelta(hours=24)
+BUCKET_RETENTION = timedelta(hours=25)
+
+class SMSRateLimiter:
+    """
+    Sliding-window SMS quotas (global, per group, per recipient) kept in memory.
+
+    Sends are counted in one-minute buckets. Each process checks and reserves
+    against its local view, and every `sync_seconds` it pushes its own new
+    counts into the shared `sms_rate_counters` collection and reloads everyone
+    else's. A guardrail check is then a dictionary lookup, plus one query the
+    first time a group or phone number is seen.
+    """
+    def __init__(self, db, settings_service, recipient_limit, recipient_window_minutes, sync_seconds=5, group_cache_seconds=60):
+        self.db = db
+        self.counters_collection = db.sms_rate_counters
+        self.groups_collection = db.groups
+        self.settings_service = settings_service
+        self.recipient_limit = recipient_limit
+        self.recipient_window = timedelta(minutes=recipient_window_minutes)
+        self.sync_seconds = sync_seconds
+        self.group_cache_seconds = group_cache_seconds
+
+        self._lock = threading.Lock()
+        self._remote = {}      # key -> {bucket: count}, as of the last sync
+        self._unsynced = {}    # key -> {bucket: count}, reserved here and not yet pushed
+        self._remote_totals = {}  # (key, window) -> sum of the remote buckets inside that window
+        self._group_limits = {}  # group_id -> (hourly, daily, loaded_at)
+        self._last_sync = 0
+
+        self.counters_collection.create_index([("key", 1), ("bucket", 1)])
+        self.counters_collection.create_index("expires_at", expireAfterSeconds=0)
+        self.seed_from_logs()
+
+    @staticmethod
+    def _bucket(now):
+        return now.replace(second=0, microsecond=0)
+
+    def seed_from_logs(self):
+        """
+        Fills the shared counters from the last day of message_logs. Runs once per
+        deployment: the first process to insert the marker document does the work.
+        """
+        try:
+            self.counters_collection.insert_one({"_id": "seeded", "at": datetime.utcnow()})
+        except DuplicateKeyError:
+            return
+
+        since = datetime.utcnow() - DAY
+        minute = {"$dateTrunc": {"date": "$timestamp", "unit": "minute"}}
+        pipeline = [
+            {"$match": {"timestamp": {"$gte": since}, "status": "sent"}},
+            {"$group": {"_id": {"group_id": "$group_id", "to_number": "$to_number", "bucket": minute}, "count": {"$sum": 1}}}
+        ]
+        increments = {}
+        recipient_since = datetime.utcnow() - self.recipient_window
+        for row in self.db.message_logs.aggregate(pipeline):
+            bucket = row['_id']['bucket']
+            keys = ['global']
+            if row['_id'].get('group_id'):
+                keys.append(f"group:{row['_id']['group_id']}")
+            if bucket >= self._bucket(recipient_since):
+                keys.append(f"recipient:{row['_id']['to_number']}")
+            for key in keys:
+                increments.setdefault(key, {})
+                increments[key][bucket] = increments[key].get(bucket, 0) + row['count']
+
+        self._push(increments)
+        logging.info(f"Seeded SMS rate counters from message_logs ({len(increments)} keys).")
+
+    def _push(self, increments):
+        operations = [
+            UpdateOne(
+                {"_id": f"{key}|{bucket:%Y%m%d%H%M}"},
+                {"$inc": {"count": count}, "$setOnInsert": {"key": key, "bucket": bucket, "expires_at": bucket + BUCKET_RETENTION}},
+                upsert=True
+            )
+            for key, buckets in increments.items() for bucket, count in buckets.items() if count
+        ]
+        if operations:
+            self.counters_collection.bulk_write(operations, ordered=False)
+
+    def _load(self, keys, now):
+        """Replaces the remote view of `keys` with what is currently in the shared counters."""
+        if not keys:
+            return
+        fresh = {key: {} for key in keys}
+        for doc in self.counters_collection.find(
+            {"key": {"$in": list(keys)}, "bucket": {"$gt": now - DAY}}, {"key": 1, "bucket": 1, "count": 1}
+        ):
+            fresh[doc['key']][doc['bucket']] = doc['count']
+        self._remote.update(fresh)
+        self._remote_totals = {k: v for k, v in self._remote_totals.items() if k[0] not in fresh}
+
+    def sync(self, now=None):
+        """Pushes this process's new counts and reloads every tracked key. Caller holds the lock."""
+        now = now or datetime.utcnow()
+        self._last_sync = time.monotonic()
+        unsynced, self._unsynced = self._unsynced, {}
+        try:
+            self._push(unsynced)
+        except Exception as e:
+            # Keep the counts for the next attempt rather than losing them
+            for key, buckets in unsynced.items():
+                for bucket, count in buckets.items():
+                    self._add(self._unsynced, key, bucket, count)
+            logging.error(f"Failed to sync SMS rate counters: {e}")
+            return
+
+        # Stop tracking recipients that have dropped out of their window
+        for key in [k for k in self._remote if k.startswith('recipient:')]:
+            if not any(bucket > now - self.recipient_window for bucket in self._remote[key]):
+                del self._remote[key]
+        self._load(set(self._remote) | set(unsynced) | {'global'}, now)
+
+    @staticmethod
+    def _add(store, key, bucket, count):
+        buckets = store.setdefault(key, {})
+        buckets[bucket] = buckets.get(bucket, 0) + count
+
+    def _count(self, key, window, now):
+        """
+        Sends for `key` inside `window`. The remote part is summed once per sync;
+        only this process's handful of unsynced buckets are added up per call.
+        """
+        since = now - window
+        remote = self._remote_totals.get((key, window))
+        if remote is None:
+            remote = sum(count for bucket, count in self._remote.get(key, {}).items() if bucket > since)
+            self._remote_totals[(key, window)] = remote
+        return remote + sum(count for bucket, count in self._unsynced.get(key, {}).items() if bucket > since)
+
+    def _get_group_limits(self, group_id):
+        group_id = str(group_id)
+        cached = self._group_limits.get(group_id)
+        if cached and time.monotonic() - cached[2] < self.group_cache_seconds:
+            return cached[:2]
+        group = self.groups_collection.find_one(
+            {"_id": ObjectId(group_id)}, {"sms_hourly_limit": 1, "sms_daily_limit": 1}
+        ) if ObjectId.is_valid(group_id) else None
+        if not group:
+            return None
+        limits = (group.get('sms_hourly_limit', 100), group.get('sms_daily_limit', 500))
+        self._group_limits[group_id] = (*limits, time.monotonic())
+        return limits
+
+    def try_acquire(self, to_number, group_id):
+        """
+        Checks every quota for one message and, if all pass, counts it straight
+        away so the next check in the same batch sees it. Returns (allowed, reason).
+        """
+        with self._lock:
+            now = datetime.utcnow()
+            if time.monotonic() - self._last_sync >= self.sync_seconds:
+                self.sync(now)
+
+            recipient_key = f"recipient:{to_number}"
+            group_key = f"group:{group_id}"
+            untracked = {key for key in (recipient_key, group_key) if key not in self._remote}
+            if untracked:
+                self._load(untracked, now)
+
+            recent_sends = self._count(recipient_key, self.recipient_window, now)
+            if recent_sends >= self.recipient_limit:
+                window = int(self.recipient_window.total_seconds() // 60)
+                return False, f"Recipient spam protection: Number has received {recent_sends} messages in the last {window} minutes (limit is {self.recipient_limit})."
+
+            hourly_limit = self.settings_service.get_setting('sms_hourly_limit')
+            daily_limit = self.settings_service.get_setting('sms_daily_limit')
+            hourly_count = self._count('global', HOUR, now)
+            if hourly_count >= hourly_limit:
+                return False, f"Global hourly SMS limit reached ({hourly_count}/{hourly_limit})."
+            daily_count = self._count('global', DAY, now)
+            if daily_count >= daily_limit:
+                return False, f"Global daily SMS limit reached ({daily_count}/{daily_limit})."
+
+            group_limits = self._get_group_limits(group_id) if group_id else None
+            if not group_limits:
+                return False, "Group not found for quota check."
+            group_hourly_limit, group_daily_limit = group_limits
+            hourly_count = self._count(group_key, HOUR, now)
+            if hourly_count >= group_hourly_limit:
+                return False, f"Group hourly SMS limit reached ({hourly_count}/{group_hourly_limit})."
+            daily_count = self._count(group_key, DAY, now)
+            if daily_count >= group_daily_limit:
+                return False, f"Group daily SMS limit reached ({daily_count}/{group_daily_limit})."
+
+            bucket = self._bucket(now)
+            for key in ('global', group_key, recipient_key):
+                self._add(self._unsynced, key, bucket, 1)
+            return True, "OK"
+
+    def release(self, to_number, group_id):
+        """Gives back a reservation for a message that was never delivered to Twilio."""
+        with self._lock:
+            bucket = self._bucket(datetime.utcnow())
+            for key in ('global', f"group:{group_id}", f"recipient:{to_number}"):
+                self._add(self._unsynced, key, bucket, -1)
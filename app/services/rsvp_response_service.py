@@ -0,0 +1,150 @@
+# app/services/rsvp_response_service.py
+import logging
+from datetime import datetime
+from pymongo.database import Database
+from pymongo.errors import DuplicateKeyError
+from .pagination import after_cursor, split_page
+
+# Invitee status -> the timestamp field that dates a transition into it
+STATUS_TIME_FIELDS = {
+    'invited': 'invited_at',
+    'YES': 'responded_at',
+    'NO': 'responded_at',
+    'EXPIRED': 'expired_at',
+    'ERROR': 'failed_at',
+}
+
+class RSVPResponseService:
+    """
+    Append-only ledger of invitee status transitions in `rsvp_responses`.
+
+    EventService writes one entry whenever an invitee's status changes: when
+    an invitation is sent or fails, when the guest responds and when the
+    invitation expires. Only the newest entry per invitee is `current`, so a
+    guest who changes their answer is listed under the new one only; entries
+    of deleted invitees are no longer current.
+    """
+    def __init__(self, db: Database):
+        self.db = db
+        self.responses_collection = db['rsvp_responses']
+        self.responses_collection.create_index([("contact_id", 1), ("timestamp", -1), ("_id", -1)])
+        self.responses_collection.create_index([("group_id", 1), ("new_status", 1), ("current", 1), ("timestamp", -1), ("_id", -1)])
+        self.responses_collection.create_index([("invitee_id", 1), ("current", 1)])
+        # Newest entry per group, which versions the engagement reports
+        self.responses_collection.create_index([("group_id", 1), ("_id", -1)])
+        # Transitions before this moment are only present once backfill_from_invitees has run
+        self.responses_collection.update_one(
+            {"_id": "recording_since"}, {"$setOnInsert": {"at": datetime.utcnow()}}, upsert=True
+        )
+
+    @staticmethod
+    def _entry(previous, new_status, timestamp):
+        return {
+            "group_id": previous.get('group_id'),
+            "event_id": previous.get('event_id'),
+            "invitee_id": previous.get('_id'),
+            "contact_id": previous.get('contact_id'),
+            "old_status": previous.get('status'),
+            "new_status": new_status,
+            "timestamp": timestamp
+        }
+
+    def record_transitions(self, transitions):
+        """
+        Appends one entry per (previous, fields, when) transition whose `fields`
+        changed the invitee's status. `previous` is the invitee as it was
+        before the write; `when` dates entries whose fields carry no timestamp.
+        Each invitee's newest entry becomes current and its older ones stop
+        being; a deletion (fields None) leaves none of its entries current.
+        """
+        entries = []
+        newest = {}  # invitee _id -> its newest entry in this batch, None once deleted
+        for previous, fields, now in transitions:
+            invitee_id = previous.get('_id')
+            if fields is None:
+                newest[invitee_id] = None
+                continue
+            if 'status' not in fields or fields['status'] == previous.get('status'):
+                continue
+            time_field = STATUS_TIME_FIELDS.get(fields['status'])
+            entry = self._entry(previous, fields['status'], fields.get(time_field) or now)
+            entry['current'] = False
+            entries.append(entry)
+            newest[invitee_id] = entry
+        newest.pop(None, None)
+
+        for entry in newest.values():
+            if entry is not None:
+                entry['current'] = True
+        if entries:
+            self.responses_collection.insert_many(entries, ordered=False)
+        if newest:
+            self.responses_collection.update_many(
+                {"invitee_id": {"$in": list(newest)}, "current": True,
+                 "_id": {"$nin": [entry['_id'] for entry in newest.values() if entry is not None]}},
+                {"$set": {"current": False}}
+            )
+        return len(entries)
+
+    def _page(self, query, before, limit):
+        """One newest-first page of entries matching `query`, with the guest and event names."""
+        pipeline = [
+            {'$match': after_cursor(query, before)},
+            {'$sort': {'timestamp': -1, '_id': -1}},
+            {'$limit': limit + 1},
+            {'$lookup': {'from': 'invitees', 'localField': 'invitee_id', 'foreignField': '_id', 'as': 'invitee_info'}},
+            {'$lookup': {'from': 'events', 'localField': 'event_id', 'foreignField': '_id', 'as': 'event_info'}},
+            {'$project': {
+                'guest_name': {'$first': '$invitee_info.name'}, 'event_name': {'$first': '$event_info.name'},
+                'old_status': 1, 'new_status': 1, 'timestamp': 1
+            }}
+        ]
+        return split_page(list(self.responses_collection.aggregate(pipeline)), limit)
+
+    def get_current_responses(self, group_id, status, since=None, before=None, limit=50):
+        """
+        One page of a group's invitees whose current status is `status`,
+        dated by when they reached it, newest first: a range scan on
+        (group_id, new_status, current, timestamp, _id). Returns (rows, next_cursor).
+        """
+        query = {"group_id": group_id, "new_status": status, "current": True}
+        if since:
+            query["timestamp"] = {"$gte": since}
+        return self._page(query, before, limit)
+
+    def get_contact_history(self, contact_id, before=None, limit=20):
+        """One page of a contact's status transitions across all events, newest first."""
+        return self._page({"contact_id": str(contact_id)}, before, limit)
+
+    def backfill_from_invitees(self):
+        """
+        One-off seeding of the ledger from invitees that reached a status before
+        it existed: one entry per invitee for its current status, dated by that
+        status's timestamp. Guarded by a marker document so only one process
+        ever runs it; the marker is only set once the invitee migration has
+        run, so starting the app before it does not skip the legacy invitees.
+        """
+        if self.db['events'].find_one({"invitees": {"$exists": True}}, {"_id": 1}) or not self.db['invitees'].find_one({}, {"_id": 1}):
+            return 0
+        try:
+            self.responses_collection.insert_one({"_id": "backfilled", "at": datetime.utcnow()})
+        except DuplicateKeyError:
+            return 0
+
+        cutoff = self.responses_collection.find_one({"_id": "recording_since"})['at']
+        seeded = 0
+        for status, time_field in STATUS_TIME_FIELDS.items():
+            query = {"status": status, time_field: {"$type": "date", "$lt": cutoff}}
+            # Seeded entries reuse the invitee's _id, so an interrupted run can simply be repeated
+            self.db['invitees'].aggregate([
+                {'$match': query},
+                {'$project': {
+                    '_id': 1, 'group_id': 1, 'event_id': 1, 'invitee_id': '$_id', 'contact_id': 1,
+                    'old_status': {'$literal': None}, 'new_status': '$status', 'timestamp': f'${time_field}',
+                    'current': {'$literal': True}, 'backfilled': {'$literal': True}
+                }},
+                {'$merge': {'into': 'rsvp_responses', 'on': '_id', 'whenMatched': 'keepExisting', 'whenNotMatched': 'insert'}}
+            ], allowDiskUse=True)
+            seeded += self.db['invitees'].count_documents(query)
+        logging.info(f"Seeded the RSVP response ledger from {seeded} invitee(s).")
+        return seeded
@@ -0,0 +1,104 @@
+# app/services/sms_outbox_service.py
+from datetime import datetime, timedelta
+from bson import ObjectId
+from pymongo import UpdateOne
+
+class SMSOutboxService:
+    """
+    Durable queue of outgoing SMS in the `sms_outbox` collection.
+
+    SMSService enqueues messages here instead of calling Twilio inline, and
+    SMS worker processes claim them in batches under a time-limited lease.
+    A batch whose worker dies is picked up again once its lease runs out.
+    """
+    def __init__(self, db, max_attempts=3):
+        self.db = db
+        self.outbox_collection = db.sms_outbox
+        self.max_attempts = max_attempts
+
+        self.outbox_collection.create_index([("status", 1), ("available_at", 1)])
+        self.outbox_collection.create_index([("status", 1), ("lease_expires_at", 1)])
+        self.outbox_collection.create_index("claim_id", sparse=True)
+        # Finished messages are kept for a week for troubleshooting; message_logs is the permanent record
+        self.outbox_collection.create_index("completed_at", expireAfterSeconds=7 * 24 * 3600)
+
+    def enqueue_many(self, messages):
+        """Queues message dicts (as accepted by SMSService.send_many) with a single insert."""
+        if not messages:
+            return []
+        now = datetime.utcnow()
+        docs = []
+        for message in messages:
+            doc = {
+                "to_number": message['to_number'],
+                "status": "queued",
+                "attempts": 0,
+                "created_at": now,
+                "available_at": now
+            }
+            for field in ('message_body', 'template_id', 'params', 'contact_id', 'event_id', 'group_id', 'invitee_id', 'recipient_name', 'event_name'):
+                if message.get(field):
+                    doc[field] = message[field]
+            docs.append(doc)
+        return self.outbox_collection.insert_many(docs).inserted_ids
+
+    def claim_batch(self, worker_id, batch_size=50, lease_seconds=120):
+        """
+        Leases up to `batch_size` messages to `worker_id`. Queued messages and
+        messages whose lease has expired are both claimable. Each claim is
+        stamped with a fresh claim_id, so concurrent workers never return the
+        same message.
+        """
+        now = datetime.utcnow()
+        claimable = {"$or": [
+            {"status": "queued", "available_at": {"$lte": now}},
+            {"status": "sending", "lease_expires_at": {"$lte": now}}
+        ]}
+        candidate_ids = [
+            doc['_id'] for doc in
+            self.outbox_collection.find(claimable, {"_id": 1}).sort("_id", 1).limit(batch_size)
+        ]
+        if not candidate_ids:
+            return []
+
+        claim_id = ObjectId()
+        self.outbox_collection.update_many(
+            {"_id": {"$in": candidate_ids}, **claimable},
+            {
+                "$set": {
+                    "status": "sending",
+                    "lease_owner": worker_id,
+                    "claim_id": claim_id,
+                    "lease_expires_at": now + timedelta(seconds=lease_seconds)
+                },
+                "$inc": {"attempts": 1}
+            }
+        )
+        return list(self.outbox_collection.find({"claim_id": claim_id}).sort("_id", 1))
+
+    def complete(self, outcomes):
+        """
+        Records the outcome of claimed messages. `outcomes` is a list of
+        (message_doc, success, error_message). Only writes messages still held
+        under the same claim, so a worker whose lease was taken over cannot
+        overwrite the new owner's result.
+        """
+        if not outcomes:
+            return
+        now = datetime.utcnow()
+        operations = [
+            UpdateOne(
+                {"_id": doc['_id'], "claim_id": doc['claim_id']},
+                {"$set": {
+                    "status": "done" if success else "failed",
+                    "error_message": error,
+                    "completed_at": now,
+                    "lease_expires_at": None
+                }}
+            )
+            for doc, success, error in outcomes
+        ]
+        self.outbox_collection.bulk_write(operations, ordered=False)
+
+    def get_queue_depth(self):
+        return self.outbox_collection.count_documents({"status": {"$in": ["queued", "sending"]}})
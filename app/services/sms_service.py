@@ -1,139 +1,157 @@
 # app/services/sms_service.py
-from twilio.rest import Client
-from twilio.base.exceptions import TwilioRestException
 import logging
-from datetime import datetime, timedelta
-from flask import current_app
+from datetime import datetime
+from .sms_transport import AsyncSMSTransport
+from .message_templates import render_message
 
 class SMSService:
-    def __init__(self, sid, auth_token, twilio_phone, message_log_service, base_url, settings_service, enabled=False):
+    def __init__(self, sid, auth_token, twilio_phone, message_log_service, base_url, rate_limiter, enabled=False,
+                 api_base_url='https://api.twilio.com', concurrency=10, timeout_seconds=10, outbox_service=None):
         self.sid = sid
         self.auth_token = auth_token
         self.twilio_phone = twilio_phone
         self.base_url = base_url
         self.message_log_service = message_log_service
-        self.settings_service = settings_service
+        self.rate_limiter = rate_limiter
         self.enabled = enabled
-        
+        self.outbox_service = outbox_service
+
         if self.sid and self.auth_token:
-            self.client = Client(self.sid, self.auth_token)
+            self.transport = AsyncSMSTransport(
+                self.sid, self.auth_token, self.twilio_phone,
+                api_base_url=api_base_url, concurrency=concurrency, timeout_seconds=timeout_seconds
+            )
         else:
-            self.client = None
+            self.transport = None
             logging.warning("Twilio credentials not found. SMS service will be simulated.")
-        
-        from app import mongo
-        self.groups_collection = mongo.db.groups
-
-    def _check_recipient_spam(self, to_number):
-        """Platform-wide check to prevent spamming a single phone number."""
-        limit = current_app.config['RECIPIENT_SPAM_LIMIT']
-        window = current_app.config['RECIPIENT_SPAM_WINDOW_MINUTES']
-        
-        start_time = datetime.utcnow() - timedelta(minutes=window)
-        recent_sends = self.message_log_service.get_sms_count_for_recipient_since(to_number, start_time)
-        
-        if recent_sends >= limit:
-            reason = f"Recipient spam protection: Number has received {recent_sends} messages in the last {window} minutes (limit is {limit})."
-            return False, reason
-        return True, "Recipient OK"
-
-    def _check_global_rate_limits(self):
-        """Checks if sending an SMS would violate the global platform limits from DB settings."""
-        hourly_limit = self.settings_service.get_setting('sms_hourly_limit')
-        daily_limit = self.settings_service.get_setting('sms_daily_limit')
-        
-        one_hour_ago = datetime.utcnow() - timedelta(hours=1)
-        hourly_count = self.message_log_service.get_sms_count_since(one_hour_ago)
-        if hourly_count >= hourly_limit:
-            return False, f"Global hourly SMS limit reached ({hourly_count}/{hourly_limit})."
-
-        one_day_ago = datetime.utcnow() - timedelta(hours=24)
-        daily_count = self.message_log_service.get_sms_count_since(one_day_ago)
-        if daily_count >= daily_limit:
-            return False, f"Global daily SMS limit reached ({daily_count}/{daily_limit})."
-
-        return True, "Global limits OK"
-
-    def _check_group_rate_limits(self, group_id):
-        """Checks if sending an SMS would violate the specific group's limits."""
-        group = self.groups_collection.find_one({"_id": group_id})
-        if not group:
-            return False, "Group not found for quota check."
-
-        hourly_limit = group.get('sms_hourly_limit', 100)
-        daily_limit = group.get('sms_daily_limit', 500)
-
-        one_hour_ago = datetime.utcnow() - timedelta(hours=1)
-        hourly_count = self.message_log_service.get_sms_count_for_group_since(group_id, one_hour_ago)
-        if hourly_count >= hourly_limit:
-            return False, f"Group hourly SMS limit reached ({hourly_count}/{hourly_limit})."
-
-        one_day_ago = datetime.utcnow() - timedelta(hours=24)
-        daily_count = self.message_log_service.get_sms_count_for_group_since(group_id, one_day_ago)
-        if daily_count >= daily_limit:
-            return False, f"Group daily SMS limit reached ({daily_count}/{daily_limit})."
-
-        return True, "Group limits OK"
-
-    def _send(self, to_number, message_body, contact_id=None, event_id=None, group_id=None):
-        """Private method to handle sending logic with all guardrails."""
-        log_kwargs = {'contact_id': contact_id, 'event_id': event_id, 'group_id': group_id}
-        
-        if not self.enabled:
-            reason = 'SMS sending is disabled globally.'
-            self.message_log_service.log_message(to_number, message_body, 'blocked', error_message=reason, **log_kwargs)
-            return True, None
-
-        can_send, reason = self._check_recipient_spam(to_number)
-        if not can_send:
-            logging.error(f"SMS BLOCKED: {reason}")
-            self.message_log_service.log_message(to_number, message_body, 'blocked', error_message=reason, **log_kwargs)
-            return False, reason
-
-        can_send, reason = self._check_global_rate_limits()
-        if not can_send:
-            logging.error(f"SMS BLOCKED: {reason}")
-            self.message_log_service.log_message(to_number, message_body, 'blocked', error_message=reason, **log_kwargs)
-            return False, reason
-            
-        can_send, reason = self._check_group_rate_limits(group_id)
-        if not can_send:
-            logging.error(f"SMS BLOCKED: {reason}")
-            self.message_log_service.log_message(to_number, message_body, 'blocked', error_message=reason, **log_kwargs)
-            return False, reason
-
-        if not self.client:
-            reason = 'Twilio client not initialized.'
-            self.message_log_service.log_message(to_number, message_body, 'failed', error_message=reason, **log_kwargs)
-            return False, reason
+
+    def _check_guardrails(self, message):
+        """
+        Runs the recipient, global and group quotas for one message. A message
+        that passes is counted against the quotas immediately, so later messages
+        in the same batch see it. Returns (can_send, reason).
+        """
+        return self.rate_limiter.try_acquire(message['to_number'], message.get('group_id'))
+
+    def send_many(self, messages):
+        """
+        Sends a batch of messages. Each message is a dict with `to_number` and
+        either `message_body` or a registered `template_id` with its `params`,
+        plus optional `contact_id`, `event_id`, `group_id`, `invitee_id`, `recipient_name` and `event_name`. Returns a list of (success, error_message) tuples in the
+        same order as `messages`.
+
+        With an outbox configured the batch is only queued, and every result is
+        (True, None); an SMS worker dispatches it later and reports failures.
+        """
+        if self.outbox_service is not None:
+            self.outbox_service.enqueue_many(messages)
+            return [(True, None)] * len(messages)
+        return self.dispatch_many(messages)
+
+    def dispatch_many(self, messages):
+        """
+        Sends a batch of messages concurrently over the pooled transport.
+        Guardrails are applied to every message before anything is dispatched,
+        and every attempt is recorded in message_logs.
+        """
+        results = [None] * len(messages)
+        to_dispatch = []
+
+        bodies = [message.get('message_body') or render_message(message.get('template_id'), message.get('params')) for message in messages]
+
+        for index, message in enumerate(messages):
+            to_number, message_body = message['to_number'], bodies[index]
+            log_kwargs = {
+                'contact_id': message.get('contact_id'), 'event_id': message.get('event_id'), 'group_id': message.get('group_id'),
+                'template_id': message.get('template_id'), 'params': message.get('params'),
+                'recipient_name': message.get('recipient_name'), 'event_name': message.get('event_name')
+            }
+
+            if not self.enabled:
+                reason = 'SMS sending is disabled globally.'
+                self.message_log_service.log_message(to_number, message_body, 'blocked', error_message=reason, **log_kwargs)
+                results[index] = (True, None)
+                continue
+
+            can_send, reason = self._check_guardrails(message)
+            if not can_send:
+                logging.error(f"SMS BLOCKED: {reason}")
+                self.message_log_service.log_message(to_number, message_body, 'blocked', error_message=reason, **log_kwargs)
+                results[index] = (False, reason)
+                continue
+
+            if not self.transport:
+                reason = 'Twilio client not initialized.'
+                self.rate_limiter.release(to_number, log_kwargs['group_id'])
+                self.message_log_service.log_message(to_number, message_body, 'failed', error_message=reason, **log_kwargs)
+                results[index] = (False, reason)
+                continue
+
+            to_dispatch.append((index, log_kwargs))
+
+        if not to_dispatch:
+            return results
 
         try:
-            message = self.client.messages.create(to=to_number, from_=self.twilio_phone, body=message_body)
-            self.message_log_service.log_message(to_number, message_body, 'sent', message.sid, **log_kwargs)
-            return True, None
-        except TwilioRestException as e:
-            self.message_log_service.log_message(to_number, message_body, 'failed', error_message=str(e), **log_kwargs)
-            return False, str(e)
+            outcomes = self.transport.send_many(
+                [(messages[index]['to_number'], bodies[index]) for index, _ in to_dispatch]
+            )
         except Exception as e:
             reason = f"Unexpected error: {str(e)}"
-            self.message_log_service.log_message(to_number, message_body, 'failed', error_message=reason, **log_kwargs)
-            return False, reason
+            outcomes = [(None, reason, False)] * len(to_dispatch)
+
+        for (index, log_kwargs), (message_sid, error, maybe_sent) in zip(to_dispatch, outcomes):
+            to_number, message_body = messages[index]['to_number'], bodies[index]
+            if error:
+                # A message that timed out or was cancelled in flight may have gone out, so it keeps its rate-limit slot
+                if not maybe_sent:
+                    self.rate_limiter.release(to_number, log_kwargs['group_id'])
+                self.message_log_service.log_message(to_number, message_body, 'failed', error_message=error, **log_kwargs)
+                results[index] = (False, error)
+            else:
+                self.message_log_service.log_message(to_number, message_body, 'sent', message_sid, **log_kwargs)
+                results[index] = (True, None)
+        return results
+
+    def _send(self, to_number, message_body=None, contact_id=None, event_id=None, group_id=None, template_id=None, params=None, recipient_name=None, event_name=None):
+        """Private method to handle sending logic with all guardrails."""
+        return self.send_many([{
+            'to_number': to_number, 'message_body': message_body, 'template_id': template_id, 'params': params,
+            'contact_id': contact_id, 'event_id': event_id, 'group_id': group_id,
+            'recipient_name': recipient_name, 'event_name': event_name
+        }])[0]
+
+    def _invitee_message(self, template_id, invitee, event, **params):
+        return {
+            'to_number': invitee['phone'],
+            'template_id': template_id,
+            'params': {'name': invitee['name'], 'event_name': event['name'], **params},
+            'contact_id': invitee.get('contact_id'), 'event_id': event.get('_id'), 'group_id': event.get('group_id'),
+            'invitee_id': invitee.get('_id'), 'recipient_name': invitee['name'], 'event_name': event['name']
+        }
+
+    def _invitation_message(self, invitee, event):
+        return self._invitee_message('invitation', invitee, event, rsvp_url=f"{self.base_url}/rsvp/{invitee['rsvp_token']}")
 
     def send_invitation(self, invitee, event):
-        rsvp_url = f"{self.base_url}/rsvp/{invitee['rsvp_token']}"
-        message_body = f"Hi {invitee['name']}, you're invited to {event['name']}! Please RSVP here: {rsvp_url}"
-        return self._send(invitee['phone'], message_body, contact_id=invitee.get('contact_id'), event_id=event.get('_id'), group_id=event.get('group_id'))
+        return self.send_many([self._invitation_message(invitee, event)])[0]
+
+    def send_invitations(self, invitees, event):
+        """Sends a whole wave of invitations concurrently; results follow the order of `invitees`."""
+        return self.send_many([self._invitation_message(invitee, event) for invitee in invitees])
 
     def send_confirmation(self, invitee, event):
         event_date_str = event.get('date').strftime('%A, %B %d') if isinstance(event.get('date'), datetime) else 'the event date'
-        message_body = f"Thanks for confirming, {invitee['name']}! We've got you down for {event['name']} on {event_date_str}. See you there!"
-        return self._send(invitee['phone'], message_body, contact_id=invitee.get('contact_id'), event_id=event.get('_id'), group_id=event.get('group_id'))
+        message = self._invitee_message('confirmation', invitee, event, event_date=event_date_str)
+        return self.send_many([message])[0]
 
     def send_reminder(self, invitee, event):
-        rsvp_url = f"{self.base_url}/rsvp/{invitee['rsvp_token']}"
-        message_body = f"Hi {invitee['name']}, just a friendly reminder to RSVP for {event['name']}. Please respond here: {rsvp_url}"
-        return self._send(invitee['phone'], message_body, contact_id=invitee.get('contact_id'), event_id=event.get('_id'), group_id=event.get('group_id'))
+        message = self._invitee_message('reminder', invitee, event, rsvp_url=f"{self.base_url}/rsvp/{invitee['rsvp_token']}")
+        return self.send_many([message])[0]
 
-    def send_event_message(self, to_number, message_body, contact_id=None, event_id=None, group_id=None):
+    def send_event_message(self, to_number, text, contact_id=None, event_id=None, group_id=None, recipient_name=None, event_name=None):
         """Send a custom message to an event invitee (used for event messaging feature)."""
-        return self._send(to_number, message_body, contact_id=contact_id, event_id=event_id, group_id=group_id)
\ No newline at end of file
+        return self._send(
+            to_number, template_id='event_message', params={'text': text}, contact_id=contact_id, event_id=event_id, group_id=group_id,
+            recipient_name=recipient_name, event_name=event_name
+        )
\ No newline at end of file
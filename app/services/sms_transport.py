@@ -0,0 +1,105 @@
+# app/services/sms_transport.py
+import asyncio
+import atexit
+import concurrent.futures
+import logging
+import threading
+import aiohttp
+
+class AsyncSMSTransport:
+    """
+    Sends SMS through Twilio's REST API from a dedicated asyncio event loop.
+
+    A single aiohttp session with a keep-alive connection pool is reused for
+    every batch, and a semaphore caps how many requests are in flight at once.
+    Callers stay synchronous: `send_many` blocks until the whole batch is done.
+    `api_base_url` can point at a local fake Twilio server for testing.
+    """
+    def __init__(self, sid, auth_token, from_number, api_base_url='https://api.twilio.com', concurrency=10, timeout_seconds=10):
+        self.sid = sid
+        self.auth_token = auth_token
+        self.from_number = from_number
+        self.messages_url = f"{api_base_url.rstrip('/')}/2010-04-01/Accounts/{sid}/Messages.json"
+        self.concurrency = concurrency
+        self.timeout_seconds = timeout_seconds
+        self._session = None
+        self._semaphore = None
+        self._loop = asyncio.new_event_loop()
+        self._thread = threading.Thread(target=self._loop.run_forever, name='sms-transport', daemon=True)
+        self._thread.start()
+        atexit.register(self.close)
+
+    async def _get_session(self):
+        if self._session is None or self._session.closed:
+            connector = aiohttp.TCPConnector(limit=self.concurrency, keepalive_timeout=60)
+            self._session = aiohttp.ClientSession(
+                connector=connector,
+                auth=aiohttp.BasicAuth(self.sid, self.auth_token),
+                timeout=aiohttp.ClientTimeout(total=self.timeout_seconds)
+            )
+            self._semaphore = asyncio.Semaphore(self.concurrency)
+        return self._session
+
+    async def _send_one(self, session, to_number, message_body):
+        """
+        Returns (message_sid, error_message, maybe_sent). Never raises: anything
+        that goes wrong with one message is that message's error, not the
+        batch's. `maybe_sent` is True when the request timed out, since Twilio
+        may still have accepted it.
+        """
+        async with self._semaphore:
+            try:
+                async with session.post(self.messages_url, data={'To': to_number, 'From': self.from_number, 'Body': message_body}) as response:
+                    payload = await response.json(content_type=None)
+                    status = response.status
+            except asyncio.TimeoutError:
+                return None, f"Timed out after {self.timeout_seconds}s waiting for Twilio.", True
+            except Exception as e:
+                return None, f"Unexpected error: {str(e)}", False
+
+        if not isinstance(payload, dict):
+            return None, f"Unexpected response from Twilio (HTTP {status}): {str(payload)[:200]}", False
+        if status >= 400:
+            return None, f"Twilio error {payload.get('code')}: {payload.get('message')}", False
+        return payload.get('sid'), None, False
+
+    async def _send_batch(self, messages, deadline):
+        session = await self._get_session()
+        tasks = [asyncio.ensure_future(self._send_one(session, to_number, body)) for to_number, body in messages]
+        done, pending = await asyncio.wait(tasks, timeout=deadline)
+        for task in pending:
+            task.cancel()
+        cancelled = (None, f"Cancelled after the batch ran past {deadline}s; Twilio may still have accepted it.", True)
+        return [task.result() if task in done else cancelled for task in tasks]
+
+    def send_many(self, messages):
+        """
+        Sends [(to_number, message_body), ...] concurrently and returns a list of
+        (message_sid, error_message, maybe_sent) tuples in the same order.
+
+        Every request is bounded by `timeout_seconds`, so the batch is given
+        that long per wave of `concurrency` requests, plus one spare wave.
+        Messages still in flight after that are cancelled and fail on their
+        own with `maybe_sent` set; the ones that finished keep their results.
+        """
+        if not messages:
+            return []
+        deadline = (-(-len(messages) // self.concurrency) + 1) * self.timeout_seconds
+        future = asyncio.run_coroutine_threadsafe(self._send_batch(messages, deadline), self._loop)
+        try:
+            # The batch enforces its own deadline; this only guards against a stalled event loop
+            return future.result(timeout=deadline + self.timeout_seconds)
+        except concurrent.futures.TimeoutError:
+            future.cancel()
+            reason = f"SMS batch of {len(messages)} did not finish within {deadline}s."
+            return [(None, reason, True)] * len(messages)
+
+    def close(self):
+        if not self._loop.is_running():
+            return
+        if self._session is not None and not self._session.closed:
+            try:
+                asyncio.run_coroutine_threadsafe(self._session.close(), self._loop).result(timeout=5)
+            except Exception as e:
+                logging.warning(f"Error closing SMS transport session: {e}")
+        self._loop.call_soon_threadsafe(self._loop.stop)
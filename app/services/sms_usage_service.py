@@ -0,0 +1,167 @@
+# app/services/sms_usage_service.py
+import logging
+from datetime import datetime, timedelta
+from pymongo import UpdateOne
+from pymongo.database import Database
+from pymongo.errors import DuplicateKeyError
+
+MINUTE_BUCKET_RETENTION = timedelta(hours=48)
+EPOCH = datetime(1970, 1, 1)
+
+def _floor(dt, unit):
+    dt = dt.replace(second=0, microsecond=0)
+    if unit in ('hour', 'day'):
+        dt = dt.replace(minute=0)
+    if unit == 'day':
+        dt = dt.replace(hour=0)
+    return dt
+
+def _ceil(dt, unit):
+    floored = _floor(dt, unit)
+    if floored == dt:
+        return dt
+    return floored + (timedelta(days=1) if unit == 'day' else timedelta(hours=1) if unit == 'hour' else timedelta(minutes=1))
+
+class SMSUsageService:
+    """
+    Pre-aggregated SMS counts in the `sms_usage_counters` collection.
+
+    Every logged message increments a minute, hour and day bucket plus a
+    running total, both globally and for its group, split by status. Counting
+    messages since a point in time reads the few buckets that tile the range
+    instead of scanning message_logs. Minute buckets expire after two days,
+    so ranges starting earlier than that are resolved to the hour.
+    """
+    def __init__(self, db: Database):
+        self.db = db
+        self.counters_collection = db['sms_usage_counters']
+        self.counters_collection.create_index([("scope", 1), ("granularity", 1), ("bucket", 1)])
+        self.counters_collection.create_index("expires_at", expireAfterSeconds=0)
+        # Logs written before this moment are only counted once backfill_from_logs has run
+        self.counters_collection.update_one(
+            {"_id": "counting_since"}, {"$setOnInsert": {"at": datetime.utcnow()}}, upsert=True
+        )
+
+    @staticmethod
+    def _scopes(group_id):
+        return ['global'] + ([f"group:{group_id}"] if group_id else [])
+
+    def _bucket_updates(self, increments):
+        """Turns {(scope, granularity, bucket, status): count} into upserts."""
+        operations = []
+        for (scope, granularity, bucket, status), count in increments.items():
+            if granularity == 'total':
+                doc_id = f"{scope}|total"
+                on_insert = {"scope": scope, "granularity": "total"}
+            else:
+                doc_id = f"{scope}|{granularity}|{bucket:%Y%m%d%H%M}"
+                on_insert = {"scope": scope, "granularity": granularity, "bucket": bucket}
+                if granularity == 'minute':
+                    on_insert["expires_at"] = bucket + MINUTE_BUCKET_RETENTION
+            operations.append(UpdateOne({"_id": doc_id}, {"$inc": {f"counts.{status}": count}, "$setOnInsert": on_insert}, upsert=True))
+        return operations
+
+    def record(self, log_entries):
+        """Adds a batch of message log entries to the counters with one bulk write."""
+        increments = {}
+        for entry in log_entries:
+            timestamp = entry['timestamp']
+            for scope in self._scopes(entry.get('group_id')):
+                for granularity in ('minute', 'hour', 'day', 'total'):
+                    bucket = None if granularity == 'total' else _floor(timestamp, granularity)
+                    key = (scope, granularity, bucket, entry['status'])
+                    increments[key] = increments.get(key, 0) + 1
+        operations = self._bucket_updates(increments)
+        if operations:
+            self.counters_collection.bulk_write(operations, ordered=False)
+
+    @staticmethod
+    def _covering_ranges(start, end):
+        """
+        Splits [start, end) into (granularity, lo, hi) bucket ranges: whole days
+        in the middle, whole hours around them and minutes at the edges.
+        """
+        def hours_and_minutes(lo, hi):
+            first_hour, last_hour = _ceil(lo, 'hour'), _floor(hi, 'hour')
+            if first_hour < last_hour:
+                return [('minute', lo, first_hour), ('hour', first_hour, last_hour), ('minute', last_hour, hi)]
+            return [('minute', lo, hi)]
+
+        first_day, last_day = _ceil(start, 'day'), _floor(end, 'day')
+        if first_day < last_day:
+            ranges = hours_and_minutes(start, first_day) + [('day', first_day, last_day)] + hours_and_minutes(last_day, end)
+        else:
+            ranges = hours_and_minutes(start, end)
+        return [(granularity, lo, hi) for granularity, lo, hi in ranges if lo < hi]
+
+    def count(self, status='sent', start_time=None, end_time=None, group_id=None):
+        """
+        Number of messages with `status` logged between start_time and end_time
+        (default: all time up to now), globally or for one group.
+        """
+        scope = self._scopes(group_id)[-1]
+        if (start_time is None or start_time <= EPOCH) and end_time is None:
+            doc = self.counters_collection.find_one({"_id": f"{scope}|total"}, {f"counts.{status}": 1})
+            return (doc or {}).get('counts', {}).get(status, 0)
+
+        now = datetime.utcnow()
+        start = max(start_time or EPOCH, EPOCH)
+        end = min(end_time or now, now)
+        if start >= end:
+            return 0
+        start = _floor(start, 'minute')
+        if start < now - MINUTE_BUCKET_RETENTION:
+            start = _floor(start, 'hour')
+        end = _floor(end, 'minute') + timedelta(minutes=1)
+
+        query = {"$or": [
+            {"scope": scope, "granularity": granularity, "bucket": {"$gte": lo, "$lt": hi}}
+            for granularity, lo, hi in self._covering_ranges(start, end)
+        ]}
+        return sum(
+            doc.get('counts', {}).get(status, 0)
+            for doc in self.counters_collection.find(query, {f"counts.{status}": 1})
+        )
+
+    def backfill_from_logs(self):
+        """
+        One-off import of the message_logs written before the counters existed.
+        Guarded by a marker document so only one process ever runs it.
+        """
+        try:
+            self.counters_collection.insert_one({"_id": "backfilled", "at": datetime.utcnow()})
+        except DuplicateKeyError:
+            return 0
+
+        cutoff = self.counters_collection.find_one({"_id": "counting_since"})['at']
+        minute_cutoff = datetime.utcnow() - MINUTE_BUCKET_RETENTION
+        pipeline = [
+            {"$match": {"timestamp": {"$lt": cutoff}}},
+            {"$group": {
+                "_id": {
+                    "group_id": "$group_id",
+                    "status": "$status",
+                    "minute": {"$dateTrunc": {"date": "$timestamp", "unit": "minute"}}
+                },
+                "count": {"$sum": 1}
+            }}
+        ]
+
+        increments = {}
+        backfilled = 0
+        for row in self.db['message_logs'].aggregate(pipeline, allowDiskUse=True):
+            minute, status = row['_id']['minute'], row['_id']['status']
+            backfilled += row['count']
+            for scope in self._scopes(row['_id'].get('group_id')):
+                for granularity in ('minute', 'hour', 'day', 'total'):
+                    if granularity == 'minute' and minute < minute_cutoff:
+                        continue
+                    bucket = None if granularity == 'total' else _floor(minute, granularity)
+                    key = (scope, granularity, bucket, status)
+                    increments[key] = increments.get(key, 0) + row['count']
+
+        operations = self._bucket_updates(increments)
+        for start in range(0, len(operations), 1000):
+            self.counters_collection.bulk_write(operations[start:start + 1000], ordered=False)
+        logging.info(f"Backfilled SMS usage counters from {backfilled} message log(s).")
+        return backfilled
@@ -0,0 +1,74 @@
+# app/services/transition_recorder.py
+import atexit
+import logging
+import threading
+
+class TransitionRecorder:
+    """
+    Buffers invitee status transitions and writes them to the group daily
+    stats and the RSVP response ledger from a background thread, so a
+    guest's response only waits for its own invitee and event writes.
+
+    A transition is (previous, fields, when): the invitee as it was before
+    the write, the fields written to it (None for a deletion) and when it
+    happened. The rollups and the ledger lag the invitees by at most
+    `flush_interval_seconds`; the nightly stats rebuild repairs any batch
+    that failed to write.
+    """
+    def __init__(self, group_stats_service, rsvp_response_service, engagement_service=None, flush_size=100, flush_interval_seconds=1.0):
+        self.group_stats_service = group_stats_service
+        self.rsvp_response_service = rsvp_response_service
+        self.engagement_service = engagement_service
+        self.flush_size = flush_size
+        self.flush_interval_seconds = flush_interval_seconds
+        self._buffer = []
+        self._buffer_lock = threading.Lock()
+        self._flush_lock = threading.Lock()
+        self._flush_requested = threading.Event()
+        self._writer = threading.Thread(target=self._writer_loop, name='transition-writer', daemon=True)
+        self._writer.start()
+        atexit.register(self.flush)
+
+    def record(self, transitions, now):
+        """Queues (previous, fields) pairs that happened at `now`."""
+        with self._buffer_lock:
+            self._buffer.extend((previous, fields, now) for previous, fields in transitions)
+            if len(self._buffer) >= self.flush_size:
+                self._flush_requested.set()
+
+    def _writer_loop(self):
+        while True:
+            self._flush_requested.wait(self.flush_interval_seconds)
+            self._flush_requested.clear()
+            try:
+                self.flush()
+            except Exception as e:
+                logging.error(f"Transition writer failed to flush: {e}")
+
+    def flush(self):
+        """Writes every buffered transition now. Safe to call from any thread."""
+        with self._flush_lock:
+            with self._buffer_lock:
+                transitions, self._buffer = self._buffer, []
+            if not transitions:
+                return 0
+
+            try:
+                self.group_stats_service.record_transitions(
+                    [(previous.get('group_id'), previous, fields, now) for previous, fields, now in transitions]
+                )
+            except Exception as e:
+                logging.error(f"Failed to update group daily stats for {len(transitions)} transition(s): {e}")
+            try:
+                self.rsvp_response_service.record_transitions(transitions)
+            except Exception as e:
+                logging.error(f"Failed to append {len(transitions)} transition(s) to the RSVP response ledger: {e}")
+
+            # The ledger does not record deletions, so they invalidate the group owners' engagement reports
+            deleted_groups = [previous.get('group_id') for previous, fields, _ in transitions if fields is None]
+            if deleted_groups and self.engagement_service:
+                try:
+                    self.engagement_service.invalidate_groups(deleted_groups)
+                except Exception as e:
+                    logging.error(f"Failed to invalidate engagement reports for {len(deleted_groups)} deletion(s): {e}")
+            return len(transitions)
@@ -0,0 +1,86 @@
+# app/services/user_context_cache.py
+import threading
+import time
+from collections import OrderedDict
+from bson import ObjectId
+from pymongo.database import Database
+from ..models.user import User
+
+MAX_CACHED_USERS = 1000
+GROUP_PROJECTION = {"name": 1, "owner_id": 1, "created_at": 1}
+
+class UserContextCache:
+    """
+    Per-process cache of what `load_user` and `load_user_context` read on
+    every authenticated request: the user and the groups they own (which
+    include their active group).
+
+    Entries are stamped with the user's `context_version`, which GroupService
+    and UserService bump whenever one of the user's groups is created,
+    renamed or deleted or their active group changes. Within `ttl_seconds`
+    of its last check an entry is served without touching Mongo; after that
+    one `users.find_one` refreshes the user and revalidates the groups, which
+    are only re-read when the version has moved. The process that made a
+    change drops its entry straight away; other processes catch up within
+    the TTL.
+    """
+    def __init__(self, db: Database, ttl_seconds=5):
+        self.users_collection = db['users']
+        self.groups_collection = db['groups']
+        self.ttl_seconds = ttl_seconds
+        self._entries = OrderedDict()
+        self._lock = threading.Lock()
+
+    def _entry(self, user_id):
+        with self._lock:
+            entry = self._entries.get(user_id)
+            if entry is not None:
+                self._entries.move_to_end(user_id)
+            return entry
+
+    def _store(self, user_id, entry):
+        with self._lock:
+            self._entries[user_id] = entry
+            self._entries.move_to_end(user_id)
+            while len(self._entries) > MAX_CACHED_USERS:
+                self._entries.popitem(last=False)
+
+    def forget(self, user_id):
+        """Drops a user's entry; called by the services that bump the context version."""
+        with self._lock:
+            self._entries.pop(str(user_id), None)
+
+    def get_user(self, user_id):
+        """The User for `user_id`, re-read from Mongo at most once per TTL."""
+        user_id = str(user_id)
+        entry = self._entry(user_id)
+        if entry is not None and time.monotonic() - entry['checked_at'] < self.ttl_seconds:
+            return entry['user']
+
+        user_data = self.users_collection.find_one({'_id': ObjectId(user_id)})
+        if not user_data:
+            self.forget(user_id)
+            return None
+        user = User.from_dict(user_data)
+        version = user_data.get('context_version', 0)
+        self._store(user_id, {
+            'user': user,
+            'version': version,
+            # Groups read under the same version are still current
+            'groups': entry['groups'] if entry is not None and entry['version'] == version else None,
+            'checked_at': time.monotonic()
+        })
+        return user
+
+    def _read_groups(self, user_id):
+        return list(self.groups_collection.find({'owner_id': ObjectId(user_id)}, GROUP_PROJECTION).sort('_id', 1))
+
+    def get_groups(self, user_id):
+        """The user's groups (_id, name, owner_id, created_at), read once per context version."""
+        user_id = str(user_id)
+        entry = self._entry(user_id)
+        if entry is None:
+            return self._read_groups(user_id)
+        if entry['groups'] is None:
+            entry['groups'] = self._read_groups(user_id)
+        return entry['groups']
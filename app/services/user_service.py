@@ -1,19 +1,37 @@
 # app/services/user_service.py
 from bson import ObjectId
-import bcrypt
 from ..models.user import User
 from .group_service import GroupService
+from .password_hasher import PasswordHasher
+from .pagination import after_cursor, split_page
+import re
 import secrets
 
 class UserService:
-    def __init__(self, db):
+    def __init__(self, db, context_cache=None, password_hasher=None):
         self.db = db
         self.users_collection = db['users']
         self.groups_collection = db['groups']
-        self.group_service = GroupService(db)
+        self.context_cache = context_cache
+        self.password_hasher = password_hasher or PasswordHasher()
+        self.group_service = GroupService(db, context_cache=context_cache)
         self.users_collection.create_index('email', unique=True)
         self.users_collection.create_index('username', unique=True)
         self.users_collection.create_index('contact_collection_token', unique=True, sparse=True)
+        self.users_collection.create_index([('created_at', -1), ('_id', -1)])
+        self.users_collection.create_index('username_lower')
+        self.users_collection.create_index('email_lower')
+
+    @staticmethod
+    def search_pattern(search):
+        """Anchored prefix regex on a lowercased field, which an index range scan can serve."""
+        return {'$regex': f'^{re.escape(search.lower())}'}
+
+    @staticmethod
+    def search_filter(search):
+        """Case-insensitive prefix match on username or email, via their lowercased copies."""
+        pattern = UserService.search_pattern(search)
+        return {'$or': [{'username_lower': pattern}, {'email_lower': pattern}]}
 
     def switch_active_group(self, user_id, group_id):
         """Updates the user's active group."""
@@ -27,40 +45,45 @@ class UserService:
 
         result = self.users_collection.update_one(
             {'_id': user_oid},
-            {'$set': {'active_group_id': group_oid}}
+            {'$set': {'active_group_id': group_oid}, '$inc': {'context_version': 1}}
         )
+        if self.context_cache:
+            self.context_cache.forget(user_id)
         return result.modified_count > 0 or True
 
-    def get_all_groups_with_owners(self):
-        """Fetches all groups and enriches them with owner's username."""
+    def get_all_groups_with_owners(self, search=None, before=None, limit=50):
+        """
+        Fetches one page of groups, newest first, enriched with the owner's
+        username. `search` matches the group name or the owner's username or
+        email by prefix. Returns (groups, next_cursor); pass next_cursor back
+        as `before` for the following page.
+        """
+        query = {}
+        if search:
+            # Matching owners come from the users' lowercased-field indexes first, then
+            # groups are matched by owner or by the name_lower index
+            owner_ids = self.users_collection.distinct('_id', self.search_filter(search))
+            query = {'$or': [{'owner_id': {'$in': owner_ids}}, {'name_lower': self.search_pattern(search)}]}
         pipeline = [
-            {
-                '$lookup': {
-                    'from': 'users',
-                    'localField': 'owner_id',
-                    'foreignField': '_id',
-                    'as': 'owner_details'
-                }
-            },
-            {
-                '$unwind': {
-                    'path': '$owner_details',
-                    'preserveNullAndEmptyArrays': True
-                }
-            },
-            {
-                '$project': {
-                    'name': 1,
-                    'created_at': 1,
-                    'owner_id': 1,
-                    'owner_username': '$owner_details.username'
-                }
-            },
-            {
-                '$sort': {'created_at': -1}
-            }
+            {'$match': after_cursor(query, before, 'created_at')},
+            {'$sort': {'created_at': -1, '_id': -1}},
+            {'$limit': limit + 1},
+            # Owners are looked up for this page only
+            {'$lookup': {
+                'from': 'users',
+                'localField': 'owner_id',
+                'foreignField': '_id',
+                'pipeline': [{'$project': {'_id': 0, 'username': 1}}],
+                'as': 'owner_details'
+            }},
+            {'$project': {
+                'name': 1,
+                'created_at': 1,
+                'owner_id': 1,
+                'owner_username': {'$first': '$owner_details.username'}
+            }}
         ]
-        return list(self.groups_collection.aggregate(pipeline))
+        return split_page(list(self.groups_collection.aggregate(pipeline)), limit, 'created_at')
 
     def is_first_run(self):
         return self.users_collection.count_documents({}) == 0
@@ -69,7 +92,7 @@ class UserService:
         if self.users_collection.find_one({'$or': [{'email': email}, {'username': username}]}):
             raise ValueError('Username or email already exists')
         
-        password_hash = bcrypt.hashpw(password.encode('utf-8'), bcrypt.gensalt())
+        password_hash = self.password_hasher.hash(password)
         
         temp_user_id = ObjectId()
         default_group_name = f"{name}'s Personal Group"
@@ -87,7 +110,8 @@ class UserService:
             contact_collection_token=secrets.token_urlsafe(24)
         )
         
-        self.users_collection.insert_one(user.to_dict())
+        # The personal group was created before the user existed, so its count is set here
+        self.users_collection.insert_one({**user.to_dict(), 'owned_group_count': 1})
         return user
     
     def create_group_for_user(self, user_id, group_name):
@@ -98,8 +122,10 @@ class UserService:
 
         result = self.users_collection.update_one(
             {'_id': user_oid},
-            {'$set': {'active_group_id': group_id}}
+            {'$set': {'active_group_id': group_id}, '$inc': {'context_version': 1}}
         )
+        if self.context_cache:
+            self.context_cache.forget(user_id)
         return result.modified_count > 0
 
     def get_user(self, user_id):
@@ -115,4 +141,22 @@ class UserService:
         return User.from_dict(user_data) if user_data else None
 
     def verify_password(self, user, password):
-        return bcrypt.checkpw(password.encode('utf-8'), user.password_hash)
\ No newline at end of file
+        """
+        Checks the password. On success, a hash made with a lower cost than the
+        configured one is replaced, so stored hashes are upgraded as users log in.
+        """
+        if not self.password_hasher.verify(password, user.password_hash):
+            return False
+
+        if self.password_hasher.needs_rehash(user.password_hash):
+            try:
+                new_hash = self.password_hasher.hash(password)
+            except TimeoutError:
+                return True # Busy; the upgrade waits for a later login
+            # Only replaces the hash that was verified, never a newer one
+            self.users_collection.update_one(
+                {'_id': user._id, 'password_hash': user.password_hash},
+                {'$set': {'password_hash': new_hash}}
+            )
+            user.password_hash = new_hash
+        return True
\ No newline at end of file
@@ -0,0 +1,88 @@
+# app/sms_worker.py
+import logging
+import os
+import signal
+import socket
+import time
+
+class SMSOutboxWorker:
+    """
+    Drains the `sms_outbox` collection: claims a leased batch, dispatches it
+    through SMSService (guardrails, Twilio, message_logs) and records the
+    outcome. Run any number of these side by side to scale throughput.
+    """
+    def __init__(self, app, outbox_service, sms_service, event_service, batch_size=50, lease_seconds=120, poll_seconds=1):
+        self.app = app
+        self.outbox_service = outbox_service
+        self.sms_service = sms_service
+        self.event_service = event_service
+        self.batch_size = batch_size
+        self.lease_seconds = lease_seconds
+        self.poll_seconds = poll_seconds
+        self.worker_id = f"{socket.gethostname()}:{os.getpid()}"
+        self.is_running = False
+        self.logger = logging.getLogger('sms_worker')
+
+    @classmethod
+    def from_app(cls, app):
+        """Builds a worker around the services create_app() set up."""
+        from app import sms_outbox_service, sms_service, event_service
+        return cls(
+            app, sms_outbox_service, sms_service, event_service,
+            batch_size=app.config['SMS_WORKER_BATCH_SIZE'],
+            lease_seconds=app.config['SMS_WORKER_LEASE_SECONDS'],
+            poll_seconds=app.config['SMS_WORKER_POLL_SECONDS']
+        )
+
+    def run_once(self):
+        """Processes one batch; returns the number of messages claimed."""
+        batch = self.outbox_service.claim_batch(self.worker_id, self.batch_size, self.lease_seconds)
+        if not batch:
+            return 0
+
+        with self.app.app_context():
+            outcomes = []
+            to_dispatch = []
+            for doc in batch:
+                if doc['attempts'] > self.outbox_service.max_attempts:
+                    # Every earlier worker died mid-batch holding this message; stop retrying it
+                    reason = f"Gave up after {doc['attempts'] - 1} interrupted send attempts."
+                    self.sms_service.message_log_service.log_message(
+                        doc['to_number'], doc.get('message_body'), 'failed', error_message=reason,
+                        contact_id=doc.get('contact_id'), event_id=doc.get('event_id'), group_id=doc.get('group_id'),
+                        template_id=doc.get('template_id'), params=doc.get('params'),
+                        recipient_name=doc.get('recipient_name'), event_name=doc.get('event_name')
+                    )
+                    outcomes.append((doc, False, reason))
+                else:
+                    to_dispatch.append(doc)
+
+            results = self.sms_service.dispatch_many(to_dispatch)
+            outcomes.extend((doc, success, error) for doc, (success, error) in zip(to_dispatch, results))
+            self.outbox_service.complete(outcomes)
+
+            for doc, success, error in outcomes:
+                if not success and doc.get('invitee_id'):
+                    self.event_service.mark_invitation_failed(doc['invitee_id'], error)
+
+        failed = sum(1 for _, success, _ in outcomes if not success)
+        self.logger.info(f"Processed {len(batch)} outbox message(s), {failed} failed.")
+        return len(batch)
+
+    def run_forever(self):
+        self.is_running = True
+        signal.signal(signal.SIGTERM, lambda signum, frame: self.stop())
+        self.logger.info(f"SMS worker {self.worker_id} started (batch {self.batch_size}, lease {self.lease_seconds}s).")
+        while self.is_running:
+            try:
+                claimed = self.run_once()
+            except Exception as e:
+                self.logger.error(f"Error processing SMS outbox batch: {e}", exc_info=True)
+                claimed = 0
+            # Keep draining while there is a backlog; only sleep once the outbox is empty
+            if claimed < self.batch_size:
+                time.sleep(self.poll_seconds)
+        self.logger.info(f"SMS worker {self.worker_id} stopped.")
+
+    def stop(self):
+        self.is_running = False
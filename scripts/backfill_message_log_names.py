@@ -0,0 +1,93 @@
+# backfill_message_log_names.py
+import os
+import sys
+from pymongo import MongoClient, UpdateOne
+from dotenv import load_dotenv
+
+DEFAULT_BATCH_SIZE = 1000
+
+def backfill_message_log_names(batch_size=DEFAULT_BATCH_SIZE):
+    """
+    Stores the recipient and event display names on message logs written
+    before log_message recorded them, so the dashboard can list sent messages
+    without joining `contacts` and `events`.
+
+    Names come from the current contact and event, falling back to the names
+    in a templated message's parameters. Rows whose names cannot be found get
+    explicit nulls so they are not revisited. The script is batched and safe
+    to re-run.
+    """
+    print("Starting message log name backfill...")
+
+    # --- 1. Connect to the database ---
+    load_dotenv()
+    mongo_uri = os.getenv('MONGO_URI')
+    if not mongo_uri:
+        print("ERROR: MONGO_URI not found in .env file. Aborting.")
+        return
+
+    try:
+        client = MongoClient(mongo_uri)
+        db_name = mongo_uri.split('/')[-1].split('?')[0]
+        db = client[db_name]
+        print(f"Successfully connected to database: '{db_name}'")
+    except Exception as e:
+        print(f"ERROR: Could not connect to MongoDB. {e}")
+        return
+
+    logs_collection = db['message_logs']
+
+    # --- 2. Fill in names in batches ---
+    pending_query = {"recipient_name": {"$exists": False}}
+    remaining = logs_collection.count_documents(pending_query)
+    if remaining == 0:
+        print("\nEvery message log already stores its names. Your system is already up to date!")
+        client.close()
+        return
+
+    print(f"\nFound {remaining} log(s) without names (batch size: {batch_size}).")
+
+    scanned = 0
+    named = 0
+    last_id = None
+
+    while True:
+        batch_query = dict(pending_query)
+        if last_id is not None:
+            batch_query["_id"] = {"$gt": last_id}
+        batch = list(
+            logs_collection.find(batch_query, {"contact_id": 1, "event_id": 1, "params": 1})
+            .sort("_id", 1).limit(batch_size)
+        )
+        if not batch:
+            break
+        last_id = batch[-1]['_id']
+
+        contact_ids = list({log['contact_id'] for log in batch if log.get('contact_id')})
+        event_ids = list({log['event_id'] for log in batch if log.get('event_id')})
+        contact_names = {c['_id']: c.get('name') for c in db['contacts'].find({"_id": {"$in": contact_ids}}, {"name": 1})}
+        event_names = {e['_id']: e.get('name') for e in db['events'].find({"_id": {"$in": event_ids}}, {"name": 1})}
+
+        operations = []
+        for log in batch:
+            params = log.get('params') or {}
+            recipient_name = contact_names.get(log.get('contact_id')) or params.get('name')
+            event_name = event_names.get(log.get('event_id')) or params.get('event_name')
+            if recipient_name or event_name:
+                named += 1
+            operations.append(UpdateOne(
+                {'_id': log['_id']},
+                {'$set': {'recipient_name': recipient_name, 'event_name': event_name}}
+            ))
+
+        logs_collection.bulk_write(operations, ordered=False)
+        scanned += len(batch)
+        print(f"  - Processed {scanned}/{remaining} logs ({named} with a name so far)")
+
+    print(f"\nBackfilled names on {scanned} log(s); {scanned - named} had no contact or event to name.")
+    print("\nBackfill complete!")
+    client.close()
+
+if __name__ == "__main__":
+    batch_size = int(sys.argv[1]) if len(sys.argv) > 1 else DEFAULT_BATCH_SIZE
+    backfill_message_log_names(batch_size)
@@ -0,0 +1,123 @@
+# benchmark_engagement.py
+import os
+import random
+import sys
+import time
+from datetime import datetime, timedelta
+from pymongo import MongoClient
+from dotenv import load_dotenv
+from bson import ObjectId
+
+sys.path.insert(0, os.path.abspath(os.path.join(os.path.dirname(__file__), '..')))
+from app.services.engagement_service import EngagementService
+
+BENCHMARK_DB_NAME = 'engagement_benchmark'
+INSERT_CHUNK_SIZE = 10000
+SAMPLED_CONTACTS = 200
+STATUS_WEIGHTS = {'pending': 5, 'invited': 10, 'YES': 40, 'NO': 25, 'EXPIRED': 15, 'ERROR': 5}
+
+def _seed(db, owner_id, group_id, contact_count, invitee_count):
+    """
+    Inserts `contact_count` contacts for one owner and `invitee_count` invitee
+    rows spread across them, all in the owner's one group.
+    """
+    db.groups.insert_one({'_id': group_id, 'name': 'Benchmark Group', 'owner_id': owner_id})
+    contact_ids = [ObjectId() for _ in range(contact_count)]
+    for start in range(0, contact_count, INSERT_CHUNK_SIZE):
+        db.contacts.insert_many([
+            {'_id': contact_id, 'owner_id': owner_id, 'name': f'Guest {start + i}', 'phone': f'+1555{start + i:07d}'}
+            for i, contact_id in enumerate(contact_ids[start:start + INSERT_CHUNK_SIZE])
+        ])
+
+    rng = random.Random(42)
+    statuses, weights = list(STATUS_WEIGHTS), list(STATUS_WEIGHTS.values())
+    event_ids = [ObjectId() for _ in range(max(1, invitee_count // 500))]
+    now = datetime.utcnow()
+    for start in range(0, invitee_count, INSERT_CHUNK_SIZE):
+        rows = []
+        for _ in range(min(INSERT_CHUNK_SIZE, invitee_count - start)):
+            status = rng.choices(statuses, weights)[0]
+            invited_at = now - timedelta(minutes=rng.randint(0, 365 * 24 * 60)) if status != 'pending' else None
+            rows.append({
+                'group_id': group_id, 'event_id': rng.choice(event_ids), 'contact_id': str(rng.choice(contact_ids)), 'status': status,
+                'invited_at': invited_at,
+                'responded_at': invited_at + timedelta(hours=rng.randint(1, 48)) if status in ('YES', 'NO') else None
+            })
+        db.invitees.insert_many(rows, ordered=False)
+        print(f"  - Seeded {start + len(rows)}/{invitee_count} invitee rows", end='\r')
+    print()
+    return contact_ids
+
+def _per_contact_aggregation(db, contact_id):
+    """The straightforward alternative: one $group aggregation per contact."""
+    return list(db.invitees.aggregate([
+        {'$match': {'contact_id': str(contact_id)}},
+        {'$group': {'_id': '$status', 'count': {'$sum': 1}, 'last_response': {'$max': '$responded_at'}}}
+    ]))
+
+def run_benchmark(contact_count=50000, invitee_count=1000000):
+    """
+    Times the engagement report for one owner with `contact_count` contacts
+    and `invitee_count` invitee rows: per-contact aggregations (sampled and
+    extrapolated) versus the columnar NumPy build, a cached read and a rebuild
+    after a new response. Runs against a throwaway database on the MONGO_URI
+    server, dropped afterwards.
+    """
+    print(f"Benchmarking the engagement report for {contact_count} contacts and {invitee_count} invitee rows...")
+
+    load_dotenv()
+    mongo_uri = os.getenv('MONGO_URI')
+    if not mongo_uri:
+        print("ERROR: MONGO_URI not found in .env file. Aborting.")
+        return
+
+    client = MongoClient(mongo_uri)
+    client.drop_database(BENCHMARK_DB_NAME)
+    db = client[BENCHMARK_DB_NAME]
+
+    try:
+        service = EngagementService(db)
+        owner_id, group_id = ObjectId(), ObjectId()
+        contact_ids = _seed(db, owner_id, group_id, contact_count, invitee_count)
+
+        sample = random.Random(7).sample(contact_ids, min(SAMPLED_CONTACTS, len(contact_ids)))
+        start = time.perf_counter()
+        for contact_id in sample:
+            _per_contact_aggregation(db, contact_id)
+        per_contact_seconds = (time.perf_counter() - start) / len(sample) * contact_count
+
+        start = time.perf_counter()
+        report = service.get_report(owner_id)
+        cold_seconds = time.perf_counter() - start
+
+        start = time.perf_counter()
+        service.get_report(owner_id)
+        warm_seconds = time.perf_counter() - start
+
+        start = time.perf_counter()
+        report.rows(sort_by='confirmation_rate', descending=True, limit=100)
+        sort_seconds = time.perf_counter() - start
+
+        # A response only appends to the ledger; the next read sees the newer entry
+        db.rsvp_responses.insert_one({
+            'group_id': group_id, 'contact_id': str(contact_ids[0]), 'old_status': 'invited',
+            'new_status': 'YES', 'timestamp': datetime.utcnow()
+        })
+        start = time.perf_counter()
+        rebuilt = service.get_report(owner_id)
+        rebuild_seconds = time.perf_counter() - start
+
+        print(f"\nPer-contact aggregations: {per_contact_seconds:.1f} s (extrapolated from {len(sample)} contacts)")
+        print(f"Columnar build (cold):    {cold_seconds:.2f} s")
+        print(f"Cached report:            {warm_seconds * 1000:.2f} ms")
+        print(f"Sort + top 100 rows:      {sort_seconds * 1000:.2f} ms")
+        print(f"Rebuild after a response: {rebuild_seconds:.2f} s (version {report.version} -> {rebuilt.version})")
+        print(f"Contacts reported: {len(rebuilt)}, invitations counted: {int(rebuilt.invitations.sum())}")
+    finally:
+        client.drop_database(BENCHMARK_DB_NAME)
+        client.close()
+
+if __name__ == "__main__":
+    contacts = int(sys.argv[1]) if len(sys.argv) > 1 else 50000
+    invitees = int(sys.argv[2]) if len(sys.argv) > 2 else 1000000
+    run_benchmark(contacts, invitees)
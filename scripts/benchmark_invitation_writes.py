@@ -0,0 +1,79 @@
+# benchmark_invitation_writes.py
+import os
+import sys
+import time
+from pymongo import MongoClient
+from dotenv import load_dotenv
+from bson import ObjectId
+
+sys.path.insert(0, os.path.abspath(os.path.join(os.path.dirname(__file__), '..')))
+from app.services.event_service import EventService
+
+BENCHMARK_DB_NAME = 'invitation_write_benchmark'
+
+class InstantSMSService:
+    """Accepts every invitation immediately so only database time is measured."""
+    def send_invitations(self, invitees, event):
+        return [(True, None)] * len(invitees)
+
+def _prepare_event(event_service, wave_size):
+    group_id = ObjectId()
+    event_id = event_service.create_event(
+        {'name': 'Benchmark', 'date': '2099-01-01', 'capacity': wave_size}, group_id
+    )
+    contacts = [{'_id': ObjectId(), 'name': f'Guest {i}', 'phone': f'+1555{i:07d}'} for i in range(wave_size)]
+    event_service.add_invitees(group_id, event_id, contacts)
+    event = event_service.get_event(group_id, event_id)
+    return event, event_service.get_invitees(event_id)
+
+def _per_row_writes(event_service, event, invitees):
+    """The previous behaviour: one positional update round trip per invitee."""
+    now = event_service.get_current_time()
+    for invitee in invitees:
+        event_service._set_invitee_fields(event._id, invitee['_id'], {
+            "rsvp_token": event_service.generate_rsvp_token(event._id, invitee['_id']),
+            "status": "invited", "invited_at": now, "error_message": None
+        })
+
+def run_benchmark(wave_size=200):
+    """
+    Times the database side of an invitation wave, per-row writes versus the
+    buffered bulk writes in EventService._send_invitations. Runs against a
+    throwaway database on the MONGO_URI server, dropped afterwards.
+    """
+    print(f"Benchmarking invitation state writes for a wave of {wave_size} invitees...")
+
+    load_dotenv()
+    mongo_uri = os.getenv('MONGO_URI')
+    if not mongo_uri:
+        print("ERROR: MONGO_URI not found in .env file. Aborting.")
+        return
+
+    client = MongoClient(mongo_uri)
+    client.drop_database(BENCHMARK_DB_NAME)
+    db = client[BENCHMARK_DB_NAME]
+
+    try:
+        event_service = EventService(db)
+        sms_service = InstantSMSService()
+
+        event, invitees = _prepare_event(event_service, wave_size)
+        start = time.perf_counter()
+        _per_row_writes(event_service, event, invitees)
+        per_row_seconds = time.perf_counter() - start
+
+        event, invitees = _prepare_event(event_service, wave_size)
+        start = time.perf_counter()
+        event_service._send_invitations(event, invitees, sms_service)
+        bulk_seconds = time.perf_counter() - start
+
+        print(f"\nPer-row writes: {per_row_seconds * 1000:.1f} ms")
+        print(f"Bulk writes:    {bulk_seconds * 1000:.1f} ms")
+        if bulk_seconds > 0:
+            print(f"Speed-up:       {per_row_seconds / bulk_seconds:.1f}x")
+    finally:
+        client.drop_database(BENCHMARK_DB_NAME)
+        client.close()
+
+if __name__ == "__main__":
+    run_benchmark(int(sys.argv[1]) if len(sys.argv) > 1 else 200)
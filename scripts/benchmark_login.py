@@ -0,0 +1,92 @@
+# benchmark_login.py
+import os
+import statistics
+import sys
+import time
+from collections import Counter
+from concurrent.futures import ThreadPoolExecutor
+from pymongo import MongoClient
+from dotenv import load_dotenv
+
+sys.path.insert(0, os.path.abspath(os.path.join(os.path.dirname(__file__), '..')))
+import app as app_package
+from app import create_app
+from app.config import Config
+from app.services.password_hasher import PasswordHasher
+
+BENCHMARK_DB_NAME = 'login_benchmark'
+EMAIL = 'bench@example.com'
+PASSWORD = 'benchmark-password'
+RESULT_LABELS = {302: 'logged in', 200: 'rejected', 503: 'busy'}
+
+def _benchmark_uri(mongo_uri):
+    """MONGO_URI with its database swapped for the throwaway one, keeping any options."""
+    base, _, tail = mongo_uri.rpartition('/')
+    options = '?' + tail.split('?', 1)[1] if '?' in tail else ''
+    return f"{base}/{BENCHMARK_DB_NAME}{options}"
+
+def _login(flask_app):
+    """One POST /login from a fresh client; returns (status code, seconds)."""
+    client = flask_app.test_client()
+    start = time.perf_counter()
+    response = client.post('/login', data={'email': EMAIL, 'password': PASSWORD})
+    return response.status_code, time.perf_counter() - start
+
+def _run(flask_app, logins, concurrency):
+    start = time.perf_counter()
+    with ThreadPoolExecutor(max_workers=concurrency) as pool:
+        results = list(pool.map(lambda _: _login(flask_app), range(logins)))
+    elapsed = time.perf_counter() - start
+
+    statuses = Counter(RESULT_LABELS.get(status, str(status)) for status, _ in results)
+    latencies = sorted(seconds for status, seconds in results if status == 302) or [0.0]
+    p95 = latencies[min(len(latencies) - 1, int(len(latencies) * 0.95))]
+    print(f"  {statuses['logged in'] / elapsed:6.1f} logins/s over {elapsed:.2f} s, "
+          f"p50 {statistics.median(latencies) * 1000:.0f} ms, p95 {p95 * 1000:.0f} ms, {dict(statuses)}")
+
+def run_benchmark(logins=200, concurrency=50, workers=2, queue_limit=16, rounds=12):
+    """
+    Fires `logins` concurrent POST /login requests (`concurrency` at a time)
+    at an in-process app, hashing inline on the request threads and then on
+    a PasswordHasher pool of `workers` processes with `queue_limit` queued
+    calls. Reports throughput, latency and how many logins were turned away
+    as busy. Runs against a throwaway database on the MONGO_URI server,
+    dropped afterwards.
+    """
+    print(f"Benchmarking {logins} logins at concurrency {concurrency} (bcrypt cost {rounds})...")
+
+    load_dotenv()
+    mongo_uri = os.getenv('MONGO_URI')
+    if not mongo_uri:
+        print("ERROR: MONGO_URI not found in .env file. Aborting.")
+        return
+
+    class BenchmarkConfig(Config):
+        MONGO_URI = _benchmark_uri(mongo_uri)
+        SCHEDULER_ENABLED = False
+        SMS_ENABLED = False
+        BCRYPT_ROUNDS = rounds
+        BCRYPT_POOL_WORKERS = 0
+
+    client = MongoClient(mongo_uri)
+    client.drop_database(BENCHMARK_DB_NAME)
+
+    try:
+        flask_app = create_app(BenchmarkConfig)
+        user_service = app_package.user_service
+        user_service.create_user('bench', EMAIL, PASSWORD, 'Bench User')
+
+        print("\nInline bcrypt (on the request threads):")
+        user_service.password_hasher = PasswordHasher(rounds=rounds)
+        _run(flask_app, logins, concurrency)
+
+        print(f"\nProcess pool ({workers} workers, queue limit {queue_limit}):")
+        user_service.password_hasher = PasswordHasher(rounds=rounds, workers=workers, queue_limit=queue_limit)
+        _run(flask_app, logins, concurrency)
+    finally:
+        client.drop_database(BENCHMARK_DB_NAME)
+        client.close()
+
+if __name__ == "__main__":
+    args = sys.argv[1:6]
+    run_benchmark(*(int(arg) for arg in args))
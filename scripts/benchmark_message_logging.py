@@ -0,0 +1,73 @@
+# benchmark_message_logging.py
+import os
+import sys
+import time
+from datetime import datetime
+from pymongo import MongoClient
+from dotenv import load_dotenv
+from bson import ObjectId
+
+sys.path.insert(0, os.path.abspath(os.path.join(os.path.dirname(__file__), '..')))
+from app.services.message_log_service import MessageLogService
+
+BENCHMARK_DB_NAME = 'message_logging_benchmark'
+
+def _wave(wave_size, group_id):
+    return [
+        {'to_number': f'+1555{i:07d}', 'message_body': f"Hi Guest {i}, you're invited!", 'status': 'sent',
+         'message_sid': f'SM{i:032d}', 'contact_id': ObjectId(), 'event_id': ObjectId(), 'group_id': group_id}
+        for i in range(wave_size)
+    ]
+
+def _per_row_logging(service, wave):
+    """The previous behaviour: one insert_one plus one counter write per attempt, on the send path."""
+    for message in wave:
+        entry = dict(message, error_message=None, timestamp=datetime.utcnow())
+        service.logs_collection.insert_one(entry)
+        service.usage_service.record([entry])
+
+def run_benchmark(wave_size=1000):
+    """
+    Times how long a wave of `wave_size` log_message calls holds up the send
+    path, per-row inserts versus the buffered writer, and how long the buffered
+    writer takes to land everything. Runs against a throwaway database on the
+    MONGO_URI server, dropped afterwards.
+    """
+    print(f"Benchmarking message logging for a wave of {wave_size} messages...")
+
+    load_dotenv()
+    mongo_uri = os.getenv('MONGO_URI')
+    if not mongo_uri:
+        print("ERROR: MONGO_URI not found in .env file. Aborting.")
+        return
+
+    client = MongoClient(mongo_uri)
+    client.drop_database(BENCHMARK_DB_NAME)
+    db = client[BENCHMARK_DB_NAME]
+
+    try:
+        service = MessageLogService(db)
+        group_id = ObjectId()
+
+        start = time.perf_counter()
+        _per_row_logging(service, _wave(wave_size, group_id))
+        per_row_seconds = time.perf_counter() - start
+
+        start = time.perf_counter()
+        for message in _wave(wave_size, group_id):
+            service.log_message(**message)
+        send_path_seconds = time.perf_counter() - start
+        service.flush()
+        buffered_seconds = time.perf_counter() - start
+
+        logged = db.message_logs.count_documents({})
+        print(f"\nPer-row inserts:          {per_row_seconds * 1000:.1f} ms ({wave_size / per_row_seconds:.0f} msg/s)")
+        print(f"Buffered, send path only: {send_path_seconds * 1000:.1f} ms ({wave_size / send_path_seconds:.0f} msg/s)")
+        print(f"Buffered, until flushed:  {buffered_seconds * 1000:.1f} ms ({wave_size / buffered_seconds:.0f} msg/s)")
+        print(f"Rows written: {logged} (expected {2 * wave_size})")
+    finally:
+        client.drop_database(BENCHMARK_DB_NAME)
+        client.close()
+
+if __name__ == "__main__":
+    run_benchmark(int(sys.argv[1]) if len(sys.argv) > 1 else 1000)
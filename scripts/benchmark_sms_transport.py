@@ -0,0 +1,50 @@
+# benchmark_sms_transport.py
+import os
+import sys
+import time
+
+sys.path.insert(0, os.path.abspath(os.path.join(os.path.dirname(__file__), '..')))
+from app.services.sms_transport import AsyncSMSTransport
+from fake_twilio_server import start_fake_twilio
+
+def run_benchmark(messages=100, latency=0.2, concurrency=10):
+    """
+    Sends a wave of messages through AsyncSMSTransport against the local fake
+    Twilio server, one at a time versus a single concurrent send_many batch.
+    No real SMS is sent and no database is needed.
+    """
+    print(f"Benchmarking {messages} messages at {latency}s simulated Twilio latency (concurrency {concurrency})...")
+
+    server = start_fake_twilio(latency_seconds=latency)
+    transport = AsyncSMSTransport(
+        'ACfake', 'token', '+15550000000',
+        api_base_url=f"http://127.0.0.1:{server.server_port}", concurrency=concurrency
+    )
+    batch = [(f'+1555{i:07d}', f'Benchmark message {i}') for i in range(messages)]
+
+    try:
+        start = time.perf_counter()
+        for message in batch:
+            transport.send_many([message])
+        sequential_seconds = time.perf_counter() - start
+
+        start = time.perf_counter()
+        results = transport.send_many(batch)
+        concurrent_seconds = time.perf_counter() - start
+
+        failures = [error for _, error, _ in results if error]
+        print(f"\nOne at a time: {sequential_seconds:.2f} s")
+        print(f"send_many:     {concurrent_seconds:.2f} s ({len(failures)} failures)")
+        if concurrent_seconds > 0:
+            print(f"Speed-up:      {sequential_seconds / concurrent_seconds:.1f}x")
+    finally:
+        transport.close()
+        server.shutdown()
+
+if __name__ == "__main__":
+    args = sys.argv[1:4]
+    run_benchmark(
+        int(args[0]) if len(args) > 0 else 100,
+        float(args[1]) if len(args) > 1 else 0.2,
+        int(args[2]) if len(args) > 2 else 10
+    )
@@ -0,0 +1,46 @@
+# calibrate_bcrypt.py
+import argparse
+import os
+import re
+import sys
+from dotenv import load_dotenv
+
+sys.path.insert(0, os.path.abspath(os.path.join(os.path.dirname(__file__), '..')))
+from app.services.password_hasher import calibrate_rounds
+
+ENV_PATH = os.path.abspath(os.path.join(os.path.dirname(__file__), '..', '.env'))
+
+def _write_rounds(rounds):
+    """Sets BCRYPT_ROUNDS in .env, replacing an existing line or appending one."""
+    lines = []
+    if os.path.exists(ENV_PATH):
+        with open(ENV_PATH) as env_file:
+            lines = env_file.read().splitlines()
+    setting = f"BCRYPT_ROUNDS={rounds}"
+    if any(re.match(r'\s*BCRYPT_ROUNDS\s*=', line) for line in lines):
+        lines = [setting if re.match(r'\s*BCRYPT_ROUNDS\s*=', line) else line for line in lines]
+    else:
+        lines.append(setting)
+    with open(ENV_PATH, 'w') as env_file:
+        env_file.write('\n'.join(lines) + '\n')
+
+def main():
+    """
+    Picks the bcrypt cost for this machine once, so the app does not time
+    hashes every time a process starts. Run it on the production host.
+    """
+    load_dotenv()
+    parser = argparse.ArgumentParser(description="Calibrate the bcrypt cost factor (BCRYPT_ROUNDS).")
+    parser.add_argument('--target-ms', type=float, default=float(os.getenv('BCRYPT_TARGET_MS', '250')),
+                        help="Longest a password hash may take on this machine")
+    parser.add_argument('--write', action='store_true', help="Save the result to .env")
+    args = parser.parse_args()
+
+    rounds = calibrate_rounds(args.target_ms)
+    print(f"BCRYPT_ROUNDS={rounds} (hashes within {args.target_ms:.0f} ms on this machine)")
+    if args.write:
+        _write_rounds(rounds)
+        print(f"Saved to {ENV_PATH}. Restart the app to use it.")
+
+if __name__ == '__main__':
+    main()
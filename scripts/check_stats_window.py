@@ -0,0 +1,70 @@
+# check_stats_window.py
+import os
+import sys
+from datetime import datetime, timedelta
+from pymongo import MongoClient
+from dotenv import load_dotenv
+from bson import ObjectId
+
+sys.path.insert(0, os.path.abspath(os.path.join(os.path.dirname(__file__), '..')))
+from app.services.group_stats_service import GroupStatsService, period_start
+
+CHECK_DB_NAME = 'stats_window_check'
+PERIOD_DAYS = 7
+
+def _check(label, actual, expected):
+    ok = actual == expected
+    print(f"  [{'OK' if ok else 'FAIL'}] {label}: {actual} (expected {expected})")
+    return ok
+
+def run_check():
+    """
+    Checks the day boundaries of the dashboard window and the nightly stats
+    rebuild: a period of N days covers today and the N - 1 days before it,
+    and nothing older. Runs against a throwaway database on the MONGO_URI
+    server, dropped afterwards.
+    """
+    print(f"Checking the {PERIOD_DAYS}-day group stats window...")
+
+    load_dotenv()
+    mongo_uri = os.getenv('MONGO_URI')
+    if not mongo_uri:
+        print("ERROR: MONGO_URI not found in .env file. Aborting.")
+        return False
+
+    client = MongoClient(mongo_uri)
+    client.drop_database(CHECK_DB_NAME)
+    db = client[CHECK_DB_NAME]
+
+    try:
+        service = GroupStatsService(db)
+        group_id = ObjectId()
+        now = datetime.utcnow()
+        first_day = period_start(PERIOD_DAYS, now)
+        results = [_check("first day of the period", (now - first_day).days, PERIOD_DAYS - 1)]
+
+        # One confirmation at noon on each of the period's days and on the day just before it
+        for offset in range(PERIOD_DAYS + 1):
+            db.invitees.insert_one({
+                'group_id': group_id, 'event_id': ObjectId(), 'status': 'YES',
+                'responded_at': first_day + timedelta(days=offset - 1, hours=12)
+            })
+        service.rebuild(first_day - timedelta(days=1), first_day + timedelta(days=PERIOD_DAYS))
+        results.append(_check("confirmations in the period", service.get_totals(group_id, first_day)['confirmed'], PERIOD_DAYS))
+
+        # The nightly rebuild must leave the day before the period alone
+        day_before = first_day - timedelta(days=1)
+        db.group_daily_stats.update_one({'group_id': group_id, 'day': day_before}, {'$set': {'confirmed': 99}})
+        service.rebuild_recent(PERIOD_DAYS)
+        untouched = db.group_daily_stats.find_one({'group_id': group_id, 'day': day_before})['confirmed']
+        results.append(_check("day before the rebuilt range", untouched, 99))
+        results.append(_check("confirmations after the rebuild", service.get_totals(group_id, first_day)['confirmed'], PERIOD_DAYS))
+
+        print("\nAll checks passed." if all(results) else "\nSome checks FAILED.")
+        return all(results)
+    finally:
+        client.drop_database(CHECK_DB_NAME)
+        client.close()
+
+if __name__ == "__main__":
+    sys.exit(0 if run_check() else 1)
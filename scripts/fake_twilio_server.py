@@ -0,0 +1,73 @@
+# fake_twilio_server.py
+import itertools
+import json
+import re
+import sys
+import threading
+import time
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+from urllib.parse import parse_qs
+
+MESSAGES_PATH = re.compile(r'^/2010-04-01/Accounts/[^/]+/Messages\.json$')
+
+def make_handler(latency_seconds=0.0, fail_numbers=()):
+    """
+    Builds a request handler that answers Twilio's Messages.json endpoint.
+    Every request waits `latency_seconds` to mimic Twilio's round trip, and
+    numbers in `fail_numbers` get a Twilio-style 400 error.
+    """
+    counter = itertools.count(1)
+    sent = []
+
+    class FakeTwilioHandler(BaseHTTPRequestHandler):
+        protocol_version = 'HTTP/1.1'  # keep-alive, like the real API
+
+        def do_POST(self):
+            length = int(self.headers.get('Content-Length', 0))
+            form = {k: v[0] for k, v in parse_qs(self.rfile.read(length).decode()).items()}
+            if not MESSAGES_PATH.match(self.path):
+                return self._reply(404, {'code': 20404, 'message': 'The requested resource was not found', 'status': 404})
+            if latency_seconds:
+                time.sleep(latency_seconds)
+            if form.get('To') in fail_numbers:
+                return self._reply(400, {'code': 21211, 'message': f"The 'To' number {form.get('To')} is not a valid phone number.", 'status': 400})
+            sid = f"SM{next(counter):032d}"
+            sent.append({'sid': sid, 'to': form.get('To'), 'from': form.get('From'), 'body': form.get('Body')})
+            self._reply(201, {'sid': sid, 'status': 'queued', 'to': form.get('To'), 'body': form.get('Body')})
+
+        def _reply(self, status, payload):
+            body = json.dumps(payload).encode()
+            self.send_response(status)
+            self.send_header('Content-Type', 'application/json')
+            self.send_header('Content-Length', str(len(body)))
+            self.end_headers()
+            self.wfile.write(body)
+
+        def log_message(self, format, *args):
+            pass
+
+    FakeTwilioHandler.sent = sent
+    return FakeTwilioHandler
+
+def start_fake_twilio(port=0, latency_seconds=0.0, fail_numbers=()):
+    """
+    Starts the fake server on a background thread and returns it. Point
+    TWILIO_API_BASE_URL (or AsyncSMSTransport's api_base_url) at
+    f"http://127.0.0.1:{server.server_port}"; accepted messages are recorded
+    on `server.RequestHandlerClass.sent`.
+    """
+    server = ThreadingHTTPServer(('127.0.0.1', port), make_handler(latency_seconds, fail_numbers))
+    server.daemon_threads = True
+    threading.Thread(target=server.serve_forever, daemon=True).start()
+    return server
+
+if __name__ == "__main__":
+    port = int(sys.argv[1]) if len(sys.argv) > 1 else 8099
+    latency = float(sys.argv[2]) if len(sys.argv) > 2 else 0.2
+    server = ThreadingHTTPServer(('127.0.0.1', port), make_handler(latency))
+    print(f"Fake Twilio API listening on http://127.0.0.1:{port} ({latency}s latency per message).")
+    print(f"Set TWILIO_API_BASE_URL=http://127.0.0.1:{port} to send through it. Ctrl+C to stop.")
+    try:
+        server.serve_forever()
+    except KeyboardInterrupt:
+        server.server_close()
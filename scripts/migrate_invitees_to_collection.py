@@ -0,0 +1,155 @@
+# migrate_invitees_to_collection.py
+import os
+import sys
+from pymongo import MongoClient, UpdateOne
+from pymongo.errors import BulkWriteError
+from dotenv import load_dotenv
+
+sys.path.insert(0, os.path.abspath(os.path.join(os.path.dirname(__file__), '..')))
+from app.config import Config
+from app.services.event_service import EventService
+
+DEFAULT_BATCH_SIZE = 50
+
+def _finish_migration(db):
+    """
+    The app may have started before this script ran, rebuilding its counters
+    and stamping expiry over an empty invitees collection. Brings every
+    event's per-status counters (which the capacity checks rely on) and the
+    invitations' expires_at in line with the migrated invitees, and re-runs
+    the one-off ledger and group stats backfills over them.
+    """
+    event_service = EventService(db, invitation_expiry_hours=Config.INVITATION_EXPIRY_HOURS)
+    rebuilt = event_service.rebuild_status_counters()
+    print(f"Rebuilt the status counters of {rebuilt} event(s).")
+    stamped = event_service.stamp_missing_expiry()
+    print(f"Stamped expires_at on {stamped} open invitation(s).")
+
+    # Markers set by an earlier run of the app covered no legacy invitees
+    db['rsvp_responses'].delete_one({"_id": "backfilled"})
+    seeded = event_service.rsvp_response_service.backfill_from_invitees()
+    print(f"Seeded the RSVP response ledger from {seeded} invitee(s).")
+    db['group_daily_stats'].delete_one({"_id": "backfilled"})
+    event_service.group_stats_service.backfill()
+    print("Backfilled group daily stats.")
+
+def migrate_invitees(batch_size=DEFAULT_BATCH_SIZE):
+    """
+    Moves invitees out of the embedded `events.invitees` array and into the
+    indexed `invitees` collection.
+
+    The migration is batched and resumable: each invitee is upserted by its
+    original `_id`, and the embedded array is only removed from an event once
+    all of its invitees have been written. Re-running the script after an
+    interruption simply picks up the events that still carry an array. Once
+    every event is migrated, the event counters are rebuilt and legacy
+    invitations get their expiry.
+    """
+    print("Starting invitee migration...")
+
+    # --- 1. Connect to the database ---
+    load_dotenv()
+    mongo_uri = os.getenv('MONGO_URI')
+    if not mongo_uri:
+        print("ERROR: MONGO_URI not found in .env file. Aborting.")
+        return
+
+    try:
+        client = MongoClient(mongo_uri)
+        db_name = mongo_uri.split('/')[-1].split('?')[0]
+        db = client[db_name]
+        print(f"Successfully connected to database: '{db_name}'")
+    except Exception as e:
+        print(f"ERROR: Could not connect to MongoDB. {e}")
+        return
+
+    events_collection = db['events']
+    invitees_collection = db['invitees']
+
+    # Mirror the indexes EventService creates so the new collection is usable immediately
+    invitees_collection.create_index([("event_id", 1), ("status", 1), ("priority", 1)])
+    invitees_collection.create_index(
+        [("event_id", 1), ("contact_id", 1)], name="event_id_1_contact_id_1", unique=True,
+        partialFilterExpression={"contact_id": {"$type": "string"}}
+    )
+    invitees_collection.create_index([("group_id", 1), ("status", 1), ("responded_at", -1), ("_id", -1)])
+    invitees_collection.create_index([("group_id", 1), ("status", 1), ("expired_at", -1), ("_id", -1)])
+    invitees_collection.create_index("rsvp_token", sparse=True)
+
+    # --- 2. Migrate events in batches ---
+    pending_query = {"invitees": {"$exists": True}}
+    remaining = events_collection.count_documents(pending_query)
+    if remaining == 0:
+        print("\nNo events carry an embedded invitee list. Your system is already up to date!")
+        client.close()
+        return
+
+    print(f"\nFound {remaining} event(s) to migrate (batch size: {batch_size}).")
+
+    migrated_events = 0
+    migrated_invitees = 0
+    skipped_duplicates = 0
+    last_id = None
+
+    while True:
+        batch_query = dict(pending_query)
+        if last_id is not None:
+            batch_query["_id"] = {"$gt": last_id}
+        batch = list(
+            events_collection.find(batch_query, {"group_id": 1, "invitees": 1})
+            .sort("_id", 1)
+            .limit(batch_size)
+        )
+        if not batch:
+            break
+
+        for event in batch:
+            last_id = event['_id']
+            operations = []
+            seen_contacts = set()
+            for invitee in event.get('invitees') or []:
+                doc = dict(invitee)
+                doc['event_id'] = event['_id']
+                doc['group_id'] = event.get('group_id')
+                doc.setdefault('status', 'pending')
+                doc.setdefault('priority', 0)
+                if doc.get('contact_id') is not None:
+                    doc['contact_id'] = str(doc['contact_id'])
+                    # The same contact listed twice on one event: the first copy wins
+                    if doc['contact_id'] in seen_contacts:
+                        print(f"  - WARNING: Dropping invitee {doc['_id']}, a second copy of contact {doc['contact_id']} on event {event['_id']}.")
+                        skipped_duplicates += 1
+                        continue
+                    seen_contacts.add(doc['contact_id'])
+                operations.append(UpdateOne({'_id': doc['_id']}, {'$setOnInsert': doc}, upsert=True))
+
+            if operations:
+                try:
+                    result = invitees_collection.bulk_write(operations, ordered=False)
+                    migrated_invitees += result.upserted_count
+                except BulkWriteError as e:
+                    # Duplicate contacts were dropped above, so any rejected row is unexpected.
+                    # Stop with the event's embedded list intact; nothing is discarded.
+                    print(f"ERROR: Failed to migrate event {event['_id']}: {e.details.get('writeErrors')}. Aborting.")
+                    client.close()
+                    raise
+
+            events_collection.update_one({'_id': event['_id']}, {'$unset': {'invitees': ""}})
+            migrated_events += 1
+
+        print(f"  - Migrated {migrated_events}/{remaining} events ({migrated_invitees} invitees so far)")
+
+    print(f"\nSuccessfully migrated {migrated_invitees} invitee(s) across {migrated_events} event(s).")
+    if skipped_duplicates > 0:
+        print(f"WARNING: Dropped {skipped_duplicates} duplicate invitee(s) (same contact listed twice on one event).")
+
+    # --- 3. Rebuild what the app derived from the (then empty) invitees collection ---
+    print("\nRebuilding event counters and invitation expiry...")
+    _finish_migration(db)
+
+    print("\nMigration complete!")
+    client.close()
+
+if __name__ == "__main__":
+    batch_size = int(sys.argv[1]) if len(sys.argv) > 1 else DEFAULT_BATCH_SIZE
+    migrate_invitees(batch_size)
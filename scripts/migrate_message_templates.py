@@ -0,0 +1,90 @@
+# migrate_message_templates.py
+import os
+import sys
+from pymongo import MongoClient, UpdateOne
+from dotenv import load_dotenv
+
+sys.path.insert(0, os.path.abspath(os.path.join(os.path.dirname(__file__), '..')))
+from app.services.message_templates import match_template
+
+DEFAULT_BATCH_SIZE = 1000
+
+def migrate_message_templates(batch_size=DEFAULT_BATCH_SIZE):
+    """
+    Converts message logs whose stored text matches a registered template into
+    a template id plus parameters, dropping the verbatim `message_body`.
+
+    A row is only converted when re-rendering the template reproduces its
+    text exactly; anything else (custom or edited text) is left untouched.
+    The script is batched and safe to re-run.
+    """
+    print("Starting message template migration...")
+
+    # --- 1. Connect to the database ---
+    load_dotenv()
+    mongo_uri = os.getenv('MONGO_URI')
+    if not mongo_uri:
+        print("ERROR: MONGO_URI not found in .env file. Aborting.")
+        return
+
+    try:
+        client = MongoClient(mongo_uri)
+        db_name = mongo_uri.split('/')[-1].split('?')[0]
+        db = client[db_name]
+        print(f"Successfully connected to database: '{db_name}'")
+    except Exception as e:
+        print(f"ERROR: Could not connect to MongoDB. {e}")
+        return
+
+    logs_collection = db['message_logs']
+
+    # --- 2. Convert logs in batches ---
+    pending_query = {"message_body": {"$exists": True}, "template_id": {"$exists": False}}
+    remaining = logs_collection.count_documents(pending_query)
+    if remaining == 0:
+        print("\nNo message logs store verbatim text. Your system is already up to date!")
+        client.close()
+        return
+
+    print(f"\nFound {remaining} log(s) with verbatim text (batch size: {batch_size}).")
+
+    scanned = 0
+    converted = 0
+    bytes_saved = 0
+    last_id = None
+
+    while True:
+        batch_query = dict(pending_query)
+        if last_id is not None:
+            batch_query["_id"] = {"$gt": last_id}
+        batch = list(logs_collection.find(batch_query, {"message_body": 1}).sort("_id", 1).limit(batch_size))
+        if not batch:
+            break
+
+        operations = []
+        for log in batch:
+            last_id = log['_id']
+            template_id, params = match_template(log.get('message_body'))
+            if template_id is None:
+                continue
+            operations.append(UpdateOne(
+                {'_id': log['_id']},
+                {'$set': {'template_id': template_id, 'params': params}, '$unset': {'message_body': ""}}
+            ))
+            bytes_saved += len(log['message_body']) - sum(len(value) for value in params.values())
+
+        if operations:
+            converted += logs_collection.bulk_write(operations, ordered=False).modified_count
+        scanned += len(batch)
+        print(f"  - Scanned {scanned}/{remaining} logs ({converted} converted so far)")
+
+    print(f"\nConverted {converted} of {scanned} log(s) to template references (~{bytes_saved // 1024} KB of text removed).")
+    if scanned - converted > 0:
+        print(f"{scanned - converted} log(s) did not match a template and keep their verbatim text.")
+
+    print("\nMigration complete!")
+    client.close()
+
+if __name__ == "__main__":
+    batch_size = int(sys.argv[1]) if len(sys.argv) > 1 else DEFAULT_BATCH_SIZE
+    migrate_message_templates(batch_size)
@@ -0,0 +1,70 @@
+# rsvp_capacity_stress.py
+import os
+import sys
+from concurrent.futures import ThreadPoolExecutor
+from collections import Counter
+from pymongo import MongoClient
+from dotenv import load_dotenv
+from bson import ObjectId
+
+sys.path.insert(0, os.path.abspath(os.path.join(os.path.dirname(__file__), '..')))
+from app.services.event_service import EventService
+
+STRESS_DB_NAME = 'rsvp_capacity_stress'
+
+def run_stress_test(capacity=50, invitees=400, workers=200):
+    """
+    Fires `invitees` concurrent YES confirmations at an event with `capacity`
+    guest spots and checks that it never overbooks.
+
+    Runs against a throwaway database on the MONGO_URI server, which is
+    dropped afterwards; your real data is never touched.
+    """
+    print(f"Starting RSVP capacity stress test: {invitees} parallel YES submissions for {capacity} spots...")
+
+    load_dotenv()
+    mongo_uri = os.getenv('MONGO_URI')
+    if not mongo_uri:
+        print("ERROR: MONGO_URI not found in .env file. Aborting.")
+        return False
+
+    client = MongoClient(mongo_uri, maxPoolSize=workers)
+    client.drop_database(STRESS_DB_NAME)
+    db = client[STRESS_DB_NAME]
+
+    try:
+        event_service = EventService(db)
+        group_id = ObjectId()
+        event_id = event_service.create_event(
+            {'name': 'Stress Test', 'date': '2099-01-01', 'capacity': capacity}, group_id
+        )
+        contacts = [{'_id': ObjectId(), 'name': f'Guest {i}', 'phone': f'+1555{i:07d}'} for i in range(invitees)]
+        event_service.add_invitees(group_id, event_id, contacts)
+        invitee_ids = [i['_id'] for i in event_service.get_invitees(event_id, projection={'_id': 1})]
+
+        # Every invitee submits YES at least once, and a share of them twice to exercise the double-click path
+        attempts = invitee_ids + invitee_ids[: invitees // 4]
+        with ThreadPoolExecutor(max_workers=workers) as pool:
+            results = Counter(pool.map(lambda iid: event_service.confirm_invitee(event_id, iid), attempts))
+
+        event = event_service.get_event(group_id, event_id)
+        actual_confirmed = db['invitees'].count_documents({'event_id': ObjectId(event_id), 'status': 'YES'})
+
+        print(f"\nResults: {dict(results)}")
+        print(f"confirmed_count on event: {event.confirmed_count}")
+        print(f"YES rows in invitees:     {actual_confirmed}")
+
+        passed = (
+            actual_confirmed == capacity
+            and event.confirmed_count == actual_confirmed
+            and results['confirmed'] == capacity
+        )
+        print("\n✅ No overbooking detected." if passed else "\n❌ Overbooking or counter drift detected!")
+        return passed
+    finally:
+        client.drop_database(STRESS_DB_NAME)
+        client.close()
+
+if __name__ == "__main__":
+    ok = run_stress_test(*[int(arg) for arg in sys.argv[1:4]])
+    sys.exit(0 if ok else 1)
@@ -0,0 +1,13 @@
+# sms_worker.py
+import os
+
+# The worker only drains the SMS outbox; the scheduled jobs stay with the web process
+os.environ['SCHEDULER_ENABLED'] = 'false'
+
+from app import create_app
+from app.sms_worker import SMSOutboxWorker
+
+app = create_app()
+
+if __name__ == '__main__':
+    SMSOutboxWorker.from_app(app).run_forever()